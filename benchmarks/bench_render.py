@@ -0,0 +1,61 @@
+# coding=utf-8
+# Copyright 2019 YAM AI Machinery Limited
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from http import HTTPStatus
+from typing import List
+from yamas.reqresp import ContentType
+from yamas.respgen import ResponseMaker
+from benchmarks.common import main, time_calls
+
+
+def nested_template(depth: int, width: int) -> dict:
+    if depth == 0:
+        return {f'field{i}': f'value $p_{i % 2} {i}' for i in range(width)}
+    return {
+        'id': '$p_0',
+        'name': 'item $p_1',
+        'count': depth,
+        'children': [nested_template(depth - 1, width) for _ in range(2)]
+    }
+
+
+SHAPES = [(1, 4), (3, 8), (5, 8)]
+QUICK_SHAPES = [(1, 4), (3, 8)]
+
+
+def run(quick: bool) -> List[dict]:
+    results = []
+    groups = ('tomlee', '12345')
+    for depth, width in QUICK_SHAPES if quick else SHAPES:
+        for cache in (None, {'maxEntries': 1024}):
+            maker = ResponseMaker(
+                HTTPStatus.OK, {}, nested_template(depth, width),
+                ContentType.JSON, True, None, cache)
+            body_bytes = len(maker.make_response(groups).content_bytes)
+            stats = time_calls(lambda: maker.make_response(groups),
+                               200 if quick else 2000)
+            stats.update({
+                'name': 'make_response',
+                'depth': depth,
+                'width': width,
+                'body_bytes': body_bytes,
+                'render_cache': cache is not None
+            })
+            results.append(stats)
+    return results
+
+
+if __name__ == '__main__':
+    main('render', run)
@@ -0,0 +1,113 @@
+# coding=utf-8
+# Copyright 2019 YAM AI Machinery Limited
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import re
+import time
+from io import BytesIO
+from typing import List, Pattern
+from yamas.reqresp import Request, Method
+from yamas.respgen import PatternResponseGenerator
+from yamas.router import Router
+from yamas.specgen import generate_spec, sample_path
+from benchmarks.common import main, time_calls
+
+SIZES = [10, 100, 1000, 10000, 50000]
+QUICK_SIZES = [10, 100, 1000]
+SHAPE_SIZES = [1000, 10000]
+QUICK_SHAPE_SIZES = [1000]
+ROUTE_SIZES = [100, 1000, 5000]
+QUICK_ROUTE_SIZES = [100, 1000]
+ROUTE_SHAPES = ['regex', 'shared-prefix', 'no-prefix']
+
+
+def scan(patterns: List[Pattern], path: str) -> tuple:
+    for idx, cpat in enumerate(patterns):
+        match = cpat.fullmatch(path)
+        if match:
+            return idx, match.groups()
+    return None
+
+
+def path_cases(rules: int, shape: str) -> List[tuple]:
+    return [
+        ('first', sample_path(0, shape)),
+        ('middle', sample_path(rules // 2, shape)),
+        ('last', sample_path(rules - 1, shape)),
+        ('miss', '/nowhere/to/be/found')
+    ]
+
+
+def bench_route(rules: int, shape: str, number: int) -> List[dict]:
+    spec = generate_spec(rules, shape, body_size=16)
+    patterns = [re.compile(key) for key in spec['rules']]
+    router = Router(list(patterns))
+    results = []
+    for case, path in path_cases(rules, shape):
+        assert router.match(path) == scan(patterns, path)
+        for matcher, match in [('router', router.match),
+                               ('scan', lambda path: scan(patterns, path))]:
+            stats = time_calls(lambda: match(path), number)
+            stats.update({
+                'name': 'route',
+                'shape': shape,
+                'matcher': matcher,
+                'rules': rules,
+                'case': case
+            })
+            results.append(stats)
+    return results
+
+
+def bench_size(rules: int, route_cache_size: int, number: int,
+               shape: str = 'mixed') -> List[dict]:
+    spec = generate_spec(rules, shape)
+    prg = PatternResponseGenerator(route_cache_size=route_cache_size)
+    start = time.perf_counter()
+    prg.load_spec_dict(spec)
+    load_seconds = time.perf_counter() - start
+    results = []
+    for case, path in path_cases(rules, shape):
+        request = Request(path, Method.GET, {}, BytesIO(b''))
+        stats = time_calls(lambda: prg.respond(request), number)
+        stats.update({
+            'name': 'respond',
+            'shape': shape,
+            'rules': rules,
+            'route_cache_size': route_cache_size,
+            'case': case,
+            'load_seconds': load_seconds
+        })
+        results.append(stats)
+    return results
+
+
+def run(quick: bool) -> List[dict]:
+    results = []
+    for rules in QUICK_SIZES if quick else SIZES:
+        for route_cache_size in (0, 1024):
+            results.extend(bench_size(rules, route_cache_size,
+                                      200 if quick else 2000))
+    for shape in ('shared-prefix', 'no-prefix'):
+        for rules in QUICK_SHAPE_SIZES if quick else SHAPE_SIZES:
+            results.extend(bench_size(rules, 0, 200 if quick else 2000,
+                                      shape))
+    for shape in ROUTE_SHAPES:
+        for rules in QUICK_ROUTE_SIZES if quick else ROUTE_SIZES:
+            results.extend(bench_route(rules, shape, 50 if quick else 200))
+    return results
+
+
+if __name__ == '__main__':
+    main('respond', run)
@@ -0,0 +1,117 @@
+# coding=utf-8
+# Copyright 2019 YAM AI Machinery Limited
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.client import HTTPConnection
+from typing import List
+from yamas.specgen import generate_spec, sample_path
+from benchmarks.common import main, latency_stats
+
+HOST = '127.0.0.1'
+RULES = 1000
+CONFIGS = [
+    {'engine': 'http', 'threads': 8},
+    {'engine': 'asyncio', 'threads': 0}
+]
+BIN = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                   'bin', 'yamas')
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind((HOST, 0))
+        return sock.getsockname()[1]
+
+
+def start_server(spec_file: str, port: int, engine: str,
+                 threads: int) -> subprocess.Popen:
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(
+        [os.path.dirname(os.path.dirname(BIN)), env.get('PYTHONPATH', '')])
+    proc = subprocess.Popen(
+        [sys.executable, BIN, '-e', f'{HOST}:{port}', '-f', spec_file,
+         '-t', str(threads), '--engine', engine],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    for _ in range(200):
+        try:
+            socket.create_connection((HOST, port)).close()
+            return proc
+        except OSError:
+            time.sleep(0.05)
+    proc.kill()
+    raise RuntimeError(f'Server did not start on port {port}')
+
+
+def client(port: int, paths: List[str]) -> List[float]:
+    latencies = []
+    conn = HTTPConnection(HOST, port)
+    for path in paths:
+        start = time.perf_counter()
+        conn.request('GET', path)
+        conn.getresponse().read()
+        latencies.append(time.perf_counter() - start)
+    conn.close()
+    return latencies
+
+
+def bench_config(spec_file: str, config: dict, clients: int,
+                 requests: int) -> dict:
+    port = free_port()
+    proc = start_server(spec_file, port, config['engine'], config['threads'])
+    try:
+        paths = [sample_path(i % RULES) for i in range(requests)]
+        client(port, paths[:100])
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=clients) as executor:
+            futures = [executor.submit(client, port, paths[i::clients])
+                       for i in range(clients)]
+            latencies = [x for f in futures for x in f.result()]
+        elapsed = time.perf_counter() - start
+    finally:
+        proc.terminate()
+        proc.wait()
+    stats = latency_stats(latencies)
+    stats.update(config)
+    stats.update({
+        'name': 'end_to_end',
+        'rules': RULES,
+        'clients': clients,
+        'requests_per_sec': len(latencies) / elapsed
+    })
+    return stats
+
+
+def run(quick: bool) -> List[dict]:
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        spec_file = os.path.join(tmp, 'spec.json')
+        with open(spec_file, 'w') as f:
+            json.dump(generate_spec(RULES), f)
+        for config in CONFIGS:
+            results.append(bench_config(
+                spec_file, config, 4 if quick else 16,
+                1000 if quick else 20000))
+    return results
+
+
+if __name__ == '__main__':
+    main('server', run)
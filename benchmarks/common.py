@@ -0,0 +1,105 @@
+# coding=utf-8
+# Copyright 2019 YAM AI Machinery Limited
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import os
+import platform
+import sys
+import time
+from datetime import datetime, timezone
+from getopt import getopt, GetoptError
+from typing import Callable, List
+from yamas.config import VERSION
+
+
+def percentile(sorted_values: List[float], p: float) -> float:
+    if not sorted_values:
+        return 0.0
+    idx = min(len(sorted_values) - 1, int(round(p / 100 * (len(sorted_values) - 1))))
+    return sorted_values[idx]
+
+
+def latency_stats(latencies: List[float]) -> dict:
+    values = sorted(latencies)
+    return {
+        'count': len(values),
+        'mean_us': sum(values) / len(values) * 1e6 if values else 0.0,
+        'p50_us': percentile(values, 50) * 1e6,
+        'p99_us': percentile(values, 99) * 1e6,
+        'max_us': values[-1] * 1e6 if values else 0.0
+    }
+
+
+def time_calls(fn: Callable[[], any], number: int, repeat: int = 5) -> dict:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        timings.append((time.perf_counter() - start) / number)
+    best = min(timings)
+    return {
+        'calls': number * repeat,
+        'best_us': best * 1e6,
+        'mean_us': sum(timings) / len(timings) * 1e6,
+        'ops_per_sec': 1 / best if best > 0 else 0.0
+    }
+
+
+def environment() -> dict:
+    return {
+        'yamas_version': VERSION,
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'timestamp': datetime.now(timezone.utc).isoformat()
+    }
+
+
+def parse_args(argv: List[str]) -> dict:
+    try:
+        opts, _ = getopt(argv, 'o:q', ['output=', 'quick'])
+    except GetoptError as err:
+        print(err, file=sys.stderr)
+        print('Usage: [-o|--output results.json] [-q|--quick]', file=sys.stderr)
+        sys.exit(2)
+    args = {'output': None, 'quick': False}
+    for k, v in opts:
+        if k in ('-o', '--output'):
+            args['output'] = v
+        if k in ('-q', '--quick'):
+            args['quick'] = True
+    return args
+
+
+def write_results(report: dict, output: str = None):
+    text = json.dumps(report, indent=2)
+    if output:
+        with open(output, 'w') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+    return
+
+
+def main(name: str, run: Callable[[bool], List[dict]]):
+    args = parse_args(sys.argv[1:])
+    write_results({
+        'benchmark': name,
+        'environment': environment(),
+        'results': run(args['quick'])
+    }, args['output'])
+    return
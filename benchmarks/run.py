@@ -0,0 +1,33 @@
+# coding=utf-8
+# Copyright 2019 YAM AI Machinery Limited
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from benchmarks import bench_respond, bench_render, bench_server
+from benchmarks.common import parse_args, environment, write_results
+import sys
+
+BENCHMARKS = [
+    ('respond', bench_respond.run),
+    ('render', bench_render.run),
+    ('server', bench_server.run)
+]
+
+
+if __name__ == '__main__':
+    args = parse_args(sys.argv[1:])
+    report = {'environment': environment(), 'benchmarks': {}}
+    for name, run in BENCHMARKS:
+        print(f'Running {name} benchmark', file=sys.stderr)
+        report['benchmarks'][name] = run(args['quick'])
+    write_results(report, args['output'])
@@ -0,0 +1,170 @@
+# coding=utf-8
+# Copyright 2019 YAM AI Machinery Limited
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import pytest
+from io import BytesIO
+from http import HTTPStatus
+from json import dumps, loads
+from yamas.admin import RULES_PATH, GLOBAL_HEADERS_PATH
+from yamas.respgen import PatternResponseGenerator
+from yamas.reqresp import Request, Method
+from yamas.ex import MockSpecError
+
+SPEC = {'rules': {
+    '^/a$': {'GET': {'content': 'a'}},
+    '/b/{x}': {'GET': {'content': 'b $p_0', 'interpolate': True}}
+}}
+
+
+def make_prg(admin: bool = True) -> PatternResponseGenerator:
+    prg = PatternResponseGenerator()
+    if admin:
+        prg.enable_admin()
+    prg.load_spec_dict(SPEC)
+    return prg
+
+
+def call(prg, path: str, method: Method = Method.GET, body: any = None):
+    content = dumps(body).encode('utf-8') if body is not None else b''
+    return prg.respond(Request(path, method, {}, BytesIO(content)))
+
+
+class TestRuleAPI:
+
+    def test_put_rules(self):
+        prg = make_prg(False)
+        router = prg.router
+        assert call(prg, '/c').status == HTTPStatus.NOT_FOUND
+        prg.put_rules({
+            '^/c$': {'GET': {'content': 'c'}},
+            '^/a$': {'POST': {'content': 'posted'}}
+        })
+        assert prg.router is router
+        assert call(prg, '/c').content_bytes == b'c'
+        assert call(prg, '/a').status == HTTPStatus.NOT_FOUND
+        assert call(prg, '/a', Method.POST).content_bytes == b'posted'
+        assert list(prg.list_rules()) == ['^/a$', '/b/{x}', '^/c$']
+        assert prg.list_rules()['^/a$'] == {'POST': {'content': 'posted'}}
+
+    def test_delete_rules(self):
+        prg = make_prg(False)
+        prg.put_rules({'/b/{name}': {'GET': {'content': 'other'}}})
+        assert call(prg, '/b/1').content_bytes == b'b 1'
+        prg.delete_rules(['/b/{x}'])
+        assert call(prg, '/b/1').content_bytes == b'other'
+        assert list(prg.list_rules()) == ['^/a$', '/b/{name}']
+        with pytest.raises(MockSpecError):
+            prg.delete_rules(['/b/{x}'])
+        prg.put_rules({'/b/{x}': {'GET': {'content': 'back'}}})
+        assert call(prg, '/b/1').content_bytes == b'other'
+
+    def test_put_empty_rule(self):
+        prg = PatternResponseGenerator()
+        prg.load_spec_dict({'rules': {
+            '^/a$': {'GET': {'content': 'a'}},
+            '^/(.*)$': {'GET': {'content': 'any'}}
+        }})
+        prg.put_rules({'^/a$': {}, '^/b$': {'GET': {}}})
+        assert call(prg, '/a').content_bytes == b'any'
+        assert call(prg, '/b').content_bytes == b'any'
+        rules = prg.list_rules()
+        assert list(rules) == ['^/a$', '^/(.*)$', '^/b$']
+        prg.set_global_headers({'X-Mock': 'yes'})
+        assert list(prg.list_rules()) == list(rules)
+        assert call(prg, '/a').content_bytes == b'any'
+        reloaded = PatternResponseGenerator()
+        reloaded.load_spec_dict({'rules': rules})
+        assert call(reloaded, '/a').content_bytes == b'any'
+
+    def test_delete_empty_rule(self):
+        prg = PatternResponseGenerator()
+        prg.load_spec_dict({'rules': {
+            '^/a$': {'GET': {'content': 'a'}},
+            '^/e$': {'GET': {}}
+        }})
+        assert list(prg.list_rules()) == ['^/a$', '^/e$']
+        prg.delete_rules(['^/e$', '^/e$'])
+        assert list(prg.list_rules()) == ['^/a$']
+        assert call(prg, '/a').content_bytes == b'a'
+        assert call(prg, '/e').status == HTTPStatus.NOT_FOUND
+
+    @pytest.mark.parametrize('rules', [
+        {'^/a$': {'GET': {'status': 999}}},
+        {'^/(a$': {'GET': {'content': 'a'}}},
+        {'^/a$': {'GET': {'content': 1}}}
+    ])
+    def test_invalid_rules(self, rules):
+        prg = make_prg(False)
+        with pytest.raises(MockSpecError):
+            prg.put_rules(dict(rules, **{'^/c$': {'GET': {'content': 'c'}}}))
+        assert call(prg, '/c').status == HTTPStatus.NOT_FOUND
+        assert call(prg, '/a').content_bytes == b'a'
+
+    def test_global_headers(self):
+        prg = make_prg(False)
+        router = prg.router
+        prg.set_global_headers({'X-Mock': 'yes'})
+        assert prg.router is router
+        assert call(prg, '/a').headers['X-Mock'] == 'yes'
+        assert call(prg, '/b/1').headers['X-Mock'] == 'yes'
+        with pytest.raises(MockSpecError):
+            prg.set_global_headers({'Server': 'x'})
+
+
+class TestAdminAPI:
+
+    def test_disabled(self):
+        prg = make_prg(False)
+        assert call(prg, RULES_PATH).status == HTTPStatus.NOT_FOUND
+
+    def test_rules(self):
+        prg = make_prg()
+        response = call(prg, RULES_PATH)
+        assert response.status == HTTPStatus.OK
+        assert loads(response.content_bytes) == SPEC
+        response = call(prg, RULES_PATH, Method.PUT,
+                        {'rules': {'^/c$': {'GET': {'content': 'c'}}}})
+        assert response.status == HTTPStatus.NO_CONTENT
+        assert call(prg, '/c').content_bytes == b'c'
+        response = call(prg, RULES_PATH, Method.DELETE, {'rules': ['^/a$']})
+        assert response.status == HTTPStatus.NO_CONTENT
+        assert call(prg, '/a').status == HTTPStatus.NOT_FOUND
+        assert list(loads(call(prg, RULES_PATH).content_bytes)['rules']) == \
+            ['/b/{x}', '^/c$']
+
+    def test_global_headers(self):
+        prg = make_prg()
+        response = call(prg, GLOBAL_HEADERS_PATH, Method.PUT,
+                        {'headers': {'X-Mock': 'yes'}})
+        assert response.status == HTTPStatus.NO_CONTENT
+        assert call(prg, '/a').headers['X-Mock'] == 'yes'
+        response = call(prg, GLOBAL_HEADERS_PATH)
+        assert loads(response.content_bytes) == {'headers': {'X-Mock': 'yes'}}
+
+    @pytest.mark.parametrize('path, method, body, status', [
+        (RULES_PATH, Method.PUT, {'rules': {'^/a$': {'GET': {'status': 999}}}},
+         HTTPStatus.BAD_REQUEST),
+        (RULES_PATH, Method.PUT, {'rules': []}, HTTPStatus.BAD_REQUEST),
+        (RULES_PATH, Method.PUT, [], HTTPStatus.BAD_REQUEST),
+        (RULES_PATH, Method.DELETE, {'rules': ['^/x$']},
+         HTTPStatus.BAD_REQUEST),
+        (RULES_PATH, Method.PATCH, None, HTTPStatus.METHOD_NOT_ALLOWED),
+        ('/__yamas/admin/nowhere', Method.GET, None, HTTPStatus.NOT_FOUND)
+    ])
+    def test_errors(self, path, method, body, status):
+        prg = make_prg()
+        response = call(prg, path, method, body)
+        assert response.status == status
+        assert 'error' in loads(response.content_bytes)
@@ -0,0 +1,152 @@
+# coding=utf-8
+# Copyright 2019 YAM AI Machinery Limited
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+import pytest
+from http import HTTPStatus
+from yamas.aioserver import AsyncMockServer
+from yamas.respgen import PatternResponseGenerator
+
+SPEC = {
+    'rules': {
+        '/echo/{word}': {
+            'GET': {'content': 'echo $word', 'interpolate': True},
+            'POST': {'content': {'ok': True}, 'contentType': 'json'},
+            'HEAD': {'content': 'echo $word', 'interpolate': True}
+        },
+        '/feed/{word}': {
+            'GET': {'stream': {'record': '$word $n', 'count': 3},
+                    'interpolate': True}
+        }
+    }
+}
+
+
+def exchange(raw: bytes) -> bytes:
+    respgen = PatternResponseGenerator()
+    respgen.load_spec_dict(SPEC)
+    server = AsyncMockServer(respgen, 'Yamas test')
+
+    async def run():
+        reader = asyncio.StreamReader()
+        reader.feed_data(raw)
+        reader.feed_eof()
+        transport = MemoryTransport()
+        protocol = asyncio.StreamReaderProtocol(reader)
+        writer = asyncio.StreamWriter(
+            transport, protocol, reader, asyncio.get_event_loop())
+        await server.handle_connection(reader, writer)
+        return b''.join(transport.written)
+
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(run())
+    finally:
+        loop.close()
+
+
+class MemoryTransport(asyncio.Transport):
+    def __init__(self):
+        super().__init__()
+        self.written = []
+
+    def write(self, data):
+        self.written.append(data)
+
+    def is_closing(self):
+        return False
+
+    def close(self):
+        pass
+
+    def get_extra_info(self, name, default=None):
+        return default
+
+
+def split_responses(data: bytes) -> list:
+    responses = []
+    while data:
+        head, _, rest = data.partition(b'\r\n\r\n')
+        lines = head.decode('latin-1').split('\r\n')
+        headers = dict(line.split(': ', 1) for line in lines[1:])
+        length = int(headers.get('Content-Length', 0))
+        responses.append((lines[0], headers, rest[:length]))
+        data = rest[length:]
+    return responses
+
+
+class TestAsyncMockServer:
+
+    def test_keep_alive(self):
+        responses = split_responses(exchange(
+            b'GET /echo/a HTTP/1.1\r\nHost: x\r\n\r\n'
+            b'POST /echo/b HTTP/1.1\r\nContent-Length: 5\r\n\r\nhello'
+            b'GET /echo/c HTTP/1.1\r\nConnection: close\r\n\r\n'
+            b'GET /echo/d HTTP/1.1\r\n\r\n'
+        ))
+        assert [r[0] for r in responses] == ['HTTP/1.1 200 OK'] * 3
+        assert [r[2] for r in responses] == \
+            [b'echo a', b'{"ok": true}', b'echo c']
+        assert responses[0][1]['Server'] == 'Yamas test'
+        assert 'Connection' not in responses[1][1]
+        assert responses[2][1]['Connection'] == 'close'
+
+    def test_http10_closes(self):
+        responses = split_responses(exchange(
+            b'GET /echo/a HTTP/1.0\r\n\r\nGET /echo/b HTTP/1.0\r\n\r\n'))
+        assert len(responses) == 1
+        assert responses[0][1]['Connection'] == 'close'
+
+    def test_chunked_request_body(self):
+        responses = split_responses(exchange(
+            b'POST /echo/a HTTP/1.1\r\nTransfer-Encoding: chunked\r\n\r\n'
+            b'3\r\nabc\r\n0\r\n\r\n'
+            b'GET /echo/b HTTP/1.1\r\n\r\n'))
+        assert [r[2] for r in responses] == [b'{"ok": true}', b'echo b']
+
+    def test_head(self):
+        data = exchange(b'HEAD /echo/abc HTTP/1.1\r\n\r\n')
+        assert data.endswith(b'Content-Length: 8\r\n\r\n')
+
+    errors = [
+        (b'GARBAGE\r\n\r\n', HTTPStatus.BAD_REQUEST),
+        (b'BREW /echo/a HTTP/1.1\r\n\r\n', HTTPStatus.NOT_IMPLEMENTED),
+        (b'GET /echo/a HTTP/1.1\r\nContent-Length: x\r\n\r\n',
+         HTTPStatus.BAD_REQUEST),
+        (b'GET /nowhere HTTP/1.1\r\nConnection: close\r\n\r\n',
+         HTTPStatus.NOT_FOUND)
+    ]
+
+    @pytest.mark.parametrize('raw, status', errors)
+    def test_errors(self, raw, status):
+        responses = split_responses(exchange(raw))
+        assert len(responses) == 1
+        assert responses[0][0] == f'HTTP/1.1 {status.value} {status.phrase}'
+
+    def test_stream(self):
+        data = exchange(
+            b'GET /feed/a HTTP/1.1\r\n\r\nGET /echo/b HTTP/1.1\r\n\r\n')
+        head, _, rest = data.partition(b'\r\n\r\n')
+        assert b'Transfer-Encoding: chunked' in head
+        assert b'Content-Length' not in head
+        assert rest.startswith(b'c\r\na 0\na 1\na 2\n\r\n0\r\n\r\n')
+        assert rest.endswith(b'echo b')
+
+    def test_stream_http10(self):
+        data = exchange(b'GET /feed/a HTTP/1.0\r\n\r\n')
+        head, _, rest = data.partition(b'\r\n\r\n')
+        assert b'Transfer-Encoding' not in head
+        assert b'Connection: close' in head
+        assert rest == b'a 0\na 1\na 2\n'
@@ -0,0 +1,73 @@
+# coding=utf-8
+# Copyright 2019 YAM AI Machinery Limited
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import pytest
+from yamas.cache import LRUCache, MISSING
+
+
+class TestLRUCache:
+
+    def test_get_put(self):
+        cache = LRUCache(2)
+        assert cache.get('a') is MISSING
+        cache.put('a', 1)
+        cache.put('b', None)
+        assert cache.get('a') == 1
+        assert cache.get('b') is None
+        assert cache.stats() == {
+            'size': 2, 'maxsize': 2, 'bytes': 0, 'maxbytes': None,
+            'hits': 2, 'misses': 1, 'evictions': 0
+        }
+
+    def test_eviction(self):
+        cache = LRUCache(2)
+        cache.put('a', 1)
+        cache.put('b', 2)
+        cache.get('a')
+        cache.put('c', 3)
+        assert cache.get('b') is MISSING
+        assert cache.get('a') == 1
+        assert cache.get('c') == 3
+        assert cache.evictions == 1
+
+    def test_disabled(self):
+        cache = LRUCache(0)
+        cache.put('a', 1)
+        assert cache.get('a') is MISSING
+        assert cache.stats()['size'] == 0
+
+    def test_clear(self):
+        cache = LRUCache(2)
+        cache.put('a', 1)
+        cache.clear()
+        assert cache.get('a') is MISSING
+
+    def test_byte_limit(self):
+        cache = LRUCache(10, 5)
+        cache.put('a', 1, 2)
+        cache.put('b', 2, 2)
+        cache.put('a', 1, 4)
+        assert cache.get('b') is MISSING
+        assert cache.bytes == 4
+        cache.put('c', 3, 6)
+        assert cache.get('c') is MISSING
+        assert cache.get('a') == 1
+        cache.clear()
+        assert cache.bytes == 0
+
+    @pytest.mark.parametrize('maxsize, maxbytes', [(-1, None), (1, -1)])
+    def test_negative_size(self, maxsize, maxbytes):
+        with pytest.raises(ValueError):
+            LRUCache(maxsize, maxbytes)
@@ -0,0 +1,66 @@
+# coding=utf-8
+# Copyright 2019 YAM AI Machinery Limited
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import gzip
+import zlib
+import pytest
+from yamas.compression import Compression, negotiate, vary_headers
+
+
+class TestCompression:
+
+    negotiations = [
+        ('gzip', ('gzip', 'deflate'), 'gzip'),
+        ('gzip, deflate, br', ('deflate', 'gzip'), 'deflate'),
+        ('deflate;q=0.5, gzip;q=0.8', ('deflate', 'gzip'), 'gzip'),
+        ('GZIP; Q=0.1', ('gzip',), 'gzip'),
+        ('gzip;q=0', ('gzip',), None),
+        ('*', ('gzip',), 'gzip'),
+        ('*;q=0.5, gzip;q=0', ('gzip', 'deflate'), 'deflate'),
+        ('identity', ('gzip',), None),
+        ('br', ('gzip',), None),
+        ('gzip;q=x', ('gzip',), None)
+    ]
+
+    @pytest.mark.parametrize('accept, encodings, expected', negotiations)
+    def test_negotiate(self, accept, encodings, expected):
+        assert negotiate(accept, encodings) == expected
+
+    def test_no_accept_encoding(self):
+        assert Compression().negotiate(None) is None
+        assert Compression().negotiate('') is None
+
+    def test_compress(self):
+        compression = Compression(('gzip', 'deflate'))
+        data = b'{"a": 1}' * 100
+        assert gzip.decompress(compression.compress(data, 'gzip')) == data
+        assert zlib.decompress(compression.compress(data, 'deflate')) == data
+        assert compression.compress(data, 'gzip') == \
+            compression.compress(data, 'gzip')
+
+    def test_unsupported(self):
+        with pytest.raises(ValueError):
+            Compression(('br',))
+
+    vary = [
+        ({}, 'Accept-Encoding'),
+        ({'Vary': 'Origin'}, 'Origin, Accept-Encoding'),
+        ({'Vary': 'accept-encoding'}, 'accept-encoding'),
+        ({'Vary': '*'}, '*')
+    ]
+
+    @pytest.mark.parametrize('headers, expected', vary)
+    def test_vary_headers(self, headers, expected):
+        assert vary_headers(headers)['Vary'] == expected
@@ -0,0 +1,94 @@
+# coding=utf-8
+# Copyright 2019 YAM AI Machinery Limited
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import multiprocessing
+import os
+import pytest
+from collections import Counter
+from io import BytesIO
+from http import HTTPStatus
+from yamas.counters import LocalCounter, SharedCounters
+from yamas.respgen import PatternResponseGenerator, ResponseMaker
+from yamas.reqresp import Request, Method
+
+fork = pytest.mark.skipif(not hasattr(os, 'fork'), reason='requires os.fork')
+
+
+def advance_many(counter, size, loop, times, results):
+    results.put([counter.advance(size, loop) for _ in range(times)])
+
+
+def run_processes(counter, size, loop, processes, times) -> Counter:
+    context = multiprocessing.get_context('fork')
+    results = context.Queue()
+    workers = [
+        context.Process(target=advance_many,
+                        args=(counter, size, loop, times, results))
+        for _ in range(processes)
+    ]
+    for worker in workers:
+        worker.start()
+    positions = Counter()
+    for _ in workers:
+        positions.update(results.get(timeout=10))
+    for worker in workers:
+        worker.join()
+    return positions
+
+
+class TestCounters:
+
+    @pytest.mark.parametrize('loop, expected', [
+        (True, [0, 1, 2, 0, 1]),
+        (False, [0, 1, 2, 2, 2])
+    ])
+    def test_local_counter(self, loop, expected):
+        counter = LocalCounter()
+        assert [counter.advance(3, loop) for _ in range(5)] == expected
+
+    def test_shrunk_sequence(self):
+        counter = LocalCounter(5)
+        assert counter.advance(3, True) == 0
+
+    @fork
+    def test_shared_loop(self):
+        counter = SharedCounters(4).counter(2)
+        positions = run_processes(counter, 3, True, 4, 30)
+        assert positions == {0: 40, 1: 40, 2: 40}
+        assert counter.value == 0
+
+    @fork
+    def test_shared_no_loop(self):
+        counter = SharedCounters(1).counter(0)
+        positions = run_processes(counter, 3, False, 4, 30)
+        assert positions == {0: 1, 1: 1, 2: 118}
+
+    @fork
+    def test_share_counters(self):
+        prg = PatternResponseGenerator()
+        prg.load_spec_dict({'rules': {'^/a$': {'GET': {'content': '0'}}}})
+        respsel = prg.rule_table[0][Method.GET]
+        respsel.loop = True
+        for i in range(1, 3):
+            respsel.add_response_maker(
+                ResponseMaker(HTTPStatus.OK, {}, str(i), None, False, {}))
+        request = Request('/a', Method.GET, {}, BytesIO(b''))
+        assert prg.respond(request).content_bytes == b'0'
+        prg.share_counters()
+        context = multiprocessing.get_context('fork')
+        child = context.Process(target=prg.respond, args=(request,))
+        child.start()
+        child.join()
+        assert prg.respond(request).content_bytes == b'2'
@@ -0,0 +1,51 @@
+# coding=utf-8
+# Copyright 2019 YAM AI Machinery Limited
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import random
+import pytest
+from yamas.delay import make_delay, FixedDelay, UniformDelay, LognormalDelay
+from yamas.ex import MockSpecError
+
+
+class TestDelay:
+
+    def test_fixed(self):
+        delay = make_delay(250)
+        assert isinstance(delay, FixedDelay)
+        assert delay.sample() == 0.25
+        assert make_delay(0) is None
+        assert make_delay(None) is None
+
+    def test_uniform(self):
+        delay = make_delay({'min': 100, 'max': 200})
+        assert isinstance(delay, UniformDelay)
+        samples = [delay.sample() for _ in range(1000)]
+        assert all(0.1 <= x <= 0.2 for x in samples)
+
+    def test_lognormal(self):
+        random.seed(1)
+        delay = make_delay({'p50': 100, 'p99': 1000})
+        assert isinstance(delay, LognormalDelay)
+        samples = sorted(delay.sample() for _ in range(20000))
+        assert samples[10000] == pytest.approx(0.1, rel=0.1)
+        assert samples[19800] == pytest.approx(1.0, rel=0.2)
+
+    @pytest.mark.parametrize('delay', [
+        {'min': 200, 'max': 100}, {'p50': 100, 'p99': 50}, {'p50': 0, 'p99': 1},
+        {'min': 1}, 'slow', True
+    ])
+    def test_invalid(self, delay):
+        with pytest.raises(MockSpecError):
+            make_delay(delay)
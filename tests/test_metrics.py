@@ -0,0 +1,114 @@
+# coding=utf-8
+# Copyright 2019 YAM AI Machinery Limited
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import multiprocessing
+import os
+import pytest
+from io import BytesIO
+from yamas.metrics import Metrics, METRICS_PATH, escape_label
+from yamas.respgen import PatternResponseGenerator
+from yamas.reqresp import Request, Method
+
+SPEC = {'rules': {
+    '^/a$': {'GET': {'content': 'a'}, 'POST': {'status': 201}},
+    '/b/{x}': {'GET': {'content': 'b'}}
+}}
+
+
+def request(path: str, method: Method = Method.GET) -> Request:
+    return Request(path, method, {}, BytesIO(b''))
+
+
+class TestMetrics:
+
+    def test_counters(self):
+        metrics = Metrics(['^/a$', '/b/{x}'])
+        metrics.hit(0, Method.GET)
+        metrics.hit(0, Method.GET)
+        metrics.hit(1, Method.POST)
+        metrics.miss(Method.GET)
+        metrics.observe(Method.GET, 100, 0.002)
+        metrics.observe(Method.GET, 50, 20.0)
+        text = metrics.render().decode()
+        assert 'yamas_requests_total{rule="0",pattern="^/a$",method="GET"} 2' in text
+        assert 'yamas_requests_total{rule="1",pattern="/b/{x}",method="POST"} 1' in text
+        assert 'method="PUT"' not in text
+        assert 'yamas_not_found_total{method="GET"} 1' in text
+        assert 'yamas_response_bytes_total{method="GET"} 150' in text
+        assert 'yamas_request_duration_seconds_bucket{method="GET",le="0.001"} 0' in text
+        assert 'yamas_request_duration_seconds_bucket{method="GET",le="0.0025"} 1' in text
+        assert 'yamas_request_duration_seconds_bucket{method="GET",le="10.0"} 1' in text
+        assert 'yamas_request_duration_seconds_bucket{method="GET",le="+Inf"} 2' in text
+        assert 'yamas_request_duration_seconds_sum{method="GET"} 20.002' in text
+        assert 'yamas_request_duration_seconds_count{method="GET"} 2' in text
+        assert text.endswith('\n')
+
+    @pytest.mark.parametrize('value, expected', [
+        ('^/a$', '^/a$'),
+        ('^/(\\w+)$', '^/(\\\\w+)$'),
+        ('"x"\n', '\\"x\\"\\n')
+    ])
+    def test_escape_label(self, value, expected):
+        assert escape_label(value) == expected
+
+    def test_keep_hits_for_unchanged_patterns(self):
+        metrics = Metrics(['/a', '/b'])
+        metrics.hit(1, Method.GET)
+        metrics.set_patterns(['/c', '/b'])
+        width = len(list(Method))
+        assert list(metrics.hits) == [0] * width + [1] + [0] * (width - 1)
+
+    @pytest.mark.skipif(not hasattr(os, 'fork'), reason='requires os.fork')
+    def test_shared(self):
+        metrics = Metrics(['/a'])
+        metrics.hit(0, Method.GET)
+        metrics.share()
+        context = multiprocessing.get_context('fork')
+        children = [context.Process(target=metrics.hit, args=(0, Method.GET))
+                    for _ in range(3)]
+        for child in children:
+            child.start()
+        for child in children:
+            child.join()
+        assert metrics.hits[0] == 4
+
+
+class TestRespondMetrics:
+
+    def test_disabled(self):
+        prg = PatternResponseGenerator()
+        prg.load_spec_dict(SPEC)
+        assert prg.metrics is None
+        assert prg.respond(request(METRICS_PATH)).status.value == 404
+
+    def test_respond(self):
+        prg = PatternResponseGenerator()
+        prg.enable_metrics()
+        prg.load_spec_dict(SPEC)
+        prg.respond(request('/a'))
+        prg.respond(request('/a', Method.POST))
+        prg.respond(request('/b/1'))
+        prg.respond(request('/b/2'))
+        prg.respond(request('/c'))
+        prg.respond(request('/a', Method.PUT))
+        response = prg.respond(request(METRICS_PATH))
+        assert response.status.value == 200
+        assert response.headers['Content-Type'].startswith('text/plain')
+        text = response.content_bytes.decode()
+        assert 'pattern="^/a$",method="GET"} 1' in text
+        assert 'pattern="^/a$",method="POST"} 1' in text
+        assert 'pattern="/b/{x}",method="GET"} 2' in text
+        assert 'yamas_not_found_total{method="GET"} 1' in text
+        assert 'yamas_not_found_total{method="PUT"} 1' in text
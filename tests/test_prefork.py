@@ -0,0 +1,98 @@
+# coding=utf-8
+# Copyright 2019 YAM AI Machinery Limited
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+import pytest
+import requests
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ENV = dict(os.environ, PYTHONPATH=ROOT)
+HOST = '127.0.0.1'
+PORT = 7790
+
+CRASHING_WORKER = '''
+import os, sys, time
+import yamas.prefork
+from yamas.prefork import PreforkServer, bind_socket
+yamas.prefork.RESPAWN_INTERVAL = 0.01
+marker = sys.argv[1]
+
+def serve(sock):
+    with open(marker, 'a') as f:
+        f.write(f'{os.getpid()}\\n')
+    with open(marker) as f:
+        if len(f.readlines()) <= 2:
+            os._exit(3)
+    time.sleep(60)
+
+PreforkServer(bind_socket('127.0.0.1', 0), serve, 1).run()
+'''
+
+
+def wait_for(condition, timeout: float = 10):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.05)
+    return False
+
+
+def port_open() -> bool:
+    try:
+        socket.create_connection((HOST, PORT)).close()
+        return True
+    except OSError:
+        return False
+
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason='requires os.fork')
+class TestPreforkServer:
+
+    def test_restart_and_stop(self, tmp_path):
+        marker = tmp_path / 'workers'
+        proc = subprocess.Popen(
+            [sys.executable, '-c', CRASHING_WORKER, str(marker)], env=ENV)
+        try:
+            assert wait_for(lambda: marker.exists() and
+                            len(marker.read_text().split()) == 3)
+            proc.send_signal(signal.SIGTERM)
+            assert proc.wait(10) == 0
+        finally:
+            proc.kill()
+
+    @pytest.mark.parametrize('engine', ['http', 'asyncio'])
+    def test_workers(self, engine):
+        proc = subprocess.Popen(
+            [sys.executable, os.path.join(ROOT, 'bin', 'yamas'),
+             '-e', f'{HOST}:{PORT}', '-w', '2', '--engine', engine,
+             '-f', os.path.join(ROOT, 'data', 'mock_responses.json')],
+            env=ENV, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            assert wait_for(port_open)
+            for _ in range(10):
+                response = requests.get(
+                    f'http://{HOST}:{PORT}/users/tomlee/profile')
+                assert response.status_code == 200
+                assert response.content == b'Hello tomlee'
+            proc.send_signal(signal.SIGTERM)
+            assert proc.wait(10) == 0
+        finally:
+            proc.kill()
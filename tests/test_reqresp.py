@@ -20,7 +20,8 @@ from enum import Enum
 from io import BytesIO
 from collections import OrderedDict
 from json import dumps
-from yamas.reqresp import Request, Method, Response
+from yamas.reqresp import Request, RequestBody, Method, Response, \
+    encode_head, server_line, CONNECTION_CLOSE
 from http import HTTPStatus
 import pytest
 import inspect
@@ -59,3 +60,42 @@ class TestResponse:
         assert resp.status == HTTPStatus.OK
         assert resp.headers == HEADERS
         assert resp.content_bytes == CONTENT_BYTES
+
+    def test_encode_headers(self, resp):
+        assert resp.encode_headers() == \
+            b'a: 1\r\nb: 2\r\nContent-Length: %d\r\n' % len(CONTENT_BYTES)
+        assert Response(HTTPStatus.NO_CONTENT, {}, b'').encode_headers() == b''
+
+    def test_encode_head(self, resp):
+        head = encode_head(resp, server_line('yamas 1.0'), CONNECTION_CLOSE)
+        lines = head.split(b'\r\n')
+        assert lines[0] == b'HTTP/1.1 200 OK'
+        assert lines[1] == b'Server: yamas 1.0'
+        assert lines[2].startswith(b'Date: ')
+        assert lines[3:] == [b'a: 1', b'b: 2',
+                             b'Content-Length: %d' % len(CONTENT_BYTES),
+                             b'Connection: close', b'', b'']
+
+
+class TestRequestBody:
+
+    def test_read_and_drain(self):
+        rfile = BytesIO(CONTENT_BYTES + b'next request')
+        body = RequestBody(rfile, len(CONTENT_BYTES))
+        assert body.read(2) == CONTENT_BYTES[:2]
+        body.drain()
+        assert body.remaining == 0
+        assert body.read() == b''
+        assert rfile.read() == b'next request'
+
+    def test_request(self):
+        rfile = BytesIO(CONTENT_BYTES + b'next request')
+        req = Request(PATH, METHOD, HEADERS,
+                      RequestBody(rfile, len(CONTENT_BYTES)))
+        assert req.content_json() == CONTENT_JSON
+        assert rfile.read() == b'next request'
+
+    def test_truncated(self):
+        body = RequestBody(BytesIO(b'abc'), 10)
+        assert body.read() == b'abc'
+        assert body.remaining == 0
@@ -13,6 +13,9 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import gzip
+import re
+import zlib
 import pytest
 from io import BytesIO
 from http import HTTPStatus
@@ -129,6 +132,27 @@ prg_for_testing_interpolation.load_spec_dict(
     }
 )
 
+prg_with_templates = PatternResponseGenerator()
+prg_with_templates.load_spec_dict(
+    {
+        'rules': {
+            '/users/{user}/todo/{id:int}': {
+                'GET': {
+                    'content': {'user': '$user', 'id': '$p_1'},
+                    'contentType': 'json',
+                    'interpolate': True
+                }
+            },
+            '^/users/(?P<user>\\w+)/todo/(\\w+)$': {
+                'GET': {
+                    'content': '$user $p_1',
+                    'interpolate': True
+                }
+            }
+        }
+    }
+)
+
 
 class TestPatternResponseGenerator:
 
@@ -539,3 +563,271 @@ class TestPatternResponseGenerator:
             )
         )
         assert actual_resp.status == resp['status']
+
+    template_reqresps = [
+        ('/users/tomlee/todo/123', dumps({'user': 'tomlee', 'id': '123'})),
+        ('/users/tomlee/todo/abc', 'tomlee abc')
+    ]
+
+    @pytest.mark.parametrize('path, content', template_reqresps)
+    def test_path_template(self, path, content):
+        actual_resp = prg_with_templates.respond(
+            Request(path, Method.GET, {}, BytesIO(b''))
+        )
+        assert actual_resp.status == HTTPStatus.OK
+        assert actual_resp.content_bytes == content.encode('utf-8')
+
+    def test_route_cache(self):
+        prg = PatternResponseGenerator(route_cache_size=1)
+        prg.load_spec_dict({'rules': {'^/a/(\\w+)$': {'GET': {'content': 'a'}}}})
+        for path in ['/a/x', '/a/x', '/a/y', '/b']:
+            prg.respond(Request(path, Method.GET, {}, BytesIO(b'')))
+        assert prg.route_cache.stats() == {
+            'size': 1, 'maxsize': 1, 'bytes': 0, 'maxbytes': None,
+            'hits': 1, 'misses': 3, 'evictions': 2
+        }
+        assert prg.respond(Request('/b', Method.GET, {}, BytesIO(b''))) \
+            .status == HTTPStatus.NOT_FOUND
+        prg.load_spec_dict({'rules': {'^/b$': {'GET': {'content': 'b'}}}})
+        assert prg.route_cache.stats()['size'] == 0
+        assert prg.respond(Request('/b', Method.GET, {}, BytesIO(b''))) \
+            .content_bytes == b'b'
+
+    def test_prebuilt_response(self):
+        prg = PatternResponseGenerator()
+        prg.load_spec_dict({'rules': {'^/a$': {'GET': {
+            'headers': {'X-A': '1'}, 'content': 'abc'}}}})
+        first = prg.respond(Request('/a', Method.GET, {}, BytesIO(b'')))
+        second = prg.respond(Request('/a', Method.GET, {}, BytesIO(b'')))
+        assert first is second
+        assert first.encode_headers().startswith(b'X-A: 1\r\n')
+        assert first.encode_headers().endswith(b'Content-Length: 3\r\n')
+
+    def test_non_latin1_header(self):
+        prg = PatternResponseGenerator()
+        with pytest.raises(MockSpecError):
+            prg.load_spec_dict({'rules': {'^/a$': {'GET': {
+                'headers': {'X-A': '中'}}}}})
+
+    def test_list_template(self):
+        prg = PatternResponseGenerator()
+        prg.load_spec_dict({'rules': {'^/a/(\\w+)$': {'GET': {
+            'contentType': 'json',
+            'content': [{'name': '$p_0'}, ['$p_0', 1]],
+            'interpolate': True}}}})
+        resp = prg.respond(Request('/a/x', Method.GET, {}, BytesIO(b'')))
+        assert resp.content_bytes == b'[{"name": "x"}, ["x", 1]]'
+
+    def test_render_cache(self):
+        prg = PatternResponseGenerator()
+        prg.load_spec_dict({
+            'global': {'cache': {'maxEntries': 2}},
+            'rules': {
+                '^/a/(\\w+)$': {'GET': {
+                    'content': 'a $p_0', 'interpolate': True}},
+                '^/b/(\\w+)$': {'GET': {
+                    'content': 'b $p_0', 'interpolate': True,
+                    'cache': {'maxEntries': 0}}},
+                '^/c/(\\w+)$': {'GET': {
+                    'content': 'c $p_0 $p_1', 'interpolate': True}}
+            }
+        })
+
+        def respond(path):
+            return prg.respond(Request(path, Method.GET, {}, BytesIO(b'')))
+
+        assert respond('/a/x') is respond('/a/x')
+        assert respond('/a/y').content_bytes == b'a y'
+        assert respond('/b/x') is not respond('/b/x')
+        assert respond('/c/x').status == HTTPStatus.INTERNAL_SERVER_ERROR
+        assert respond('/c/x') is not respond('/c/x')
+        maker = prg.rules[re.compile('^/a/(\\w+)$')][Method.GET] \
+            .response_makers[0]
+        assert maker.render_cache.stats()['hits'] == 1
+
+    @pytest.mark.parametrize('cache', [{'maxEntries': -1}, {'size': 1}, 1])
+    def test_invalid_render_cache(self, cache):
+        prg = PatternResponseGenerator()
+        with pytest.raises(MockSpecError):
+            prg.load_spec_json(
+                dumps({'rules': {'^/a$': {'GET': {'cache': cache}}}}))
+
+    def test_compression(self):
+        prg = PatternResponseGenerator()
+        big = 'x' * 2000
+        prg.load_spec_dict({
+            'global': {'compression': {'encodings': ['gzip', 'deflate']}},
+            'rules': {
+                '^/big$': {'GET': {'content': big}},
+                '^/small$': {'GET': {'content': 'small'}},
+                '^/raw$': {'GET': {'content': big,
+                                   'headers': {'Content-Encoding': 'br'}}},
+                '^/echo/(\\w+)$': {'GET': {
+                    'content': '$p_0' * 600, 'interpolate': True}}
+            }
+        })
+
+        def respond(path, accept):
+            return prg.respond(Request(
+                path, Method.GET, {'Accept-Encoding': accept}, BytesIO(b'')))
+
+        resp = respond('/big', 'gzip')
+        assert resp.headers['Content-Encoding'] == 'gzip'
+        assert resp.headers['Vary'] == 'Accept-Encoding'
+        assert gzip.decompress(resp.content_bytes) == big.encode('utf-8')
+        assert b'Content-Length: %d\r\n' % len(resp.content_bytes) in \
+            resp.encode_headers()
+        assert respond('/big', 'gzip') is resp
+        resp = respond('/big', 'deflate')
+        assert zlib.decompress(resp.content_bytes) == big.encode('utf-8')
+        resp = respond('/big', 'br')
+        assert resp.content_bytes == big.encode('utf-8')
+        assert resp.headers['Vary'] == 'Accept-Encoding'
+        assert 'Vary' not in respond('/small', 'gzip').headers
+        assert respond('/raw', 'gzip').headers['Content-Encoding'] == 'br'
+        resp = respond('/echo/x', 'gzip')
+        assert resp.content_bytes == b'x' * 600
+        assert resp.headers['Vary'] == 'Accept-Encoding'
+        assert 'Content-Encoding' not in resp.headers
+        resp = respond('/echo/abc', 'gzip')
+        assert resp.headers['Content-Encoding'] == 'gzip'
+        assert gzip.decompress(resp.content_bytes) == b'abc' * 600
+
+    def test_content_file(self, tmp_path):
+        (tmp_path / 'data.txt').write_bytes(b'file content')
+        prg = PatternResponseGenerator()
+        prg.load_spec_dict({
+            'global': {'compression': {'minSize': 0}},
+            'rules': {'^/a$': {'GET': {'contentFile': 'data.txt'}}}
+        }, str(tmp_path))
+        resp = prg.respond(Request(
+            '/a', Method.GET, {'Accept-Encoding': 'gzip'}, BytesIO(b'')))
+        assert resp.content_bytes == b''
+        assert resp.content_file.path == str(tmp_path / 'data.txt')
+        assert bytes(resp.content_file.view()) == b'file content'
+        assert resp.headers['Content-Type'] == 'text/plain'
+        assert 'Content-Encoding' not in resp.headers
+        assert b'Content-Length: 12\r\n' in resp.encode_headers()
+
+    invalid_content_files = [
+        {'contentFile': 'missing.txt'},
+        {'contentFile': 'data.txt', 'content': 'x'},
+        {'contentFile': 'data.txt', 'interpolate': True}
+    ]
+
+    @pytest.mark.parametrize('resp', invalid_content_files)
+    def test_invalid_content_file(self, tmp_path, resp):
+        (tmp_path / 'data.txt').write_bytes(b'file content')
+        prg = PatternResponseGenerator()
+        with pytest.raises(MockSpecError):
+            prg.load_spec_json(
+                dumps({'rules': {'^/a$': {'GET': resp}}}), str(tmp_path))
+
+    invalid_streams = [
+        {'stream': {}},
+        {'stream': {'file': 'feed.jsonl', 'record': 'x'}},
+        {'stream': {'file': 'feed.jsonl', 'count': 1}},
+        {'stream': {'record': 'x'}, 'content': 'x'},
+        {'stream': {'record': 'x', 'count': -1}},
+        {'stream': {'record': {'a': 1}}},
+        {'stream': {'file': 'missing.jsonl'}}
+    ]
+
+    @pytest.mark.parametrize('resp', invalid_streams)
+    def test_invalid_stream(self, tmp_path, resp):
+        (tmp_path / 'feed.jsonl').write_bytes(b'{}\n')
+        prg = PatternResponseGenerator()
+        with pytest.raises(MockSpecError):
+            prg.load_spec_json(
+                dumps({'rules': {'^/a$': {'GET': resp}}}), str(tmp_path))
+
+    def test_delay(self):
+        prg = PatternResponseGenerator()
+        prg.load_spec_dict({'rules': {
+            '^/a$': {'GET': {'content': 'a', 'delay': {'min': 10, 'max': 20}}},
+            '^/b/(\\w+)$': {'GET': {'content': '$p_0', 'interpolate': True,
+                                     'delay': 5}},
+            '^/c$': {'GET': {'content': 'c'}}
+        }})
+        assert prg.delayed
+
+        def respond(path):
+            return prg.respond(Request(path, Method.GET, {}, BytesIO(b'')))
+
+        assert 0.01 <= respond('/a').delay.sample() <= 0.02
+        assert respond('/b/x').delay.sample() == 0.005
+        assert respond('/c').delay is None
+
+    @pytest.mark.parametrize('delay', [-1, {'min': 1}, {'p50': 0, 'p99': 1}, 'x'])
+    def test_invalid_delay(self, delay):
+        prg = PatternResponseGenerator()
+        with pytest.raises(MockSpecError):
+            prg.load_spec_json(
+                dumps({'rules': {'^/a$': {'GET': {'delay': delay}}}}))
+
+    def test_reload(self):
+        prg = PatternResponseGenerator()
+        prg.load_spec_dict({'rules': {
+            '^/a$': {'GET': {'content': 'a'}, 'POST': {'content': 'p'}},
+            '/b/{x}': {'GET': {'content': 'b'}},
+            '^/c$': {'GET': {'content': 'c'}}
+        }})
+
+        def respond(path, method=Method.GET):
+            return prg.respond(Request(path, method, {}, BytesIO(b'')))
+
+        assert respond('/c').content_bytes == b'c'
+        old_a = prg.rules[re.compile('^/a$')]
+        old_pattern = prg.patterns['/b/{x}']
+        old_table = prg.table
+        prg.reload_spec_dict({'rules': {
+            '/b/{x}': {'GET': {'content': 'b'}},
+            '^/a$': {'GET': {'content': 'a'}, 'POST': {'content': 'q'}},
+            '^/d$': {'GET': {'content': 'd'}}
+        }})
+        assert prg.table is not old_table
+        assert prg.patterns['/b/{x}'] is old_pattern
+        new_a = prg.rules[re.compile('^/a$')]
+        assert new_a[Method.GET] is old_a[Method.GET]
+        assert new_a[Method.POST] is not old_a[Method.POST]
+        assert respond('/a', Method.POST).content_bytes == b'q'
+        assert respond('/b/1').content_bytes == b'b'
+        assert respond('/c').status == HTTPStatus.NOT_FOUND
+        assert respond('/d').content_bytes == b'd'
+        assert prg.router.match('/b/1') == (0, ('1',))
+
+    def test_reload_global(self):
+        prg = PatternResponseGenerator()
+        spec = {'global': {'headers': {'X-A': '1'}},
+                'rules': {'^/a$': {'GET': {'content': 'a'}}}}
+        prg.load_spec_dict(spec)
+        old = prg.rules[re.compile('^/a$')][Method.GET]
+        prg.reload_spec_dict(spec)
+        assert prg.rules[re.compile('^/a$')][Method.GET] is old
+        prg.reload_spec_dict(dict(spec, **{'global': {'headers': {'X-A': '2'}}}))
+        assert prg.rules[re.compile('^/a$')][Method.GET] is not old
+        response = prg.respond(Request('/a', Method.GET, {}, BytesIO(b'')))
+        assert response.headers['X-A'] == '2'
+
+    def test_invalid_reload(self):
+        prg = PatternResponseGenerator()
+        prg.load_spec_dict({'rules': {'^/a$': {'GET': {'content': 'a'}}}})
+        table = prg.table
+        with pytest.raises(MockSpecError):
+            prg.reload_spec_json(dumps({'rules': {
+                '^/b$': {'GET': {'content': 'b'}},
+                '^/c$': {'GET': {'status': 999}}
+            }}))
+        assert prg.table is table
+        assert prg.respond(Request('/a', Method.GET, {}, BytesIO(b''))) \
+            .content_bytes == b'a'
+
+    def test_reload_content_file(self, tmp_path):
+        (tmp_path / 'a.txt').write_bytes(b'one')
+        spec = dumps({'rules': {'^/a$': {'GET': {'contentFile': 'a.txt'}}}})
+        prg = PatternResponseGenerator()
+        prg.load_spec_json(spec, str(tmp_path))
+        (tmp_path / 'a.txt').write_bytes(b'three')
+        prg.reload_spec_json(spec, str(tmp_path))
+        response = prg.respond(Request('/a', Method.GET, {}, BytesIO(b'')))
+        assert response.content_length == 5
@@ -15,6 +15,8 @@
 
 from typing import List, Tuple
 from http import HTTPStatus
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 from yamas.respgen import ResponseMaker, ResponseSelector
 from yamas.reqresp import ContentType
 import pytest
@@ -43,3 +45,19 @@ class TestResponseSelector:
             else:
                 assert respsel.make_response(tuple()).content_bytes.decode(
                     'utf-8') == str(min(i, 2))
+
+    @pytest.mark.parametrize('loop', [True, False])
+    def test_concurrent_selection(self, loop):
+        respsel = ResponseSelector(loop)
+        for rm in self.respmakers:
+            respsel.add_response_maker(rm)
+
+        def select(_):
+            return respsel.make_response(tuple()).content_bytes
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            counts = Counter(executor.map(select, range(300)))
+        if loop:
+            assert counts == {b'0': 100, b'1': 100, b'2': 100}
+        else:
+            assert counts == {b'0': 1, b'1': 1, b'2': 298}
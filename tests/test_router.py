@@ -0,0 +1,303 @@
+# coding=utf-8
+# Copyright 2019 YAM AI Machinery Limited
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import re
+import pytest
+from yamas.router import Router, RegexRouter, RegexChunk, SingleRegex, \
+    PrefixTrie, SegmentTree, PathTemplate, literal_prefix, is_path_template
+from yamas.ex import MockSpecError
+
+
+def scan(patterns, path):
+    for idx, cpat in enumerate(patterns):
+        match = cpat.fullmatch(path)
+        if match:
+            return idx, match.groups()
+    return None
+
+
+def template_regex(pat):
+    parts = []
+    for segment in pat[1:].split('/'):
+        if segment == '{id:int}':
+            parts.append('([0-9]+)')
+        elif segment.startswith('{'):
+            parts.append('([^/]+)')
+        else:
+            parts.append(re.escape(segment))
+    return re.compile('/' + '/'.join(parts))
+
+
+PATTERNS = [re.compile(p) for p in [
+    '^/users/(\\w+)/todo/(\\d+)$',
+    '^/users/\\w+/todo/?$',
+    '^/users/(\\w+)/profile.xml$',
+    '(?i)^/CASE/(\\w+)$',
+    '^/users/(\\w+)/profile$',
+    '^/echo/(\\w+)/\\1$',
+    '^/named/(?P<name>\\w+)$',
+    '^/users/(\\w+)(/(\\w+))?$',
+    '/a|/b',
+    '^/users/me$',
+    '.*'
+]]
+
+PATHS = [
+    '/users/tomlee/todo/123',
+    '/users/tomlee/todo/',
+    '/users/tomlee/todo/abc',
+    '/users/tomlee/profile.xml',
+    '/users/tomlee/profile',
+    '/users/me',
+    '/case/x',
+    '/echo/x/x',
+    '/echo/x/y',
+    '/named/x',
+    '/users/tomlee',
+    '/users/tomlee/settings',
+    '/a',
+    '/b',
+    '/nowhere'
+]
+
+
+class TestRegexRouter:
+
+    @pytest.mark.parametrize('chunk_size', [1, 2, 3, 500])
+    @pytest.mark.parametrize('path', PATHS)
+    def test_same_as_sequential_scan(self, chunk_size, path):
+        router = RegexRouter(list(enumerate(PATTERNS)), chunk_size)
+        assert router.match(path) == scan(PATTERNS, path)
+
+    def test_no_match(self):
+        router = RegexRouter(list(enumerate(PATTERNS[:3])))
+        assert router.match('/nowhere') is None
+
+    def test_chunks(self):
+        router = RegexRouter(list(enumerate(PATTERNS)), 2)
+        kinds = [type(chunk) for chunk in router.chunks]
+        assert kinds == [
+            RegexChunk, SingleRegex, SingleRegex, SingleRegex, SingleRegex,
+            SingleRegex, RegexChunk, RegexChunk
+        ]
+        assert router.chunks[1].cpat is PATTERNS[2]
+
+    def test_many_rules(self):
+        patterns = [re.compile(f'^/r{i}/(\\w+)/(\\d+)$') for i in range(2000)]
+        router = RegexRouter(list(enumerate(patterns)))
+        assert router.match('/r1999/x/1') == (1999, ('x', '1'))
+        assert router.match('/r0/x/1') == (0, ('x', '1'))
+        assert router.match('/r2000/x/1') is None
+
+
+class TestPrefixTrie:
+
+    prefixes = [
+        ('^/users/(\\w+)/todo/(\\d+)$', '/users/'),
+        ('/users/me$', '/users/me'),
+        ('^/users/(\\w+)/profile.xml$', '/users/'),
+        ('^/files\\.d/x?$', '/files.d/'),
+        ('^/ab+c$', '/ab'),
+        ('^/ab*c$', '/a'),
+        ('^/ab{2}c$', '/a'),
+        ('\\A/static\\-assets/\\d+', '/static-assets/'),
+        ('^/a/b|/c$', ''),
+        ('(?i)^/users$', ''),
+        ('^(/users)$', ''),
+        ('.*', ''),
+        ('^/[|]/x$', '/')
+    ]
+
+    @pytest.mark.parametrize('pat, prefix', prefixes)
+    def test_literal_prefix(self, pat, prefix):
+        assert literal_prefix(re.compile(pat)) == prefix
+
+    def test_candidates(self):
+        trie = PrefixTrie()
+        trie.insert('/users/', 3)
+        trie.insert('/users/me', 1)
+        trie.insert('/us', 0)
+        trie.insert('/users/x/todo', 2)
+        trie.insert('/teams/', 4)
+        assert trie.candidates('/users/me') == [0, 1, 3]
+        assert trie.candidates('/users/x/todos') == [0, 2, 3]
+        assert trie.candidates('/users') == [0]
+        assert trie.candidates('/teams') == []
+        assert trie.candidates('') == []
+
+
+class TestRouter:
+
+    @pytest.mark.parametrize('chunk_size', [1, 500])
+    @pytest.mark.parametrize('path', PATHS)
+    def test_same_as_sequential_scan(self, chunk_size, path):
+        router = Router(PATTERNS, chunk_size)
+        assert router.match(path) == scan(PATTERNS, path)
+
+    def test_fallback(self):
+        router = Router(PATTERNS)
+        kinds = [type(chunk) for chunk in router.fallback.chunks]
+        assert kinds == [SingleRegex, RegexChunk]
+
+    def test_many_rules(self):
+        patterns = [re.compile(f'^/r{i}/(\\w+)/(\\d+)$') for i in range(5000)]
+        patterns.append(re.compile('^.*/(\\w+)$'))
+        router = Router(patterns)
+        assert router.trie.candidates('/r4999/x/1') == [4999]
+        assert router.match('/r4999/x/1') == (4999, ('x', '1'))
+        assert router.match('/r5000/x/1') == (5000, ('1',))
+        assert router.match('/r5000/x/1/') is None
+
+
+class TestSharedPrefix:
+
+    patterns = [re.compile(p) for p in
+                [f'^/users/(\\w+)/thing{i}$' for i in range(50)] +
+                ['^/users/me/thing7$', '^/users/(me)/thing\\d+$',
+                 '^/files/report1\\.csv$', '^/files/report(\\d+)\\.csv$',
+                 '^/users/(?P<user>\\w+)/thing60$', '.*/thing(6\\d)$'] +
+                [f'^/users/(\\w+)/thing{i}$' for i in range(50, 70)]]
+
+    paths = ['/users/x/thing0', '/users/x/thing49', '/users/me/thing7',
+             '/users/me/thing55', '/users/x/thing60', '/users/x/thing61',
+             '/users/x/thing69', '/users/x/thing70', '/files/report1.csv',
+             '/files/report12.csv', '/files/report.csv', '/users']
+
+    @pytest.mark.parametrize('chunk_size', [1, 7, 20])
+    @pytest.mark.parametrize('path', paths)
+    def test_same_as_sequential_scan(self, chunk_size, path):
+        router = Router(list(self.patterns), chunk_size)
+        assert router.match(path) == scan(self.patterns, path)
+
+    @pytest.mark.parametrize('path', paths)
+    def test_incremental(self, path):
+        router = Router(self.patterns[:30], 7)
+        for cpat in self.patterns[30:]:
+            router.add(cpat)
+        removed = [0, 10, 50, 51, 60]
+        for idx in removed:
+            router.remove(idx)
+        never = re.compile('(?!)')
+        patterns = [never if idx in removed else cpat
+                    for idx, cpat in enumerate(self.patterns)]
+        assert router.match(path) == scan(patterns, path)
+
+
+class TestSegmentTree:
+
+    templates = [
+        '/users/{user}/todo/{id:int}',
+        '/users/me/todo/{id:int}',
+        '/users/{user}/todo/{task}',
+        '/users/{user}',
+        '/users/me',
+        '/files/{name}/',
+        '/v1.0/{x}'
+    ]
+
+    paths = [
+        '/users/tomlee/todo/123',
+        '/users/me/todo/123',
+        '/users/me/todo/abc',
+        '/users/tomlee/todo/',
+        '/users/me',
+        '/users/',
+        '/files/a/',
+        '/files/a',
+        '/v1.0/x',
+        '/v1x0/x',
+        'users/me'
+    ]
+
+    @pytest.mark.parametrize('path', paths)
+    def test_same_as_regex(self, path):
+        tree = SegmentTree()
+        for idx, pat in enumerate(self.templates):
+            tree.insert(PathTemplate(pat), idx)
+        patterns = [template_regex(pat) for pat in self.templates]
+        assert tree.match(path) == scan(patterns, path)
+
+    def test_path_template(self):
+        template = PathTemplate('/users/{user}/todo/{id:int}')
+        assert template.names == ['user', 'id']
+        assert template.groups == 2
+        assert template.groupindex == {'user': 1, 'id': 2}
+        assert template == PathTemplate('/users/{user}/todo/{id:int}')
+
+    keys = [
+        ('/users/{user}/todo/{id:int}', True),
+        ('/users/{user}', True),
+        ('/v1.0/{x}/', True),
+        ('/users/me', False),
+        ('^/users/(\\w+)$', False),
+        ('/users/(\\w+)/{x}', False),
+        ('/files/{name}.json', False),
+        ('/a{2}/{x}', False),
+        ('users/{user}', False)
+    ]
+
+    @pytest.mark.parametrize('key, expected', keys)
+    def test_is_path_template(self, key, expected):
+        assert is_path_template(key) == expected
+
+    @pytest.mark.parametrize('key', ['/a/{x:uuid}', '/a/{x}/{x}'])
+    def test_invalid_template(self, key):
+        with pytest.raises(MockSpecError):
+            PathTemplate(key)
+
+    def test_mixed_with_regex(self):
+        patterns = [
+            re.compile('^/users/me/todo/(\\d+)$'),
+            PathTemplate('/users/{user}/todo/{id:int}'),
+            re.compile('.*/(abc)$'),
+            PathTemplate('/users/{user}/todo/{task}')
+        ]
+        router = Router(patterns)
+        assert router.match('/users/me/todo/1') == (0, ('1',))
+        assert router.match('/users/x/todo/1') == (1, ('x', '1'))
+        assert router.match('/users/x/todo/abc') == (2, ('abc',))
+        assert router.match('/users/x/todo/xyz') == (3, ('x', 'xyz'))
+
+
+class TestIncrementalRouter:
+
+    @pytest.mark.parametrize('chunk_size', [1, 2, 500])
+    @pytest.mark.parametrize('path', PATHS)
+    def test_add(self, chunk_size, path):
+        router = Router(PATTERNS[:3], chunk_size)
+        for cpat in PATTERNS[3:]:
+            router.add(cpat)
+        assert router.match(path) == scan(PATTERNS, path)
+
+    @pytest.mark.parametrize('removed', [[0], [3, 4], [8, 10], [1, 2, 7]])
+    @pytest.mark.parametrize('path', PATHS)
+    def test_remove(self, removed, path):
+        router = Router(list(PATTERNS), 2)
+        for idx in removed:
+            router.remove(idx)
+        never = re.compile('(?!)')
+        patterns = [never if idx in removed else cpat
+                    for idx, cpat in enumerate(PATTERNS)]
+        assert router.match(path) == scan(patterns, path)
+
+    def test_templates(self):
+        router = Router([PathTemplate('/users/{user}'),
+                         PathTemplate('/users/me')])
+        assert router.match('/users/me') == (0, ('me',))
+        router.remove(0)
+        assert router.match('/users/me') == (1, ())
+        assert router.match('/users/x') is None
+        assert router.add(PathTemplate('/users/{user}')) == 2
+        assert router.match('/users/x') == (2, ('x',))
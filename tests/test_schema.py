@@ -0,0 +1,104 @@
+# coding=utf-8
+# Copyright 2019 YAM AI Machinery Limited
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import pytest
+from unittest.mock import patch
+from yamas.schema import validate_spec, validation_processes, rule_error, \
+    document_error
+from yamas.respgen import PatternResponseGenerator
+from yamas.ex import MockSpecError
+
+
+def make_spec(rules: int, bad: int = None) -> dict:
+    spec = {'rules': {}}
+    for i in range(rules):
+        status = 999 if i == bad else 200
+        spec['rules'][f'^/r{i}$'] = {'GET': {'status': status}}
+    return spec
+
+
+class TestSchema:
+
+    def test_valid(self):
+        validate_spec(make_spec(10))
+        validate_spec({})
+
+    @pytest.mark.parametrize('spec, message', [
+        ({'rules': {'^/a$': {'FETCH': {}}}}, "Invalid rule ^/a$: 'FETCH'"),
+        ({'rules': {'^/a$': {'GET': {'status': 'x'}}}},
+         "Invalid rule ^/a$['GET']['status']: 'x'"),
+        ({'rules': {'^/a$': []}}, "Invalid spec at ['rules']['^/a$']"),
+        ({'global': {'headers': {'a': 1}}},
+         "Invalid spec at ['global']['headers']['a']"),
+        ({'other': {}}, 'Invalid spec at top level')
+    ])
+    def test_error_location(self, spec, message):
+        with pytest.raises(MockSpecError) as e:
+            validate_spec(spec)
+        assert str(e.value).startswith(message)
+
+    @pytest.mark.parametrize('processes', [1, 2, 3])
+    def test_parallel(self, processes):
+        validate_spec(make_spec(50), processes)
+        with pytest.raises(MockSpecError, match='Invalid rule \\^/r37\\$'):
+            validate_spec(make_spec(50, 37), processes)
+
+    def test_first_error(self):
+        spec = make_spec(50, 12)
+        spec['rules']['^/r40$']['GET']['status'] = 0
+        with pytest.raises(MockSpecError, match='Invalid rule \\^/r12\\$'):
+            validate_spec(spec, 4)
+
+    @pytest.mark.parametrize('rules, processes, expected', [
+        (10, None, 1),
+        (100000, None, 1),
+        (10, 4, 4),
+        (3, 4, 3),
+        (0, 4, 1)
+    ])
+    def test_validation_processes(self, rules, processes, expected):
+        assert validation_processes(rules, processes) == expected
+
+    def test_validated(self):
+        spec = make_spec(5, 3)
+        validate_spec(spec, validated={'^/r3$': {'GET': {'status': 999}}})
+        with pytest.raises(MockSpecError):
+            validate_spec(spec, validated={'^/r3$': {'GET': {'status': 200}}})
+
+    def test_helpers(self):
+        assert rule_error(('^/a$', {'GET': {}})) is None
+        assert document_error({'rules': {}}) is None
+
+    def test_reload_in_process(self):
+        prg = PatternResponseGenerator()
+        prg.validation_processes = 4
+        prg.load_spec_dict(make_spec(10))
+        with patch('concurrent.futures.ProcessPoolExecutor',
+                   side_effect=AssertionError):
+            prg.reload_spec_dict(make_spec(20))
+            with pytest.raises(MockSpecError):
+                prg.reload_spec_dict(make_spec(20, 15))
+        assert len(prg.list_rules()) == 20
+
+    def test_trust_spec(self):
+        respgen = PatternResponseGenerator()
+        respgen.trust_spec = True
+        respgen.load_spec_dict({'rules': {'^/a$': {'GET': {'status': 201}}},
+                                'x-comment': 'checked in CI'})
+        with pytest.raises(MockSpecError):
+            PatternResponseGenerator().load_spec_dict(
+                {'rules': {'^/a$': {'GET': {'status': 201}}},
+                 'x-comment': 'checked in CI'})
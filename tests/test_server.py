@@ -16,9 +16,13 @@
 import pytest
 from unittest.mock import patch, mock_open
 from yamas.server import Yamas
-from yamas.ex import MockSpecError
+from yamas.ex import MockSpecError, ServerError
 from threading import Thread
-from json import loads
+from json import loads, dumps
+from concurrent.futures import ThreadPoolExecutor
+from http.client import HTTPConnection
+import socket
+import time
 import requests
 from yamas.config import SERVER_NAME, VERSION
 import logging
@@ -133,15 +137,44 @@ HELLO_JSON = '''
 HOST = 'localhost'
 PORT = 7777
 PORT2 = 6666
+PORT3 = 7778
+PORT4 = 7779
+PORT5 = 7780
+PORT6 = 7781
+PORT7 = 7782
+PORT8 = 7783
+PORT9 = 7784
+PORT10 = 7785
+PORT11 = 7786
+PORT12 = 7787
+PORT13 = 7788
+PORT14 = 7789
+PORT15 = 7791
+PORT16 = 7792
+PORT17 = 7793
+PORT18 = 7794
+
+
+def start_server(server: Yamas, port: int, **kwargs):
+    thread = Thread(target=server.run, args=(HOST, port), kwargs=kwargs)
+    thread.daemon = True
+    thread.start()
+    for _ in range(100):
+        try:
+            socket.create_connection((HOST, port)).close()
+            return
+        except OSError:
+            time.sleep(0.05)
 
 
 @pytest.fixture(scope='session', autouse=True)
 def yamas():
     server = Yamas()
     server.load_json(VALID_JSON)
-    thread = Thread(target=server.run, args=(HOST, PORT))
-    thread.daemon = True
-    thread.start()
+    start_server(server, PORT)
+    aio_server = Yamas()
+    aio_server.load_json(VALID_JSON)
+    start_server(aio_server, PORT4, engine='asyncio')
     return server
 
 
@@ -153,9 +186,7 @@ class TestYamas:
         server = Yamas()
         server.load_file(mock_spec)
         mock_file.assert_called_with(mock_spec, 'r')
-        thread = Thread(target=server.run, args=(HOST, PORT2))
-        thread.daemon = True
-        thread.start()
+        start_server(server, PORT2)
         response = requests.get(
             f'http://{HOST}:{PORT2}/hello/world', headers={}, data={})
         del response.headers['Date']
@@ -163,7 +194,9 @@ class TestYamas:
             'Server': f'{SERVER_NAME} {VERSION}',
             'X-Hello': 'World',
             'Access-Control-Allow-Origin': '*',
-            'Content-Type': 'text/plain'
+            'Content-Type': 'text/plain',
+            'Content-Length': '12',
+            'Connection': 'close'
         }
         assert response.status_code == 201
         assert response.content == b'Hello, world'
@@ -348,17 +381,246 @@ class TestYamas:
         )
     ]
 
+    @pytest.mark.parametrize('port', [PORT, PORT4])
     @pytest.mark.parametrize('req, resp', reqresps)
-    def test_responses(self, req, resp):
+    def test_responses(self, req, resp, port):
         response = req['request'](
-            f'http://{HOST}:{PORT}{req["path"]}', headers=req['headers'], data=req['data'])
+            f'http://{HOST}:{port}{req["path"]}', headers=req['headers'], data=req['data'])
         assert response.status_code == resp['status']
         assert response.headers['Server'] == "YetAnotherMockAPIServer 0.0.1"
         del response.headers['Server']
         del response.headers['Date']
+        assert response.headers['Content-Length'] == \
+            str(len(response.content))
+        del response.headers['Content-Length']
+        response.headers.pop('Connection', None)
         assert response.headers == resp['headers']
         respdata = resp['data']
         if isinstance(respdata, str):
             assert response.text == respdata
         else:
             assert loads(response.text) == respdata
+
+    def test_threads(self):
+        server = Yamas()
+        server.load_json(HELLO_JSON)
+        start_server(server, PORT3, threads=8)
+
+        def get(i):
+            return requests.get(f'http://{HOST}:{PORT3}/hello/{i}')
+
+        with ThreadPoolExecutor(max_workers=50) as executor:
+            responses = list(executor.map(get, range(200)))
+        for i, response in enumerate(responses):
+            assert response.status_code == 201
+            assert response.content == f'Hello, {i}'.encode('utf-8')
+
+    def test_keep_alive(self):
+        server = Yamas()
+        server.load_json(VALID_JSON)
+        start_server(server, PORT5, threads=2)
+        conn = HTTPConnection(HOST, PORT5)
+        conn.request('GET', '/users/tomlee/profile')
+        response = conn.getresponse()
+        assert response.read() == b'Hello tomlee'
+        sock = conn.sock
+        conn.request('PUT', '/users/tomlee/profile.xml', body=b'x' * 100000)
+        response = conn.getresponse()
+        assert response.status == 409
+        assert response.read() == b'object already updated'
+        conn.request('POST', '/users/tomlee/todo/',
+                     body=b'{"a": 1}', headers={'Transfer-Encoding': 'chunked'},
+                     encode_chunked=True)
+        response = conn.getresponse()
+        assert loads(response.read()) == {'taskid': '123'}
+        conn.request('DELETE', '/users/tomlee/todo/123')
+        response = conn.getresponse()
+        assert response.status == 410
+        assert response.getheader('Content-Length') == '0'
+        assert response.read() == b''
+        conn.request('GET', '/users/tomlee/todo/123')
+        response = conn.getresponse()
+        assert loads(response.read())['user'] == 'tomlee'
+        assert conn.sock is sock
+        conn.close()
+
+    @pytest.mark.parametrize('port, engine', [(PORT6, 'http'), (PORT7, 'asyncio')])
+    def test_content_file(self, tmp_path, port, engine):
+        data = bytes(range(256)) * 4096
+        (tmp_path / 'blob.bin').write_bytes(data)
+        (tmp_path / 'empty.json').write_bytes(b'')
+        spec_file = tmp_path / 'spec.json'
+        spec_file.write_text(dumps({'rules': {
+            '^/blob$': {'GET': {'contentFile': 'blob.bin'},
+                        'HEAD': {'contentFile': 'blob.bin'}},
+            '^/empty$': {'GET': {'contentFile': 'empty.json'}}
+        }}))
+        server = Yamas()
+        server.load_file(str(spec_file))
+        start_server(server, port, threads=2, engine=engine)
+        conn = HTTPConnection(HOST, port)
+        conn.request('GET', '/blob')
+        response = conn.getresponse()
+        assert response.getheader('Content-Length') == str(len(data))
+        assert response.getheader('Content-Type') == 'application/octet-stream'
+        assert response.read() == data
+        conn.request('HEAD', '/blob')
+        response = conn.getresponse()
+        assert response.getheader('Content-Length') == str(len(data))
+        assert response.read() == b''
+        conn.request('GET', '/empty')
+        response = conn.getresponse()
+        assert response.getheader('Content-Type') == 'application/json'
+        assert response.read() == b''
+        conn.close()
+
+    def test_stream(self, tmp_path):
+        (tmp_path / 'feed.jsonl').write_bytes(b'{"a": 1}\n{"a": 2}\n')
+        server = Yamas()
+        server.load_dict({'rules': {
+            '^/file$': {'GET': {'stream': {'file': str(tmp_path / 'feed.jsonl')}}},
+            '^/records/(\\w+)$': {'GET': {
+                'stream': {'record': {'id': '$p_0', 'n': '$n'}, 'count': 1000},
+                'contentType': 'json', 'interpolate': True}}
+        }})
+        start_server(server, PORT8, threads=2)
+        conn = HTTPConnection(HOST, PORT8)
+        conn.request('GET', '/file')
+        response = conn.getresponse()
+        assert response.getheader('Transfer-Encoding') == 'chunked'
+        assert response.read() == b'{"a": 1}\n{"a": 2}\n'
+        conn.request('GET', '/records/x')
+        response = conn.getresponse()
+        assert response.getheader('Content-Type') == 'application/x-ndjson'
+        lines = response.read().splitlines()
+        assert len(lines) == 1000
+        assert loads(lines[999]) == {'id': 'x', 'n': '999'}
+        conn.close()
+
+    @pytest.mark.parametrize('port, engine', [(PORT9, 'http'), (PORT10, 'asyncio')])
+    def test_delay(self, port, engine):
+        server = Yamas()
+        server.load_dict({'rules': {
+            '^/slow$': {'GET': {'content': 'slow', 'delay': 300}},
+            '^/fast$': {'GET': {'content': 'fast'}}
+        }})
+        start_server(server, port, engine=engine)
+
+        def get(path):
+            return requests.get(f'http://{HOST}:{port}{path}')
+
+        start = time.monotonic()
+        with ThreadPoolExecutor(max_workers=10) as executor:
+            slow = [executor.submit(get, '/slow') for _ in range(10)]
+            assert get('/fast').content == b'fast'
+            assert time.monotonic() - start < 0.3
+            assert all(f.result().content == b'slow' for f in slow)
+        elapsed = time.monotonic() - start
+        assert 0.3 <= elapsed < 1.5
+
+    @pytest.mark.parametrize('port, engine', [(PORT11, 'http'), (PORT12, 'asyncio')])
+    def test_throttle(self, port, engine):
+        server = Yamas()
+        server.load_dict({
+            'global': {'throttle': {'bytesPerSecond': 20000}},
+            'rules': {
+                '^/slow$': {'GET': {'content': 'x' * 10000}},
+                '^/late$': {'GET': {'content': 'late', 'throttle': {'ttfb': 200}}},
+                '^/fast$': {'GET': {'content': 'fast', 'throttle': {}}}
+            }
+        })
+        start_server(server, port, engine=engine)
+
+        def get(path):
+            return requests.get(f'http://{HOST}:{port}{path}')
+
+        start = time.monotonic()
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            slow = [executor.submit(get, '/slow') for _ in range(3)]
+            time.sleep(0.05)
+            assert get('/fast').content == b'fast'
+            assert time.monotonic() - start < 0.3
+            assert all(f.result().content == b'x' * 10000 for f in slow)
+        assert 0.4 <= time.monotonic() - start < 1.5
+        start = time.monotonic()
+        assert get('/late').content == b'late'
+        assert time.monotonic() - start >= 0.2
+
+    @pytest.mark.parametrize('port, engine', [(PORT13, 'http'), (PORT14, 'asyncio')])
+    def test_metrics(self, port, engine):
+        server = Yamas(metrics=True)
+        server.load_dict({'rules': {
+            '^/hello$': {'GET': {'content': 'hello'}}
+        }})
+        start_server(server, port, engine=engine)
+        for _ in range(3):
+            assert requests.get(f'http://{HOST}:{port}/hello').content == b'hello'
+        assert requests.get(f'http://{HOST}:{port}/nowhere').status_code == 404
+        response = requests.get(f'http://{HOST}:{port}/__yamas/metrics')
+        assert response.status_code == 200
+        text = response.text
+        assert 'yamas_requests_total{rule="0",pattern="^/hello$",method="GET"} 3' in text
+        assert 'yamas_not_found_total{method="GET"} 1' in text
+        assert 'yamas_request_duration_seconds_count{method="GET"} 4' in text
+        sizes = [int(line.split()[-1]) for line in text.splitlines()
+                 if line.startswith('yamas_response_bytes_total')]
+        assert sizes and sizes[0] > 3 * len('hello')
+
+    def test_watch(self, tmp_path):
+        spec_file = tmp_path / 'spec.json'
+        spec_file.write_text(dumps({'rules': {'^/a$': {'GET': {'content': 'one'}}}}))
+        server = Yamas()
+        server.load_file(str(spec_file))
+        with patch('yamas.watcher.WATCH_INTERVAL', 0.05):
+            start_server(server, PORT15, threads=2, watch=True)
+        assert requests.get(f'http://{HOST}:{PORT15}/a').content == b'one'
+        spec_file.write_text(dumps({'rules': {'^/a$': {'GET': {'content': 'two!'}}}}))
+        deadline = time.monotonic() + 5
+        while time.monotonic() < deadline:
+            if requests.get(f'http://{HOST}:{PORT15}/a').content == b'two!':
+                break
+            time.sleep(0.05)
+        assert requests.get(f'http://{HOST}:{PORT15}/a').content == b'two!'
+
+    def test_admin_delay(self):
+        server = Yamas(admin=True)
+        server.load_dict({'rules': {'^/fast$': {'GET': {'content': 'fast'}}}})
+        start_server(server, PORT18)
+        admin = f'http://{HOST}:{PORT18}/__yamas/admin/rules'
+        response = requests.put(admin, json={'rules': {
+            '^/d$': {'GET': {'delay': 1000}}}})
+        assert response.status_code == 204
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            delayed = executor.submit(requests.get, f'http://{HOST}:{PORT18}/d')
+            time.sleep(0.1)
+            started = time.monotonic()
+            assert requests.get(f'http://{HOST}:{PORT18}/fast').content == b'fast'
+            assert time.monotonic() - started < 0.5
+            assert delayed.result().status_code == 200
+
+    @pytest.mark.parametrize('admin, watch', [(True, False), (False, True)])
+    def test_workers_unavailable(self, tmp_path, admin, watch):
+        spec_file = tmp_path / 'spec.json'
+        spec_file.write_text(dumps({'rules': {'^/a$': {'GET': {'content': 'a'}}}}))
+        server = Yamas(admin=admin)
+        server.load_file(str(spec_file))
+        with pytest.raises(ServerError):
+            server.run(HOST, PORT15, workers=2, watch=watch)
+        assert server.watcher is None
+
+    @pytest.mark.parametrize('port, engine', [(PORT16, 'http'), (PORT17, 'asyncio')])
+    def test_admin(self, port, engine):
+        server = Yamas(admin=True)
+        server.load_dict({'rules': {'^/a$': {'GET': {'content': 'a'}}}})
+        start_server(server, port, engine=engine)
+        admin = f'http://{HOST}:{port}/__yamas/admin/rules'
+        response = requests.put(admin, json={'rules': {
+            '^/b$': {'GET': {'content': 'b'}}}})
+        assert response.status_code == 204
+        assert requests.get(f'http://{HOST}:{port}/b').content == b'b'
+        assert requests.delete(admin, json={'rules': ['^/a$']}).status_code == 204
+        assert requests.get(f'http://{HOST}:{port}/a').status_code == 404
+        assert list(requests.get(admin).json()['rules']) == ['^/b$']
+        server.put_rules({'^/c$': {'GET': {'content': 'c'}}})
+        assert requests.get(f'http://{HOST}:{port}/c').content == b'c'
+        assert list(server.list_rules()) == ['^/b$', '^/c$']
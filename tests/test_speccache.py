@@ -0,0 +1,158 @@
+# coding=utf-8
+# Copyright 2019 YAM AI Machinery Limited
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import pickle
+import re
+import pytest
+from io import BytesIO
+from json import dumps
+from unittest.mock import patch
+from yamas.speccache import SpecCache, LazyPattern, reduce_pattern
+from yamas.respgen import PatternResponseGenerator
+from yamas.reqresp import Request, Method
+from yamas.server import Yamas
+
+SPEC = {
+    'global': {'headers': {'X-Mock': 'yes'}},
+    'rules': {
+        '^/users/(\\w+)$': {'GET': {'content': 'user $p_0',
+                                     'interpolate': True}},
+        '/teams/{team}': {'GET': {'content': {'team': '$team'},
+                                  'contentType': 'json',
+                                  'interpolate': True}},
+        '^/file$': {'GET': {'contentFile': 'body.txt'}},
+        '(?P<any>.*)/x$': {'POST': {'status': 201, 'content': 'x'}}
+    }
+}
+
+
+def respond(prg, path: str, method: Method = Method.GET):
+    return prg.respond(Request(path, method, {}, BytesIO(b'')))
+
+
+@pytest.fixture
+def spec_file(tmp_path):
+    (tmp_path / 'body.txt').write_bytes(b'file body')
+    spec_file = tmp_path / 'spec.json'
+    spec_file.write_text(dumps(SPEC))
+    return spec_file
+
+
+class TestLazyPattern:
+
+    def test_same_as_pattern(self):
+        cpat = re.compile('^/a/(?P<name>\\w+)/(\\d+)$')
+        lazy = LazyPattern(*reduce_pattern(cpat)[1])
+        assert lazy.compiled is None
+        assert (lazy.groups, lazy.groupindex) == (cpat.groups, cpat.groupindex)
+        assert lazy == LazyPattern(*reduce_pattern(cpat)[1])
+        assert hash(lazy) == hash(LazyPattern(*reduce_pattern(cpat)[1]))
+        assert lazy != cpat and len({lazy, cpat}) == 2
+        assert lazy.fullmatch('/a/x/1').groups() == ('x', '1')
+        assert lazy.fullmatch('/a/x/y') is None
+        assert lazy != LazyPattern('^/b$', cpat.flags, 0, {})
+        assert pickle.loads(pickle.dumps(lazy)) == lazy
+
+
+class TestSpecCache:
+
+    def test_key(self):
+        key = SpecCache.key('{}', '/a')
+        assert key == SpecCache.key('{}', '/a')
+        assert key != SpecCache.key('{ }', '/a')
+        assert key != SpecCache.key('{}', '/b')
+        with patch('yamas.speccache.VERSION', '0.0.0'):
+            assert key != SpecCache.key('{}', '/a')
+
+    def test_round_trip(self, tmp_path, spec_file):
+        prg = PatternResponseGenerator()
+        prg.load_spec_json(spec_file.read_text(), str(tmp_path))
+        spec_cache = SpecCache(str(tmp_path / 'cache'))
+        assert spec_cache.store('k', prg.compiled_state())
+        state = spec_cache.load('k')
+        cached = PatternResponseGenerator(route_cache_size=0)
+        cached.restore_state(state)
+        assert isinstance(cached.patterns['^/users/(\\w+)$'], LazyPattern)
+        assert cached.route_cache.maxsize == 0
+        for path, method in [('/users/tom', Method.GET),
+                             ('/teams/a', Method.GET),
+                             ('/file', Method.GET),
+                             ('/any/x', Method.POST),
+                             ('/any/x', Method.GET),
+                             ('/nowhere', Method.GET)]:
+            expected = respond(prg, path, method)
+            actual = respond(cached, path, method)
+            assert actual.status == expected.status
+            assert actual.content_length == expected.content_length
+            assert actual.encode_headers() == expected.encode_headers()
+            if expected.content_file is None:
+                assert actual.content_bytes == expected.content_bytes
+        assert respond(cached, '/users/tom').headers['X-Mock'] == 'yes'
+        cached.put_rules({'^/new$': {'GET': {'content': 'new'}}})
+        assert respond(cached, '/new').content_bytes == b'new'
+        cached.put_rules({'^/users/(\\w+)$': {'GET': {'content': 'put'}}})
+        assert respond(cached, '/users/tom').content_bytes == b'put'
+        cached.reload_spec_json(spec_file.read_text(), str(tmp_path))
+        assert respond(cached, '/users/tom').content_bytes == b'user tom'
+        assert len(cached.rules) == len(SPEC['rules'])
+
+    def test_stale_content_file(self, tmp_path, spec_file):
+        prg = PatternResponseGenerator()
+        prg.load_spec_json(spec_file.read_text(), str(tmp_path))
+        spec_cache = SpecCache(str(tmp_path / 'cache'))
+        spec_cache.store('k', prg.compiled_state())
+        (tmp_path / 'body.txt').write_bytes(b'a longer file body')
+        assert spec_cache.load('k') is None
+
+    def test_invalid_cache(self, tmp_path):
+        spec_cache = SpecCache(str(tmp_path))
+        assert spec_cache.load('missing') is None
+        (tmp_path / 'bad.pickle').write_bytes(b'not a pickle')
+        assert spec_cache.load('bad') is None
+
+    def test_untrusted_cache(self, tmp_path, spec_file):
+        prg = PatternResponseGenerator()
+        prg.load_spec_json(spec_file.read_text(), str(tmp_path))
+        spec_cache = SpecCache(str(tmp_path / 'cache'))
+        assert spec_cache.store('k', prg.compiled_state())
+        assert os.stat(spec_cache.cache_dir).st_mode & 0o777 == 0o700
+        assert os.stat(spec_cache.path('k')).st_mode & 0o777 == 0o600
+        assert spec_cache.load('k') is not None
+        with patch('os.getuid', return_value=os.getuid() + 1):
+            assert spec_cache.load('k') is None
+        os.chmod(spec_cache.path('k'), 0o666)
+        assert spec_cache.load('k') is None
+
+    def test_load_file(self, tmp_path, spec_file):
+        cache_dir = str(tmp_path / 'cache')
+        first = Yamas()
+        first.load_file(str(spec_file), cache_dir)
+        assert not isinstance(first.respgen.patterns['^/users/(\\w+)$'],
+                              LazyPattern)
+        with patch.object(PatternResponseGenerator, 'load_spec_json',
+                          side_effect=AssertionError):
+            second = Yamas(metrics=True)
+            second.load_file(str(spec_file), cache_dir)
+        assert isinstance(second.respgen.patterns['^/users/(\\w+)$'],
+                          LazyPattern)
+        assert respond(second.respgen, '/users/tom').content_bytes == \
+            b'user tom'
+        assert 'pattern="^/users/(\\\\w+)$",method="GET"} 1' in \
+            respond(second.respgen, '/__yamas/metrics').content_bytes.decode()
+        spec_file.write_text(dumps({'rules': {'^/b$': {'GET': {}}}}))
+        third = Yamas()
+        third.load_file(str(spec_file), cache_dir)
+        assert list(third.respgen.patterns) == ['^/b$']
@@ -0,0 +1,73 @@
+# coding=utf-8
+# Copyright 2019 YAM AI Machinery Limited
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import pytest
+from io import BytesIO
+from json import dumps
+from http import HTTPStatus
+from jsonschema import validate
+from yamas.specgen import generate_spec, sample_path, SHAPES
+from yamas.respgen import PatternResponseGenerator
+from yamas.schema import spec_schema
+from yamas.reqresp import Request, Method
+
+
+class TestSpecGen:
+
+    def test_deterministic(self):
+        assert dumps(generate_spec(50, seed=3)) == dumps(generate_spec(50, seed=3))
+        assert dumps(generate_spec(50, seed=3)) != dumps(generate_spec(50, seed=4))
+
+    @pytest.mark.parametrize('shape', SHAPES)
+    def test_sample_paths_match_rules(self, shape):
+        spec = generate_spec(100, shape, 128, 0.5, 7)
+        validate(instance=spec, schema=spec_schema)
+        prg = PatternResponseGenerator()
+        prg.load_spec_dict(spec)
+        for idx in range(100):
+            path = sample_path(idx, shape, 7)
+            assert prg.router.match(path)[0] == idx
+            resp = prg.respond(Request(path, Method.GET, {}, BytesIO(b'')))
+            assert resp.status == HTTPStatus.OK
+            assert b'$' not in resp.content_bytes
+
+    def test_router_shapes(self):
+        prg = PatternResponseGenerator()
+        prg.load_spec_dict(generate_spec(40, 'shared-prefix'))
+        assert prg.router.trie.candidates('/users/x') == list(range(40))
+        prg = PatternResponseGenerator()
+        prg.load_spec_dict(generate_spec(40, 'no-prefix'))
+        assert prg.router.trie.candidates(sample_path(0, 'no-prefix')) == []
+        assert sum(len(getattr(chunk, 'rules', [None]))
+                   for chunk in prg.router.fallback.chunks) == 40
+        assert prg.router.match('/v2' + sample_path(7, 'no-prefix'))[0] == 7
+
+    @pytest.mark.parametrize('body_size', [64, 1024, 8192])
+    def test_body_size(self, body_size):
+        spec = generate_spec(20, body_size=body_size, interpolation=0)
+        for resps in spec['rules'].values():
+            size = len(dumps(resps['GET']['content']))
+            assert body_size <= size < body_size * 2 + 512
+
+    @pytest.mark.parametrize('ratio', [0, 1])
+    def test_interpolation_ratio(self, ratio):
+        spec = generate_spec(20, interpolation=ratio)
+        assert all(resps['GET']['interpolate'] == bool(ratio)
+                   for resps in spec['rules'].values())
+
+    @pytest.mark.parametrize('kwargs', [{'shape': 'glob'}, {'interpolation': 2}])
+    def test_invalid(self, kwargs):
+        with pytest.raises(ValueError):
+            generate_spec(1, **kwargs)
@@ -0,0 +1,67 @@
+# coding=utf-8
+# Copyright 2019 YAM AI Machinery Limited
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import subprocess
+import sys
+import pytest
+from json import dumps
+from yamas.startup import StartupProfile, phase
+from yamas.server import Yamas
+
+
+class TestStartupProfile:
+
+    def test_phases(self, capsys):
+        profile = StartupProfile()
+        with profile.phase('parse'):
+            pass
+        with profile.phase('compile'):
+            pass
+        with profile.phase('parse'):
+            pass
+        with phase(None, 'bind'):
+            pass
+        with pytest.raises(ValueError):
+            with phase(None, 'bind'):
+                raise ValueError()
+        assert list(profile.phases) == ['parse', 'compile']
+        profile.report()
+        lines = capsys.readouterr().err.splitlines()
+        assert lines[0] == 'Startup profile:'
+        assert [line.split()[0] for line in lines[1:]] == \
+            ['parse', 'compile', 'total']
+
+    def test_load_file(self, tmp_path):
+        spec_file = tmp_path / 'spec.json'
+        spec_file.write_text(dumps({'rules': {'^/a$': {'GET': {}}}}))
+        profile = StartupProfile()
+        Yamas(profile=profile).load_file(str(spec_file))
+        assert list(profile.phases) == ['parse', 'validate', 'compile']
+        profile = StartupProfile()
+        Yamas(trust_spec=True, profile=profile).load_file(str(spec_file))
+        assert list(profile.phases) == ['parse', 'compile']
+        profile = StartupProfile()
+        Yamas(profile=profile).load_file(str(spec_file), str(tmp_path))
+        profile = StartupProfile()
+        Yamas(profile=profile).load_file(str(spec_file), str(tmp_path))
+        assert list(profile.phases) == ['cache', 'compile']
+
+    def test_lazy_imports(self):
+        code = 'import sys, yamas.server; print(sorted(sys.modules))'
+        modules = subprocess.check_output(
+            [sys.executable, '-c', code]).decode('utf-8')
+        for name in ('jsonschema', 'asyncio', 'concurrent'):
+            assert f"'{name}'" not in modules
@@ -0,0 +1,56 @@
+# coding=utf-8
+# Copyright 2019 YAM AI Machinery Limited
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import pytest
+from itertools import islice
+from yamas.stream import FileStream, RecordStream, encode_chunked, buffered
+from yamas.ex import MockSpecError
+
+
+class TestStream:
+
+    def test_file_stream(self, tmp_path):
+        (tmp_path / 'feed.jsonl').write_bytes(b'{"a": 1}\n{"a": 2}\nlast')
+        stream = FileStream(str(tmp_path / 'feed.jsonl'))
+        assert list(stream.chunks((), None)) == \
+            [b'{"a": 1}\n', b'{"a": 2}\n', b'last']
+
+    def test_missing_file(self, tmp_path):
+        with pytest.raises(MockSpecError):
+            FileStream(str(tmp_path / 'missing.jsonl'))
+
+    def test_json_records(self):
+        stream = RecordStream({'user': '$p_0', 'n': '$n'}, True, True, 2)
+        assert list(stream.chunks(('tom',), None)) == [
+            b'{"user": "tom", "n": "0"}\n', b'{"user": "tom", "n": "1"}\n']
+
+    def test_static_records(self):
+        stream = RecordStream({'a': '$x'}, True, False, 2)
+        assert list(stream.chunks((), None)) == [b'{"a": "$x"}\n'] * 2
+        stream = RecordStream('$$', False, True, 1)
+        assert list(stream.chunks((), None)) == [b'$\n']
+
+    def test_endless(self):
+        stream = RecordStream('x', False, False)
+        assert list(islice(stream.chunks((), None), 1000)) == [b'x\n'] * 1000
+
+    def test_encode_chunked(self):
+        assert list(encode_chunked(iter([b'ab', b'c']))) == \
+            [b'3\r\nabc\r\n', b'0\r\n\r\n']
+        assert list(encode_chunked(iter([]))) == [b'0\r\n\r\n']
+
+    def test_buffered(self):
+        chunks = list(buffered(iter([b'x' * 10] * 5), 25))
+        assert chunks == [b'x' * 30, b'x' * 20]
@@ -0,0 +1,82 @@
+# coding=utf-8
+# Copyright 2019 YAM AI Machinery Limited
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import pytest
+from collections import OrderedDict
+from json import dumps
+from string import Template
+from yamas.template import InterpolationPlan
+
+
+def substitute(item, groups, named):
+    if isinstance(item, str):
+        kv = dict(named)
+        for i, v in enumerate(groups):
+            kv[f'p_{i}'] = v
+        return Template(item).substitute(kv)
+    if isinstance(item, dict):
+        return OrderedDict(
+            (k, substitute(v, groups, named)) for k, v in item.items())
+    if isinstance(item, list):
+        return [substitute(v, groups, named) for v in item]
+    return item
+
+
+GROUPS = ('tom "lee"', '123', None)
+NAMED = {'user': 'tom "lee"', 'id': '123'}
+
+JSON_TEMPLATES = [
+    {'user': '$p_0', 'id': '${p_1}x', 'price': '$$5'},
+    {'nested': {'list': ['$user', 1, 2.5, True, None, {'id': '$id'}]}},
+    ['$p_0', '$p_2', []],
+    {'unicode': '中文 $user\n', 'empty': {}, 'k"ey': 'v'},
+    '$user/$id',
+    42
+]
+
+
+class TestInterpolationPlan:
+
+    @pytest.mark.parametrize('template', JSON_TEMPLATES)
+    def test_json_same_as_substitute(self, template):
+        plan = InterpolationPlan(template, True)
+        expected = dumps(substitute(template, GROUPS, NAMED)).encode('utf-8')
+        assert plan.render(GROUPS, NAMED) == expected
+
+    @pytest.mark.parametrize('template', [
+        'hello $p_0, ${id}!', '$$p_0 $user', 'no placeholders', '中文 $id'
+    ])
+    def test_text_same_as_substitute(self, template):
+        plan = InterpolationPlan(template, False)
+        expected = substitute(template, GROUPS, NAMED).encode('utf-8')
+        assert plan.render(GROUPS, NAMED) == expected
+
+    def test_static(self):
+        assert InterpolationPlan({'a': ['$$x', 1]}, True).static
+        assert not InterpolationPlan({'a': ['$x', 1]}, True).static
+
+    def test_missing_placeholder(self):
+        plan = InterpolationPlan({'a': '$p_3'}, True)
+        with pytest.raises(KeyError):
+            plan.render(GROUPS, NAMED)
+
+    @pytest.mark.parametrize('template', ['a\n$', 'x $1 y'])
+    def test_invalid_placeholder(self, template):
+        plan = InterpolationPlan(template, False)
+        with pytest.raises(ValueError) as e:
+            plan.render(GROUPS, NAMED)
+        with pytest.raises(ValueError) as expected:
+            Template(template).substitute({})
+        assert str(e.value) == str(expected.value)
@@ -0,0 +1,64 @@
+# coding=utf-8
+# Copyright 2019 YAM AI Machinery Limited
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import socket
+import time
+import pytest
+from yamas.throttle import Throttle, PacedWrite, Pacer, make_throttle, slices
+
+
+def receive_all(sock: socket.socket) -> bytes:
+    data = []
+    while True:
+        chunk = sock.recv(65536)
+        if not chunk:
+            return b''.join(data)
+        data.append(chunk)
+
+
+class TestThrottle:
+
+    def test_make_throttle(self):
+        throttle = make_throttle({'bytesPerSecond': 1000, 'ttfb': 200})
+        assert throttle.chunk_size == 50
+        assert throttle.ttfb == 0.2
+        assert make_throttle({}) is None
+        assert make_throttle(None) is None
+        assert make_throttle({'ttfb': 10}).bytes_per_second is None
+
+    def test_slices(self):
+        assert [bytes(s) for s in slices([b'abcde', b'f'], 2)] == \
+            [b'ab', b'cd', b'e', b'f']
+
+    def test_paced_write(self):
+        server, client = socket.socketpair()
+        server.setblocking(False)
+        job = PacedWrite(server, [b'abc', b'defgh'], Throttle(40))
+        assert job.step() == pytest.approx(2 / 40)
+        assert client.recv(10) == b'ab'
+        while job.step() is not None:
+            pass
+        assert receive_all(client) == b'cdefgh'
+
+    def test_pacer(self):
+        pacer = Pacer()
+        pairs = [socket.socketpair() for _ in range(5)]
+        start = time.monotonic()
+        for server, _ in pairs:
+            pacer.submit(server, [b'x' * 1000], Throttle(4000, 0.1))
+        for _, client in pairs:
+            assert receive_all(client) == b'x' * 1000
+        elapsed = time.monotonic() - start
+        assert 0.3 <= elapsed < 1.0
@@ -0,0 +1,59 @@
+# coding=utf-8
+# Copyright 2019 YAM AI Machinery Limited
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+from yamas.watcher import SpecWatcher, file_signature
+
+
+def touch(file_path, content: str):
+    with open(file_path, 'w') as f:
+        f.write(content)
+    stat = os.stat(file_path)
+    os.utime(file_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    return
+
+
+class TestSpecWatcher:
+
+    def test_file_signature(self, tmp_path):
+        spec_file = tmp_path / 'spec.json'
+        assert file_signature(str(spec_file)) is None
+        touch(spec_file, '{}')
+        assert file_signature(str(spec_file))[1] == 2
+
+    def test_check(self, tmp_path):
+        spec_file = tmp_path / 'spec.json'
+        touch(spec_file, '{}')
+        reloads = []
+        watcher = SpecWatcher(str(spec_file), lambda: reloads.append(1))
+        assert not watcher.check()
+        touch(spec_file, '{"rules": {}}')
+        assert watcher.check()
+        assert not watcher.check()
+        os.remove(spec_file)
+        assert not watcher.check()
+        assert reloads == [1]
+
+    def test_failed_reload(self, tmp_path, capsys):
+        spec_file = tmp_path / 'spec.json'
+        touch(spec_file, '{}')
+
+        def reload():
+            raise OSError('gone')
+
+        watcher = SpecWatcher(str(spec_file), reload)
+        touch(spec_file, '{"rules": {}}')
+        assert not watcher.check()
+        assert 'Failed to reload' in capsys.readouterr().err
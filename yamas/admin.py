@@ -0,0 +1,102 @@
+# coding=utf-8
+# Copyright 2019 YAM AI Machinery Limited
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from collections import OrderedDict
+from http import HTTPStatus
+from json import dumps, loads
+from typing import TYPE_CHECKING
+from yamas.reqresp import Request, Response, Method
+from yamas.ex import MockSpecError
+
+if TYPE_CHECKING:
+    from yamas.respgen import PatternResponseGenerator
+
+ADMIN_PATH = '/__yamas/admin'
+RULES_PATH = ADMIN_PATH + '/rules'
+GLOBAL_HEADERS_PATH = ADMIN_PATH + '/global/headers'
+
+
+def json_response(status: HTTPStatus, body: any) -> Response:
+    return Response(status, {'Content-Type': 'application/json'},
+                    dumps(body).encode('utf-8'))
+
+
+def error_response(status: HTTPStatus, message: str) -> Response:
+    return json_response(status, {'error': message})
+
+
+def read_json(request: Request) -> dict:
+    try:
+        body = loads(request.content_bytes() or b'{}',
+                     object_pairs_hook=OrderedDict)
+    except Exception as e:
+        raise MockSpecError(f'Failed to parse JSON: {e}')
+    if not isinstance(body, dict):
+        raise MockSpecError('The request body must be a JSON object')
+    return body
+
+
+class AdminAPI:
+    def __init__(self, respgen: 'PatternResponseGenerator'):
+        self.respgen = respgen
+        return
+
+    def respond(self, request: Request) -> Response:
+        path = request.path.split('?', 1)[0]
+        try:
+            if path == RULES_PATH:
+                return self.respond_rules(request)
+            if path == GLOBAL_HEADERS_PATH:
+                return self.respond_global_headers(request)
+        except MockSpecError as e:
+            return error_response(HTTPStatus.BAD_REQUEST, str(e))
+        return error_response(HTTPStatus.NOT_FOUND,
+                              f'Unknown admin path {path}')
+
+    def respond_rules(self, request: Request) -> Response:
+        if request.method is Method.GET:
+            return json_response(HTTPStatus.OK,
+                                 {'rules': self.respgen.list_rules()})
+        if request.method in (Method.PUT, Method.POST):
+            rules = read_json(request).get('rules', {})
+            if not isinstance(rules, dict):
+                raise MockSpecError('The rules field must be an object')
+            self.respgen.put_rules(rules)
+            return Response(HTTPStatus.NO_CONTENT, {}, b'')
+        if request.method is Method.DELETE:
+            patterns = read_json(request).get('rules', [])
+            if not isinstance(patterns, list) or \
+                    not all(isinstance(pat, str) for pat in patterns):
+                raise MockSpecError('The rules field must be a list of keys')
+            self.respgen.delete_rules(patterns)
+            return Response(HTTPStatus.NO_CONTENT, {}, b'')
+        return self.not_allowed('GET, PUT, POST, DELETE')
+
+    def respond_global_headers(self, request: Request) -> Response:
+        if request.method is Method.GET:
+            return json_response(HTTPStatus.OK,
+                                 {'headers': self.respgen.global_headers})
+        if request.method is Method.PUT:
+            self.respgen.set_global_headers(
+                read_json(request).get('headers', {}))
+            return Response(HTTPStatus.NO_CONTENT, {}, b'')
+        return self.not_allowed('GET, PUT')
+
+    @staticmethod
+    def not_allowed(methods: str) -> Response:
+        response = error_response(HTTPStatus.METHOD_NOT_ALLOWED,
+                                  f'Allowed methods: {methods}')
+        response.headers['Allow'] = methods
+        return response
@@ -0,0 +1,273 @@
+# coding=utf-8
+# Copyright 2019 YAM AI Machinery Limited
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+import os
+import socket
+import sys
+from io import BytesIO
+from itertools import chain
+from http import HTTPStatus
+from http.client import parse_headers
+from time import monotonic, strftime
+from typing import Iterator
+from yamas.respgen import ResponseGenerator
+from yamas.reqresp import Response, Request, Method, FileContent, has_body, \
+    encode_head, server_line, CONNECTION_CLOSE, CONNECTION_KEEP_ALIVE, \
+    TRANSFER_ENCODING_CHUNKED
+from yamas.stream import encode_chunked, buffered, body_chunks
+from yamas.throttle import slices
+
+MAX_LINE = 65536
+
+
+class BadRequest(Exception):
+    def __init__(self, status: HTTPStatus):
+        self.status = status
+
+
+class AsyncMockServer:
+
+    def __init__(self, respgen: ResponseGenerator, server_version: str,
+                 idle_timeout: float = None):
+        self.respgen = respgen
+        self.server_version = server_version
+        self.server_line = server_line(server_version)
+        self.idle_timeout = idle_timeout
+        return
+
+    def run(self, ip: str = None, port: int = None,
+            sock: socket.socket = None, stop_signals: tuple = ()):
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        if sock is not None:
+            start = asyncio.start_server(
+                self.handle_connection, sock=sock, limit=MAX_LINE)
+        else:
+            start = asyncio.start_server(
+                self.handle_connection, ip, port, limit=MAX_LINE)
+        server = loop.run_until_complete(start)
+        for signum in stop_signals:
+            loop.add_signal_handler(signum, loop.stop)
+        try:
+            loop.run_forever()
+        finally:
+            server.close()
+            loop.run_until_complete(server.wait_closed())
+            loop.close()
+        return
+
+    async def handle_connection(self, reader: asyncio.StreamReader,
+                                writer: asyncio.StreamWriter):
+        peer = writer.get_extra_info('peername')
+        client = peer[0] if peer else '-'
+        try:
+            keep_alive = True
+            while keep_alive:
+                try:
+                    request_line = await asyncio.wait_for(
+                        reader.readline(), self.idle_timeout)
+                except asyncio.TimeoutError:
+                    break
+                if not request_line:
+                    break
+                if request_line in (b'\r\n', b'\n'):
+                    continue
+                keep_alive = await self.handle_request(
+                    client, request_line, reader, writer)
+        except (ConnectionError, asyncio.IncompleteReadError,
+                asyncio.LimitOverrunError, ValueError):
+            pass
+        finally:
+            writer.close()
+        return
+
+    async def handle_request(self, client: str, request_line: bytes,
+                             reader: asyncio.StreamReader,
+                             writer: asyncio.StreamWriter) -> bool:
+        requestline = request_line.decode('iso-8859-1').rstrip('\r\n')
+        try:
+            words = requestline.split()
+            if len(words) != 3 or not words[2].startswith('HTTP/'):
+                raise BadRequest(HTTPStatus.BAD_REQUEST)
+            method_name, path, version = words
+            headers = await self.read_headers(reader)
+            keep_alive = self.keep_alive(version, headers)
+            body = await self.read_body(reader, headers)
+            try:
+                method = Method(method_name)
+            except ValueError:
+                raise BadRequest(HTTPStatus.NOT_IMPLEMENTED)
+        except BadRequest as e:
+            self.log_request(client, requestline, e.status.value)
+            writer.write(self.encode_response(
+                Response(e.status, {}, b''), False, False))
+            await writer.drain()
+            return False
+        started = monotonic()
+        request = Request(path, method, headers, BytesIO(body))
+        response = self.respgen.respond(request)
+        if response.delay is not None:
+            await asyncio.sleep(response.delay.sample())
+        self.log_request(client, requestline, response.status.value)
+        with_body = method is not Method.HEAD and has_body(response.status)
+        stream = response.content_stream if has_body(response.status) \
+            else None
+        if stream is not None and version == 'HTTP/1.0':
+            keep_alive = False
+        if response.throttle is not None:
+            keep_alive = await self.send_throttled(
+                response, keep_alive, with_body, version, writer)
+            sent = len(encode_head(response, self.server_line))
+            if with_body and stream is None:
+                sent += response.content_length
+        else:
+            data = self.encode_response(
+                response, keep_alive, with_body, version)
+            writer.write(data)
+            sent = len(data)
+            if with_body and stream is not None:
+                streamed = await self.send_stream(
+                    stream, version != 'HTTP/1.0', writer)
+                keep_alive = streamed is not None and keep_alive
+                sent += streamed or 0
+            elif with_body and response.content_file is not None:
+                keep_alive = await self.send_file(
+                    response.content_file, writer) and keep_alive
+                sent += response.content_file.size
+            await writer.drain()
+        if self.respgen.metrics is not None:
+            self.respgen.metrics.observe(method, sent, monotonic() - started)
+        return keep_alive
+
+    async def send_throttled(self, response: Response, keep_alive: bool,
+                             with_body: bool, version: str,
+                             writer: asyncio.StreamWriter) -> bool:
+        throttle = response.throttle
+        await asyncio.sleep(throttle.ttfb)
+        head = self.encode_response(response, keep_alive, False, version)
+        chunks = body_chunks(response, version != 'HTTP/1.0') \
+            if with_body else ()
+        try:
+            for data in slices(chain((head,), chunks), throttle.chunk_size):
+                writer.write(data)
+                await writer.drain()
+                if throttle.bytes_per_second is not None:
+                    await asyncio.sleep(len(data) / throttle.bytes_per_second)
+        except (ConnectionError, asyncio.CancelledError):
+            raise
+        except Exception as e:
+            sys.stderr.write(f'Paced write failed: {e}\n')
+            return False
+        return keep_alive
+
+    async def send_stream(self, stream: Iterator[bytes], chunked: bool,
+                          writer: asyncio.StreamWriter) -> int:
+        sent = 0
+        try:
+            for data in encode_chunked(stream) if chunked else buffered(stream):
+                writer.write(data)
+                sent += len(data)
+                await writer.drain()
+        except (ConnectionError, asyncio.CancelledError):
+            raise
+        except Exception as e:
+            sys.stderr.write(f'Streaming failed: {e}\n')
+            return None
+        return sent
+
+    async def send_file(self, content_file: FileContent,
+                        writer: asyncio.StreamWriter) -> bool:
+        if content_file.size == 0:
+            return True
+        loop = asyncio.get_event_loop()
+        if not hasattr(os, 'sendfile') or not hasattr(loop, 'sendfile'):
+            writer.write(content_file.view())
+            return True
+        await writer.drain()
+        with open(content_file.path, 'rb') as f:
+            sent = await loop.sendfile(
+                writer.transport, f, 0, content_file.size)
+        return sent == content_file.size
+
+    async def read_headers(self, reader: asyncio.StreamReader):
+        lines = []
+        while True:
+            line = await reader.readline()
+            if not line:
+                raise asyncio.IncompleteReadError(b''.join(lines), None)
+            lines.append(line)
+            if line in (b'\r\n', b'\n'):
+                break
+            if len(lines) > 100:
+                raise BadRequest(HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE)
+        return parse_headers(BytesIO(b''.join(lines)))
+
+    async def read_body(self, reader: asyncio.StreamReader, headers) -> bytes:
+        if headers.get('Transfer-Encoding', '').lower() == 'chunked':
+            chunks = []
+            while True:
+                size_line = await reader.readline()
+                try:
+                    size = int(size_line.split(b';')[0], 16)
+                except ValueError:
+                    raise BadRequest(HTTPStatus.BAD_REQUEST)
+                if size == 0:
+                    break
+                chunks.append(await reader.readexactly(size))
+                await reader.readline()
+            while await reader.readline() not in (b'\r\n', b'\n', b''):
+                pass
+            return b''.join(chunks)
+        content_length = headers.get('Content-Length')
+        if not content_length:
+            return b''
+        try:
+            length = int(content_length)
+        except ValueError:
+            raise BadRequest(HTTPStatus.BAD_REQUEST)
+        if length < 0:
+            raise BadRequest(HTTPStatus.BAD_REQUEST)
+        return await reader.readexactly(length)
+
+    @staticmethod
+    def keep_alive(version: str, headers) -> bool:
+        connection = headers.get('Connection', '').lower()
+        if connection == 'close':
+            return False
+        if version == 'HTTP/1.0':
+            return connection == 'keep-alive'
+        return True
+
+    def encode_response(self, response: Response, keep_alive: bool,
+                        with_body: bool, version: str = 'HTTP/1.1') -> bytes:
+        if not keep_alive:
+            connection = CONNECTION_CLOSE
+        elif version == 'HTTP/1.0':
+            connection = CONNECTION_KEEP_ALIVE
+        else:
+            connection = b''
+        if response.content_stream is not None and version != 'HTTP/1.0' \
+                and has_body(response.status):
+            connection += TRANSFER_ENCODING_CHUNKED
+        head = encode_head(response, self.server_line, connection)
+        if with_body and response.content_bytes and has_body(response.status):
+            return head + response.content_bytes
+        return head
+
+    def log_request(self, client: str, requestline: str, code: int):
+        sys.stderr.write('%s - - [%s] "%s" %s -\n' % (
+            client, strftime('%d/%b/%Y %H:%M:%S'), requestline, code))
+        return
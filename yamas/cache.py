@@ -0,0 +1,92 @@
+# coding=utf-8
+# Copyright 2019 YAM AI Machinery Limited
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from collections import OrderedDict
+from threading import Lock
+
+MISSING = object()
+
+
+class LRUCache:
+    def __init__(self, maxsize: int, maxbytes: int = None):
+        if maxsize < 0:
+            raise ValueError(f'Cache size must not be negative: {maxsize}')
+        if maxbytes is not None and maxbytes < 0:
+            raise ValueError(
+                f'Cache byte limit must not be negative: {maxbytes}')
+        self.maxsize = maxsize
+        self.maxbytes = maxbytes
+        self.entries = OrderedDict()
+        self.sizes = {}
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = Lock()
+        return
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        del state['lock']
+        return state
+
+    def __setstate__(self, state: dict):
+        self.__dict__.update(state)
+        self.lock = Lock()
+
+    def get(self, key: any) -> any:
+        with self.lock:
+            value = self.entries.get(key, MISSING)
+            if value is MISSING:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self.entries.move_to_end(key)
+        return value
+
+    def put(self, key: any, value: any, size: int = 0):
+        if self.maxsize == 0:
+            return
+        if self.maxbytes is not None and size > self.maxbytes:
+            return
+        with self.lock:
+            self.bytes += size - self.sizes.get(key, 0)
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            self.sizes[key] = size
+            while len(self.entries) > self.maxsize or \
+                    (self.maxbytes is not None and self.bytes > self.maxbytes):
+                evicted, _ = self.entries.popitem(last=False)
+                self.bytes -= self.sizes.pop(evicted)
+                self.evictions += 1
+        return
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.sizes.clear()
+            self.bytes = 0
+        return
+
+    def stats(self) -> dict:
+        return {
+            'size': len(self.entries),
+            'maxsize': self.maxsize,
+            'bytes': self.bytes,
+            'maxbytes': self.maxbytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions
+        }
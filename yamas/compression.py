@@ -0,0 +1,81 @@
+# coding=utf-8
+# Copyright 2019 YAM AI Machinery Limited
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import zlib
+from functools import lru_cache
+from typing import Tuple
+
+ENCODINGS = ('gzip', 'deflate')
+DEFAULT_ENCODINGS = ('gzip',)
+DEFAULT_MIN_SIZE = 1024
+DEFAULT_LEVEL = 6
+WBITS = {'gzip': 31, 'deflate': 15}
+
+
+class Compression:
+    def __init__(self, encodings: Tuple[str, ...] = DEFAULT_ENCODINGS,
+                 min_size: int = DEFAULT_MIN_SIZE, level: int = DEFAULT_LEVEL):
+        for encoding in encodings:
+            if encoding not in WBITS:
+                raise ValueError(f'Unsupported content encoding {encoding}')
+        self.encodings = tuple(encodings)
+        self.min_size = min_size
+        self.level = level
+        return
+
+    def compress(self, data: bytes, encoding: str) -> bytes:
+        compressor = zlib.compressobj(
+            self.level, zlib.DEFLATED, WBITS[encoding])
+        return compressor.compress(data) + compressor.flush()
+
+    def negotiate(self, accept_encoding: str) -> str:
+        if not accept_encoding:
+            return None
+        return negotiate(accept_encoding, self.encodings)
+
+
+def parse_qvalue(params: str) -> float:
+    for param in params.split(';'):
+        name, _, value = param.partition('=')
+        if name.strip().lower() == 'q':
+            try:
+                return float(value)
+            except ValueError:
+                return 0.0
+    return 1.0
+
+
+@lru_cache(maxsize=256)
+def negotiate(accept_encoding: str, encodings: Tuple[str, ...]) -> str:
+    qvalues = {}
+    for item in accept_encoding.split(','):
+        token, _, params = item.partition(';')
+        qvalues[token.strip().lower()] = parse_qvalue(params)
+    selected, selected_q = None, 0.0
+    for encoding in encodings:
+        q = qvalues.get(encoding, qvalues.get('*', 0.0))
+        if q > selected_q:
+            selected, selected_q = encoding, q
+    return selected
+
+
+def vary_headers(headers: dict) -> dict:
+    vary_headers = headers.copy()
+    vary = vary_headers.get('Vary')
+    if not vary:
+        vary_headers['Vary'] = 'Accept-Encoding'
+    elif 'accept-encoding' not in vary.lower() and vary.strip() != '*':
+        vary_headers['Vary'] = f'{vary}, Accept-Encoding'
+    return vary_headers
@@ -1,2 +1,4 @@
 VERSION = '0.2.1'
 SERVER_NAME = 'Yamas'
+DEFAULT_ROUTE_CACHE_SIZE = 1024
+DEFAULT_IDLE_TIMEOUT = 5.0
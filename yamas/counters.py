@@ -0,0 +1,72 @@
+# coding=utf-8
+# Copyright 2019 YAM AI Machinery Limited
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import multiprocessing
+from threading import Lock
+
+LOCK_STRIPES = 16
+
+
+def next_position(idx: int, size: int, loop: bool) -> int:
+    if loop:
+        return (idx + 1) % size
+    return min(idx + 1, size - 1)
+
+
+class LocalCounter:
+    def __init__(self, value: int = 0):
+        self.value = value
+        self.lock = Lock()
+
+    def __getstate__(self):
+        return self.value
+
+    def __setstate__(self, value: int):
+        self.__init__(value)
+
+    def advance(self, size: int, loop: bool) -> int:
+        with self.lock:
+            idx = self.value if self.value < size else 0
+            self.value = next_position(idx, size, loop)
+        return idx
+
+
+class SharedCounter:
+    def __init__(self, counters: 'SharedCounters', slot: int):
+        self.values = counters.values
+        self.lock = counters.locks[slot % LOCK_STRIPES]
+        self.slot = slot
+
+    @property
+    def value(self) -> int:
+        return self.values[self.slot]
+
+    def advance(self, size: int, loop: bool) -> int:
+        with self.lock:
+            idx = self.values[self.slot]
+            if idx >= size:
+                idx = 0
+            self.values[self.slot] = next_position(idx, size, loop)
+        return idx
+
+
+class SharedCounters:
+    def __init__(self, size: int):
+        self.values = multiprocessing.RawArray('q', max(size, 1))
+        self.locks = [multiprocessing.Lock() for _ in range(LOCK_STRIPES)]
+
+    def counter(self, slot: int, value: int = 0) -> SharedCounter:
+        self.values[slot] = value
+        return SharedCounter(self, slot)
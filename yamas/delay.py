@@ -0,0 +1,70 @@
+# coding=utf-8
+# Copyright 2019 YAM AI Machinery Limited
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import math
+import random
+from yamas.ex import MockSpecError
+
+Z_99 = 2.3263478740408408
+
+
+class Delay:
+    def sample(self) -> float:
+        return 0.0
+
+
+class FixedDelay(Delay):
+    def __init__(self, ms: float):
+        self.seconds = ms / 1000
+
+    def sample(self) -> float:
+        return self.seconds
+
+
+class UniformDelay(Delay):
+    def __init__(self, min_ms: float, max_ms: float):
+        if max_ms < min_ms:
+            raise MockSpecError(
+                f'Delay max {max_ms} must not be less than min {min_ms}')
+        self.min = min_ms / 1000
+        self.max = max_ms / 1000
+
+    def sample(self) -> float:
+        return random.uniform(self.min, self.max)
+
+
+class LognormalDelay(Delay):
+    def __init__(self, p50_ms: float, p99_ms: float):
+        if p50_ms <= 0 or p99_ms < p50_ms:
+            raise MockSpecError(
+                f'Delay p50 {p50_ms} must be positive and not greater than p99 {p99_ms}')
+        self.mu = math.log(p50_ms / 1000)
+        self.sigma = (math.log(p99_ms) - math.log(p50_ms)) / Z_99
+
+    def sample(self) -> float:
+        return random.lognormvariate(self.mu, self.sigma)
+
+
+def make_delay(delay: any) -> Delay:
+    if delay is None:
+        return None
+    if isinstance(delay, (int, float)) and not isinstance(delay, bool):
+        return FixedDelay(delay) if delay > 0 else None
+    if isinstance(delay, dict):
+        if 'min' in delay and 'max' in delay:
+            return UniformDelay(delay['min'], delay['max'])
+        if 'p50' in delay and 'p99' in delay:
+            return LognormalDelay(delay['p50'], delay['p99'])
+    raise MockSpecError(f'Unsupported delay {delay}')
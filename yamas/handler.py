@@ -13,34 +13,173 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from typing import Callable
+from typing import Callable, Iterator
+from io import BytesIO
+from itertools import chain
+from select import select
+from time import monotonic, sleep
 from http.server import BaseHTTPRequestHandler
 from http import HTTPStatus
 from yamas.respgen import ResponseGenerator
-from yamas.reqresp import Response, Request, Method
+from yamas.reqresp import Response, Request, RequestBody, Method, has_body, \
+    encode_head, server_line, CONNECTION_CLOSE, CONNECTION_KEEP_ALIVE, \
+    TRANSFER_ENCODING_CHUNKED
+from yamas.stream import encode_chunked, buffered, body_chunks
+from yamas.throttle import pacer
+from yamas.ex import RequestError
+from yamas.config import VERSION, SERVER_NAME
+
+MAX_DRAIN_BYTES = 1 << 20
+IDLE_POLL_INTERVAL = 0.02
+COALESCE_LIMIT = 1 << 16
+
+
+def read_chunked(rfile) -> bytes:
+    chunks = []
+    while True:
+        size_line = rfile.readline(65537)
+        try:
+            size = int(size_line.split(b';')[0], 16)
+        except ValueError:
+            raise RequestError(f'Invalid chunk size {size_line!r}')
+        if size == 0:
+            break
+        chunks.append(rfile.read(size))
+        rfile.readline(65537)
+    while rfile.readline(65537) not in (b'\r\n', b'\n', b''):
+        pass
+    return b''.join(chunks)
 
 
 class MockRequestHandler(BaseHTTPRequestHandler):
 
     respgen = ResponseGenerator()
+    protocol_version = 'HTTP/1.1'
+    keep_alive = True
+    server_line = server_line(f'{SERVER_NAME} {VERSION}')
+
+    def handle(self):
+        self.close_connection = True
+        self.handle_one_request()
+        while not self.close_connection and self.wait_for_request():
+            self.handle_one_request()
+        return
+
+    def buffered_request(self) -> bool:
+        self.connection.settimeout(0)
+        try:
+            return bool(self.rfile.peek(1))
+        except OSError:
+            return False
+        finally:
+            self.connection.settimeout(self.timeout)
+
+    def wait_for_request(self) -> bool:
+        if self.buffered_request():
+            return True
+        busy = getattr(self.server, 'busy', None)
+        deadline = None if self.timeout is None else monotonic() + self.timeout
+        while not (busy and busy()):
+            interval = IDLE_POLL_INTERVAL
+            if deadline is not None:
+                interval = min(interval, deadline - monotonic())
+                if interval <= 0:
+                    return False
+            if select([self.connection], [], [], interval)[0]:
+                return True
+        return False
+
+    def request_body(self):
+        if self.headers.get('Transfer-Encoding', '').lower() == 'chunked':
+            return BytesIO(read_chunked(self.rfile))
+        content_length = self.headers.get('Content-Length')
+        try:
+            length = int(content_length) if content_length else 0
+        except ValueError:
+            raise RequestError(f'Invalid Content-Length {content_length}')
+        if length < 0:
+            raise RequestError(f'Invalid Content-Length {content_length}')
+        return RequestBody(self.rfile, length)
 
     def respond(self, method: Method, path: str, headers: dict):
-        request = Request(self.path, method, self.headers, self.rfile)
-        response = self.respgen.respond(request)
-        if not response:
-            self.send_response(HTTPStatus.NOT_FOUND.value)
-            self.end_headers()
+        started = monotonic()
+        try:
+            content_io = self.request_body()
+        except RequestError as e:
+            self.send_error(HTTPStatus.BAD_REQUEST.value, str(e))
             return
-        status_value = response.status.value
-        self.send_response(status_value)
-        if response.headers:
-            for k, v in response.headers.items():
-                self.send_header(k, v)
-        self.end_headers()
-        if response.content_bytes:
-            self.wfile.write(response.content_bytes)
+        request = Request(self.path, method, self.headers, content_io)
+        response = self.respgen.respond(request)
+        if response.delay is not None:
+            sleep(response.delay.sample())
+        drain = isinstance(content_io, RequestBody) and content_io.remaining
+        detach = response.throttle is not None and \
+            hasattr(self.server, 'detach')
+        if not self.keep_alive or drain > MAX_DRAIN_BYTES or detach:
+            self.close_connection = True
+        with_body = method is not Method.HEAD and has_body(response.status)
+        stream = response.content_stream if has_body(response.status) \
+            else None
+        chunked = stream is not None and self.request_version != 'HTTP/1.0'
+        if stream is not None and not chunked:
+            self.close_connection = True
+        self.log_request(response.status.value)
+        if self.close_connection:
+            connection = CONNECTION_CLOSE
+        elif self.request_version == 'HTTP/1.0':
+            connection = CONNECTION_KEEP_ALIVE
+        else:
+            connection = b''
+        if chunked:
+            connection += TRANSFER_ENCODING_CHUNKED
+        head = encode_head(response, self.server_line, connection)
+        content_bytes = response.content_bytes
+        streamed = 0
+        if detach:
+            self.server.detach(self.connection)
+            chunks = body_chunks(response, chunked) if with_body else ()
+            pacer.submit(self.connection, chain((head,), chunks),
+                         response.throttle)
+        elif not with_body:
+            self.wfile.write(head)
+        elif stream is not None:
+            self.wfile.write(head)
+            streamed = self.send_stream(stream, chunked)
+        elif response.content_file is not None:
+            self.wfile.write(head)
+            if not response.content_file.send(self.connection):
+                self.close_connection = True
+        elif not content_bytes:
+            self.wfile.write(head)
+        elif len(content_bytes) < COALESCE_LIMIT:
+            self.wfile.write(head + content_bytes)
+        else:
+            self.wfile.write(head)
+            self.wfile.write(content_bytes)
+        if drain and not self.close_connection:
+            content_io.drain()
+        metrics = self.respgen.metrics
+        if metrics is not None:
+            size = len(head)
+            if with_body:
+                size += streamed if stream is not None \
+                    else response.content_length
+            metrics.observe(method, size, monotonic() - started)
         return
 
+    def send_stream(self, stream: Iterator[bytes], chunked: bool) -> int:
+        sent = 0
+        try:
+            for data in encode_chunked(stream) if chunked else buffered(stream):
+                self.wfile.write(data)
+                sent += len(data)
+        except OSError:
+            self.close_connection = True
+        except Exception as e:
+            self.log_error('Streaming failed: %s', e)
+            self.close_connection = True
+        return sent
+
     def do_GET(self):
         self.respond(Method.GET, self.path, self.headers)
         return
@@ -0,0 +1,170 @@
+# coding=utf-8
+# Copyright 2019 YAM AI Machinery Limited
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import multiprocessing
+from array import array
+from bisect import bisect_left
+from threading import Lock
+from yamas.counters import LOCK_STRIPES
+from yamas.reqresp import Method
+
+METRICS_PATH = '/__yamas/metrics'
+METRICS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+                   0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+METHODS = list(Method)
+METHOD_INDEX = {method: i for i, method in enumerate(METHODS)}
+ARRAYS = (('hits', 'q'), ('not_found', 'q'), ('bytes', 'q'),
+          ('latency_sum', 'd'), ('latency_buckets', 'q'))
+
+
+def escape_label(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"') \
+        .replace('\n', '\\n')
+
+
+def format_value(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metrics:
+    def __init__(self, patterns: list = ()):
+        self.shared = False
+        self.locks = [Lock() for _ in range(LOCK_STRIPES)]
+        self.set_patterns(patterns)
+        width = len(METHODS)
+        self.not_found = self.make_array('q', width)
+        self.bytes = self.make_array('q', width)
+        self.latency_sum = self.make_array('d', width)
+        self.latency_buckets = self.make_array(
+            'q', width * (len(LATENCY_BUCKETS) + 1))
+        return
+
+    def make_array(self, typecode: str, size: int, values=None):
+        if self.shared:
+            shared = multiprocessing.RawArray(typecode, size)
+            if values is not None:
+                shared[:] = values
+            return shared
+        if values is not None:
+            return array(typecode, values)
+        return array(typecode, bytes(size * array(typecode).itemsize))
+
+    def set_patterns(self, patterns: list):
+        width = len(METHODS)
+        old_rows = {pattern: idx for idx, pattern
+                    in enumerate(getattr(self, 'patterns', ()))
+                    if pattern is not None}
+        old_hits = getattr(self, 'hits', None)
+        hits = [0] * (len(patterns) * width)
+        for idx, pattern in enumerate(patterns):
+            old = old_rows.pop(pattern, None)
+            if old is not None:
+                hits[idx * width:(idx + 1) * width] = \
+                    old_hits[old * width:(old + 1) * width]
+        self.patterns = list(patterns)
+        self.hits = self.make_array('q', len(hits), hits)
+        return
+
+    def share(self):
+        self.shared = True
+        self.locks = [multiprocessing.Lock() for _ in range(LOCK_STRIPES)]
+        for name, typecode in ARRAYS:
+            values = getattr(self, name)
+            setattr(self, name, self.make_array(typecode, len(values), values))
+        return
+
+    def hit(self, rule: int, method: Method):
+        hits = self.hits
+        slot = rule * len(METHODS) + METHOD_INDEX[method]
+        if slot >= len(hits):
+            return
+        with self.locks[slot % LOCK_STRIPES]:
+            hits[slot] += 1
+        return
+
+    def miss(self, method: Method):
+        slot = METHOD_INDEX[method]
+        with self.locks[slot % LOCK_STRIPES]:
+            self.not_found[slot] += 1
+        return
+
+    def observe(self, method: Method, size: int, elapsed: float):
+        slot = METHOD_INDEX[method]
+        bucket = slot * (len(LATENCY_BUCKETS) + 1) + \
+            bisect_left(LATENCY_BUCKETS, elapsed)
+        with self.locks[slot % LOCK_STRIPES]:
+            self.bytes[slot] += size
+            self.latency_sum[slot] += elapsed
+            self.latency_buckets[bucket] += 1
+        return
+
+    def render(self) -> bytes:
+        lines = [
+            '# HELP yamas_requests_total Requests matched by each rule.',
+            '# TYPE yamas_requests_total counter'
+        ]
+        width = len(METHODS)
+        patterns, hits = self.patterns, self.hits[:]
+        for idx, pattern in enumerate(patterns[:len(hits) // width]):
+            if pattern is None:
+                continue
+            for i, method in enumerate(METHODS):
+                count = hits[idx * width + i]
+                if count:
+                    lines.append(
+                        f'yamas_requests_total{{rule="{idx}",'
+                        f'pattern="{escape_label(pattern)}",'
+                        f'method="{method.value}"}} {count}')
+        self.render_counter(
+            lines, 'yamas_not_found_total',
+            'Requests that matched no rule.', self.not_found[:])
+        self.render_counter(
+            lines, 'yamas_response_bytes_total',
+            'Response bytes written, including headers.', self.bytes[:])
+        lines.append('# HELP yamas_request_duration_seconds '
+                     'Time spent responding to requests.')
+        lines.append('# TYPE yamas_request_duration_seconds histogram')
+        latency_sum = self.latency_sum[:]
+        latency_buckets = self.latency_buckets[:]
+        buckets = len(LATENCY_BUCKETS) + 1
+        for i, method in enumerate(METHODS):
+            counts = latency_buckets[i * buckets:(i + 1) * buckets]
+            total = sum(counts)
+            if not total:
+                continue
+            label = f'method="{method.value}"'
+            cumulative = 0
+            for le, count in zip(LATENCY_BUCKETS, counts):
+                cumulative += count
+                lines.append(f'yamas_request_duration_seconds_bucket'
+                             f'{{{label},le="{le}"}} {cumulative}')
+            lines.append(f'yamas_request_duration_seconds_bucket'
+                         f'{{{label},le="+Inf"}} {total}')
+            lines.append(f'yamas_request_duration_seconds_sum{{{label}}} '
+                         f'{format_value(latency_sum[i])}')
+            lines.append(f'yamas_request_duration_seconds_count{{{label}}} '
+                         f'{total}')
+        lines.append('')
+        return '\n'.join(lines).encode('utf-8')
+
+    @staticmethod
+    def render_counter(lines: list, name: str, help: str, values: list):
+        lines.append(f'# HELP {name} {help}')
+        lines.append(f'# TYPE {name} counter')
+        for i, method in enumerate(METHODS):
+            if values[i]:
+                lines.append(f'{name}{{method="{method.value}"}} {values[i]}')
+        return
@@ -0,0 +1,102 @@
+# coding=utf-8
+# Copyright 2019 YAM AI Machinery Limited
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import gc
+import os
+import signal
+import socket
+import sys
+import time
+import traceback
+from typing import Callable
+from yamas.ex import ServerError
+
+LISTEN_BACKLOG = 1024
+RESPAWN_INTERVAL = 1.0
+
+
+def bind_socket(ip: str, port: int) -> socket.socket:
+    family = socket.AF_INET6 if ':' in ip else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    try:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((ip, port))
+        sock.listen(LISTEN_BACKLOG)
+    except Exception:
+        sock.close()
+        raise
+    return sock
+
+
+class PreforkServer:
+    def __init__(self, sock: socket.socket,
+                 serve: Callable[[socket.socket], None], workers: int):
+        if not hasattr(os, 'fork'):
+            raise ServerError('Worker processes require os.fork')
+        self.sock = sock
+        self.serve = serve
+        self.workers = workers
+        self.children = {}
+        self.stopping = False
+        return
+
+    def run(self):
+        if hasattr(gc, 'freeze'):
+            gc.freeze()
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        for _ in range(self.workers):
+            self.spawn()
+        while self.children:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                break
+            started = self.children.pop(pid, None)
+            if started is None or self.stopping:
+                continue
+            print(f'Worker {pid} exited with status {status}; restarting',
+                  file=sys.stderr)
+            if time.monotonic() - started < RESPAWN_INTERVAL:
+                time.sleep(RESPAWN_INTERVAL)
+            if not self.stopping:
+                self.spawn()
+        self.sock.close()
+        return
+
+    def spawn(self):
+        pid = os.fork()
+        if pid:
+            self.children[pid] = time.monotonic()
+            return
+        exit_code = 0
+        try:
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            self.serve(self.sock)
+        except BaseException:
+            traceback.print_exc()
+            exit_code = 1
+        finally:
+            os._exit(exit_code)
+
+    def stop(self, signum, frame):
+        self.stopping = True
+        for pid in list(self.children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        return
@@ -17,8 +17,17 @@ from enum import Enum
 from io import BufferedIOBase
 from http import HTTPStatus
 from collections import OrderedDict
+from email.utils import formatdate
 from json import loads
+from threading import Lock
+from time import time
+from typing import Iterator
+import mmap
+import os
+import socket
 from yamas.ex import RequestError
+from yamas.delay import Delay
+from yamas.throttle import Throttle
 
 
 class Method(Enum):
@@ -67,8 +76,141 @@ class Request:
         return
 
 
+class RequestBody:
+    def __init__(self, rfile: BufferedIOBase, length: int):
+        self.rfile = rfile
+        self.remaining = length
+        return
+
+    def read(self, size: int = -1) -> bytes:
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        if size == 0:
+            return b''
+        data = self.rfile.read(size)
+        if len(data) < size:
+            self.remaining = 0
+        else:
+            self.remaining -= size
+        return data
+
+    def drain(self):
+        while self.remaining > 0:
+            if not self.read(min(self.remaining, 65536)):
+                break
+        return
+
+
+def has_body(status: HTTPStatus) -> bool:
+    return status.value >= 200 and status not in \
+        (HTTPStatus.NO_CONTENT, HTTPStatus.NOT_MODIFIED)
+
+
+STATUS_LINES = {
+    status: f'HTTP/1.1 {status.value} {status.phrase}\r\n'.encode('latin-1')
+    for status in HTTPStatus
+}
+
+
+def encode_headers(headers: dict) -> bytes:
+    if not headers:
+        return b''
+    return ''.join(f'{k}: {v}\r\n' for k, v in headers.items()) \
+        .encode('latin-1', 'strict')
+
+
+def content_length_line(length: int) -> bytes:
+    return b'Content-Length: %d\r\n' % length
+
+
+class DateLine:
+    def __init__(self):
+        self.cached = (0, b'')
+
+    def __call__(self) -> bytes:
+        now = int(time())
+        second, line = self.cached
+        if second != now:
+            line = f'Date: {formatdate(now, usegmt=True)}\r\n'.encode('latin-1')
+            self.cached = (now, line)
+        return line
+
+
+date_line = DateLine()
+
+CONNECTION_CLOSE = b'Connection: close\r\n'
+CONNECTION_KEEP_ALIVE = b'Connection: keep-alive\r\n'
+TRANSFER_ENCODING_CHUNKED = b'Transfer-Encoding: chunked\r\n'
+
+
+class FileContent:
+    def __init__(self, path: str):
+        self.path = path
+        self.size = os.stat(path).st_size
+        self.mapped = None
+        self.lock = Lock()
+
+    def __getstate__(self):
+        return self.path, self.size
+
+    def __setstate__(self, state: tuple):
+        self.path, self.size = state
+        self.mapped = None
+        self.lock = Lock()
+
+    def view(self) -> memoryview:
+        if self.mapped is None:
+            with self.lock:
+                if self.mapped is None:
+                    with open(self.path, 'rb') as f:
+                        self.mapped = memoryview(
+                            mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+        return self.mapped[:self.size]
+
+    def send(self, sock: socket.socket) -> bool:
+        if self.size == 0:
+            return True
+        if not hasattr(os, 'sendfile'):
+            sock.sendall(self.view())
+            return True
+        with open(self.path, 'rb') as f:
+            return sock.sendfile(f, 0, self.size) == self.size
+
+
 class Response:
-    def __init__(self, status: HTTPStatus, headers: dict, content_bytes: bytes):
+    def __init__(self, status: HTTPStatus, headers: dict, content_bytes: bytes,
+                 header_bytes: bytes = None, content_file: FileContent = None,
+                 content_stream: Iterator[bytes] = None, delay: Delay = None,
+                 throttle: Throttle = None):
         self.status = status
         self.headers = headers
         self.content_bytes = content_bytes
+        self.header_bytes = header_bytes
+        self.content_file = content_file
+        self.content_stream = content_stream
+        self.delay = delay
+        self.throttle = throttle
+
+    @property
+    def content_length(self) -> int:
+        if self.content_file is not None:
+            return self.content_file.size
+        return len(self.content_bytes or b'')
+
+    def encode_headers(self) -> bytes:
+        if self.header_bytes is None:
+            header_bytes = encode_headers(self.headers)
+            if has_body(self.status) and self.content_stream is None:
+                header_bytes += content_length_line(self.content_length)
+            self.header_bytes = header_bytes
+        return self.header_bytes
+
+
+def server_line(version: str) -> bytes:
+    return f'Server: {version}\r\n'.encode('latin-1', 'strict')
+
+
+def encode_head(response: Response, server: bytes,
+                connection: bytes = b'') -> bytes:
+    return b''.join((STATUS_LINES[response.status], server, date_line(),
+                     response.encode_headers(), connection, b'\r\n'))
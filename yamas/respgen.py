@@ -17,100 +17,53 @@ import re
 from collections import OrderedDict
 from json import loads, dumps
 from http import HTTPStatus
-from typing import Pattern
-from yamas.reqresp import Request, Response, Method, ContentType
+from typing import Pattern, Union
+from yamas.reqresp import Request, Response, Method, ContentType, \
+    FileContent, encode_headers, content_length_line, has_body
 from yamas.ex import MockSpecError, RequestError, ResponseError
-from copy import copy, deepcopy
-from jsonschema import validate
-from string import Template
-
-spec_schema = {
-    'title': 'Yamas Specification',
-    'description': 'Specification on mock response data for Yamas',
-    'type': 'object',
-    'properties': {
-        'global': {
-            'description': 'Global parameters',
-            'type': 'object',
-            'properties': {
-                'headers': {
-                    'description': 'Default HTTP headers',
-                    'type': 'object',
-                    'propertyNames': {
-                        'description': 'HTTP header name',
-                        'pattern': '^.+$'
-                    },
-                    'patternProperties': {
-                        '^.+$': {
-                            'description': 'HTTP header value',
-                            'type': 'string'
-                        }
-                    },
-                    'additionalProperties': False
-                },
-                'serverHeader': {
-                    'description': 'Server header',
-                    'type': 'string',
-                    'minLength': 1
-                }
-            }
-        },
-        'rules': {
-            'description': 'Rules of URL path patterns',
-            'type': 'object',
-            'propertyNames': {
-                'pattern': '^.+$'
-            },
-            'patternProperties': {
-                '^.+$': {
-                    'description': 'Mock response per HTTP method',
-                    'type': 'object',
-                    'propertyNames': {
-                        'description': 'HTTP method',
-                        'enum': [x.value for x in list(Method)]
-                    },
-                    'patternProperties': {
-                        '[A-Z]+': {
-                            'description': 'Mock response',
-                            'type': 'object',
-                            'properties': {
-                                'status': {
-                                    'description': 'HTTP response status code',
-                                    'type': 'integer',
-                                    'minimum': 100,
-                                    'maximum': 599
-                                },
-                                'headers': {
-                                    'description': 'HTTP response headers',
-                                    'type': 'object',
-                                    'propertyNames': {
-                                        'description': 'HTTP header name',
-                                        'pattern': '^.+$'
-                                    },
-                                    'patternProperties': {
-                                        '^.+$': {
-                                            'description': 'HTTP header value',
-                                            'type': 'string'
-                                        }
-                                    },
-                                    'additionalProperties': False
-                                },
-                                'interpolate': {
-                                    'description': 'Whether interpolation is applied',
-                                    'type': 'boolean'
-                                },
-                                'content': {
-                                    'description': 'String or JSON response content'
-                                }
-                            }
-                        }
-                    }
-                }
-            }
-        }
-    },
-    'additionalProperties': False
-}
+from yamas.router import Router, PathTemplate, is_path_template
+from yamas.cache import LRUCache, MISSING
+from yamas.counters import LocalCounter, SharedCounters
+from yamas.template import InterpolationPlan
+from yamas.stream import FileStream, RecordStream
+from yamas.delay import Delay, make_delay
+from yamas.throttle import Throttle, make_throttle
+from yamas.metrics import Metrics, METRICS_PATH, METRICS_CONTENT_TYPE
+from yamas.admin import AdminAPI, ADMIN_PATH
+from yamas.schema import spec_schema, validate_spec, rule_error, \
+    document_error
+from yamas.startup import phase
+from yamas.config import DEFAULT_ROUTE_CACHE_SIZE
+from yamas.compression import Compression, vary_headers, \
+    DEFAULT_ENCODINGS, DEFAULT_MIN_SIZE, DEFAULT_LEVEL
+from copy import copy
+from mimetypes import guess_type
+from os import getcwd, path
+from threading import Lock
+
+DEFAULT_RENDER_CACHE_SIZE = 1024
+RESERVED_PREFIX = '/__yamas/'
+RELOADED_FIELDS = ('rules', 'patterns', 'rule_specs', 'global_headers',
+                   'global_spec', 'server_header', 'global_cache',
+                   'global_throttle', 'compression', 'base_dir', 'delayed',
+                   'table')
+
+
+def make_render_cache(cache: dict) -> LRUCache:
+    if cache is None:
+        return None
+    maxsize = cache.get('maxEntries', DEFAULT_RENDER_CACHE_SIZE)
+    if maxsize == 0:
+        return None
+    return LRUCache(maxsize, cache.get('maxBytes'))
+
+
+def resolve_path(file_path: str, base_dir: str = None) -> str:
+    return path.abspath(path.join(base_dir or getcwd(), file_path))
+
+
+def reads_file(resp: dict) -> bool:
+    return 'contentFile' in resp or 'file' in resp.get('stream', {})
 
 
 def check_headers(headers: dict):
@@ -120,8 +73,10 @@ def check_headers(headers: dict):
 
 
 class ResponseMaker:
-    def __init__(self, status: HTTPStatus, headers: dict, content: any, content_type: ContentType, interpolate: bool, global_headers: dict):
+    def __init__(self, status: HTTPStatus, headers: dict, content: any, content_type: ContentType, interpolate: bool, global_headers: dict, cache: dict = None, compression: Compression = None, content_file: str = None, stream: dict = None, delay: Delay = None, throttle: Throttle = None):
         self.status = status
+        self.delay = delay
+        self.throttle = throttle
         self.content_type = content_type
         self.headers = copy(
             global_headers) if global_headers is not None else OrderedDict()
@@ -130,19 +85,101 @@ class ResponseMaker:
             for h in headers:
                 self.headers[h] = headers[h]
         self.content_bytes = None
+        self.content_file = None
+        self.stream = None
         self.template = None
         self.interpolate = interpolate
 
-        if self.content_type is ContentType.JSON:
+        if stream is not None:
+            self.make_content_stream(stream, content, content_file,
+                                     content_type)
+        elif content_file is not None:
+            self.make_content_file(content_file, content, content_type)
+        elif self.content_type is ContentType.JSON:
             self.make_content_dict(content)
         elif content is None or isinstance(content, str):
             self.make_content_str(content, content_type)
         elif content is not None:
             raise MockSpecError(
                 f'Content "{dumps(content)}" is not a string but its type is text or not given')
+        self.plan = None
+        if self.interpolate and self.stream is None:
+            self.compile_template()
         self.process_headers()
+        self.variants = {
+            None: (self.headers, self.encode_header_bytes(self.headers))
+        }
+        self.compression = None
+        if self.compressible(compression):
+            self.compression = compression
+            self.make_variants()
+        self.response = None
+        self.encoded = {}
+        self.render_cache = None
+        if self.stream is not None:
+            self.interpolate = True
+        elif self.interpolate:
+            self.render_cache = make_render_cache(cache)
+        else:
+            self.response = self.build_response(self.content_bytes)
+            self.make_encoded()
+        return
+
+    def compressible(self, compression: Compression) -> bool:
+        if compression is None or not has_body(self.status):
+            return False
+        if 'Content-Encoding' in self.headers or self.content_file or \
+                self.stream:
+            return False
+        return self.interpolate or \
+            len(self.content_bytes) >= compression.min_size
+
+    def make_variants(self):
+        headers = vary_headers(self.headers)
+        self.variants[None] = (headers, self.encode_header_bytes(headers))
+        for encoding in self.compression.encodings:
+            encoded_headers = copy(headers)
+            encoded_headers['Content-Encoding'] = encoding
+            self.variants[encoding] = (
+                encoded_headers, self.encode_header_bytes(encoded_headers))
         return
 
+    def make_encoded(self):
+        if self.compression is None:
+            return
+        for encoding in self.compression.encodings:
+            response = self.build_response(self.content_bytes, encoding)
+            if len(response.content_bytes) < len(self.content_bytes):
+                self.encoded[encoding] = response
+        return
+
+    def compile_template(self):
+        self.plan = InterpolationPlan(
+            self.template, self.content_type is ContentType.JSON)
+        if self.plan.static:
+            self.content_bytes = self.plan.render(())
+            self.interpolate = False
+        return
+
+    def encode_header_bytes(self, headers: dict) -> bytes:
+        try:
+            return encode_headers(headers)
+        except UnicodeEncodeError as e:
+            raise MockSpecError(f'Header values must be ISO-8859-1 text: {e}')
+
+    def build_response(self, content_bytes: bytes,
+                       encoding: str = None) -> Response:
+        headers, header_bytes = self.variants[encoding]
+        if encoding is not None:
+            content_bytes = self.compression.compress(content_bytes, encoding)
+        if has_body(self.status) and self.stream is None:
+            length = self.content_file.size if self.content_file \
+                else len(content_bytes)
+            header_bytes += content_length_line(length)
+        return Response(self.status, headers, content_bytes, header_bytes,
+                        self.content_file, delay=self.delay,
+                        throttle=self.throttle)
+
     def process_headers(self):
         headers_to_delete = []
         for k, v in self.headers.items():
@@ -155,6 +192,53 @@ class ResponseMaker:
             del self.headers[k]
         return
 
+    def make_content_stream(self, stream: dict, content: any,
+                            content_file: str, content_type: ContentType):
+        if content is not None or content_file is not None:
+            raise MockSpecError(
+                'Stream cannot be given with content or contentFile')
+        if ('file' in stream) == ('record' in stream):
+            raise MockSpecError('Stream must have either file or record')
+        if 'file' in stream:
+            if 'count' in stream or self.interpolate:
+                raise MockSpecError(
+                    'Stream from a file cannot have count or be interpolated')
+            self.stream = FileStream(stream['file'])
+            default_type = guess_type(stream['file'])[0]
+        else:
+            json = content_type is ContentType.JSON
+            self.stream = RecordStream(stream['record'], json,
+                                       self.interpolate, stream.get('count'))
+            default_type = 'application/x-ndjson' if json else None
+        if content_type is ContentType.TEXT:
+            default_type = 'text/plain'
+        if default_type and self.headers.get('Content-Type') is None:
+            self.headers['Content-Type'] = default_type
+        self.content_bytes = b''
+        return
+
+    def make_content_file(self, path: str, content: any,
+                          content_type: ContentType):
+        if content is not None:
+            raise MockSpecError('Content and contentFile cannot both be given')
+        if self.interpolate:
+            raise MockSpecError('Content from contentFile cannot be interpolated')
+        try:
+            self.content_file = FileContent(path)
+        except OSError as e:
+            raise MockSpecError(f'Failed to read content file {path}: {e}')
+        self.content_bytes = b''
+        if self.headers.get('Content-Type') is None:
+            if content_type is ContentType.JSON:
+                self.headers['Content-Type'] = 'application/json'
+            elif content_type is ContentType.TEXT:
+                self.headers['Content-Type'] = 'text/plain'
+            else:
+                mime_type, _ = guess_type(path)
+                if mime_type:
+                    self.headers['Content-Type'] = mime_type
+        return
+
     def make_content_str(self, content: str, content_type: ContentType):
         if content is None:
             content = ''
@@ -188,45 +272,38 @@ class ResponseMaker:
             self.headers['Content-Type'] = 'application/json'
         return
 
-    @staticmethod
-    def format_content_template(template_item: any, vars: tuple) -> any:
-        if isinstance(template_item, str):
-            kv = dict()
-            for i, v in enumerate(vars):
-                kv[f'p_{i}'] = v
-            return Template(template_item).substitute(kv)
-        if isinstance(template_item, dict):
-            content_dict = OrderedDict()
-            for k, v in template_item.items():
-                content_dict[k] = ResponseMaker.format_content_template(
-                    v, vars)
-            return content_dict
-        if isinstance(template_item, list):
-            content_list = []
-            for v in content_list:
-                content_list.append(
-                    ResponseMaker.format_content_template(v, vars))
-            return content_list
-        return template_item
-
-    def make_response(self, groups: tuple) -> Response:
+    def make_response(self, groups: tuple, named: dict = None,
+                      encoding: str = None) -> Response:
         if not self.interpolate:
-            return Response(self.status, self.headers, self.content_bytes)
+            return self.encoded.get(encoding, self.response)
+        if self.stream is not None:
+            response = self.build_response(b'')
+            response.content_stream = self.stream.chunks(groups, named)
+            return response
+        if self.compression is None:
+            encoding = None
+        key = (groups, encoding)
+        if self.render_cache is not None:
+            response = self.render_cache.get(key)
+            if response is not MISSING:
+                return response
         try:
-            formatted_content = ResponseMaker.format_content_template(
-                self.template, groups)
-            if self.content_type is ContentType.JSON:
-                content_bytes = dumps(formatted_content).encode('utf-8')
-            else:
-                content_bytes = formatted_content.encode('utf-8')
+            content_bytes = self.plan.render(groups, named)
         except Exception as e:
             return Response(HTTPStatus.INTERNAL_SERVER_ERROR,
                             {'Content-Type': 'text/plain'},
                             str(e).encode('utf-8'))
-        return Response(self.status, self.headers, content_bytes)
+        if encoding is not None and \
+                len(content_bytes) < self.compression.min_size:
+            encoding = None
+        response = self.build_response(content_bytes, encoding)
+        if self.render_cache is not None:
+            self.render_cache.put(key, response, len(response.content_bytes))
+        return response
 
 
 class ResponseGenerator:
+    metrics = None
 
     def respond(self, request: Request) -> Response:
         return Response(HTTPStatus.NOT_IMPLEMENTED, {}, b'')
@@ -236,55 +313,170 @@ class ResponseSelector:
     def __init__(self, loop):
         self.response_makers = []
         self.loop = loop
-        self.idx = 0
+        self.counter = LocalCounter()
 
     def add_response_maker(self, response_maker: ResponseMaker):
         self.response_makers.append(response_maker)
         return
 
-    def make_response(self, groups):
+    def make_response(self, groups: tuple, named: dict = None,
+                      encoding: str = None):
         if not self.response_makers:
             return Response(HTTPStatus.NOT_FOUND, {}, b'')
-        num_response_makers = len(self.response_makers)
-        if self.idx >= num_response_makers:
-            self.idx == 0
-        response_maker = self.response_makers[self.idx]
-        if self.loop:
-            self.idx = (self.idx + 1) % num_response_makers
-        else:
-            self.idx = min(self.idx + 1, num_response_makers - 1)
-        return response_maker.make_response(groups)
+        idx = self.counter.advance(len(self.response_makers), self.loop)
+        return self.response_makers[idx].make_response(groups, named, encoding)
 
 
 class MockResponse:
-    def __init__(self, status: HTTPStatus, headers: dict, content: any, content_type: ContentType, interpolate: bool):
+    def __init__(self, status: HTTPStatus, headers: dict, content: any, content_type: ContentType, interpolate: bool, cache: dict = None, content_file: str = None, stream: dict = None, delay: Delay = None, throttle: dict = None):
         self.status = status
         self.headers = headers
         self.content = content
         self.content_type = content_type
         self.interpolate = interpolate
+        self.cache = cache
+        self.content_file = content_file
+        self.stream = stream
+        self.delay = delay
+        self.throttle = throttle
+
+
+class RuleTable:
+    def __init__(self, rules: OrderedDict, route_cache_size: int,
+                 compression: Compression = None):
+        self.selectors = list(rules.values())
+        self.names = [dict(cpat.groupindex) for cpat in rules]
+        self.indices = {cpat: idx for idx, cpat in enumerate(rules)}
+        self.router = Router(list(rules))
+        self.route_cache_size = route_cache_size
+        self.route_cache = LRUCache(route_cache_size)
+        self.compression = compression
+        return
+
+    def route(self, path: str, method: Method) -> tuple:
+        route_cache = self.route_cache
+        key = (path, method)
+        matched = route_cache.get(key)
+        if matched is MISSING:
+            matched = self.router.match(path)
+            route_cache.put(key, matched)
+        return matched
+
+    def rule_patterns(self) -> list:
+        return [cpat.pattern if self.selectors[idx] else None
+                for idx, cpat in enumerate(self.router.patterns)]
+
+    def add(self, pattern: Union[Pattern, PathTemplate], respsel_dict: dict):
+        self.selectors.append(respsel_dict)
+        self.names.append(dict(pattern.groupindex))
+        self.indices[pattern] = self.router.add(pattern)
+        self.route_cache = LRUCache(self.route_cache_size)
+        return
+
+    def replace(self, pattern: Union[Pattern, PathTemplate],
+                respsel_dict: dict):
+        self.selectors[self.indices[pattern]] = respsel_dict
+        return
+
+    def remove(self, pattern: Union[Pattern, PathTemplate]):
+        idx = self.indices.pop(pattern)
+        self.router.remove(idx)
+        self.route_cache = LRUCache(self.route_cache_size)
+        self.selectors[idx] = {}
+        return
 
 
 class PatternResponseGenerator(ResponseGenerator):
 
-    def __init__(self):
+    def __init__(self, route_cache_size: int = DEFAULT_ROUTE_CACHE_SIZE):
         self.rules = OrderedDict()
+        self.patterns = {}
+        self.rule_specs = {}
         self.global_headers = OrderedDict()
+        self.global_spec = None
         self.server_header = None
+        self.global_cache = None
+        self.global_throttle = None
+        self.compression = None
+        self.base_dir = None
+        self.delayed = False
+        self.route_cache_size = route_cache_size
+        self.table = None
+        self.metrics = None
+        self.admin = None
+        self.trust_spec = False
+        self.validation_processes = None
+        self.profile = None
+        self.lock = Lock()
         return
 
-    def load_spec_json(self, spec_json: str):
+    @property
+    def router(self) -> Router:
+        return self.current_table().router
+
+    @property
+    def rule_table(self) -> list:
+        return self.current_table().selectors
+
+    @property
+    def rule_names(self) -> list:
+        return self.current_table().names
+
+    @property
+    def route_cache(self) -> LRUCache:
+        return self.current_table().route_cache
+
+    def load_spec_json(self, spec_json: str, base_dir: str = None):
+        try:
+            with phase(self.profile, 'parse'):
+                spec_dict = loads(spec_json, object_pairs_hook=OrderedDict)
+            self.load_spec_dict(spec_dict, base_dir)
+        except Exception as e:
+            raise MockSpecError(f'Failed to parse JSON: {e}')
+        return
+
+    def reload_spec_json(self, spec_json: str, base_dir: str = None):
         try:
             spec_dict = loads(spec_json, object_pairs_hook=OrderedDict)
-            self.load_spec_dict(spec_dict)
+            self.reload_spec_dict(spec_dict, base_dir)
         except Exception as e:
             raise MockSpecError(f'Failed to parse JSON: {e}')
         return
 
-    def load_spec_dict(self, spec_dict: dict):
-        validate(instance=spec_dict, schema=spec_schema)
+    def reload_spec_dict(self, spec_dict: dict, base_dir: str = None):
+        fresh = PatternResponseGenerator(self.route_cache_size)
+        fresh.trust_spec = self.trust_spec
+        fresh.load_spec_dict(spec_dict, base_dir or self.base_dir, self)
+        self.restore_state(fresh.compiled_state())
+        return
+
+    def compiled_state(self) -> dict:
+        self.current_table()
+        return {name: getattr(self, name) for name in RELOADED_FIELDS}
+
+    def restore_state(self, state: dict):
+        table = state['table']
+        if table.route_cache_size != self.route_cache_size:
+            table.route_cache_size = self.route_cache_size
+            table.route_cache = LRUCache(self.route_cache_size)
+        with self.lock:
+            if self.metrics is not None:
+                self.metrics.set_patterns(table.rule_patterns())
+            for name in RELOADED_FIELDS:
+                setattr(self, name, state[name])
+        return
+
+    def load_spec_dict(self, spec_dict: dict, base_dir: str = None,
+                       previous: 'PatternResponseGenerator' = None):
+        if not self.trust_spec:
+            with phase(self.profile, 'validate'):
+                validate_spec(spec_dict, self.validation_processes,
+                              previous.list_rules() if previous else None)
+        if base_dir is not None:
+            self.base_dir = base_dir
         global_dict = spec_dict.get('global')
         if global_dict:
+            self.global_spec = global_dict
             global_headers = global_dict.get('headers')
             if global_headers:
                 check_headers(global_headers)
@@ -293,31 +485,65 @@ class PatternResponseGenerator(ResponseGenerator):
             self.server_header = global_dict.get('serverHeader')
             if self.server_header is not None and not isinstance(self.server_header, str):
                 raise MockSpecError(f'Server header must be a string if given')
+            if 'cache' in global_dict:
+                self.global_cache = global_dict['cache']
+            if 'throttle' in global_dict:
+                self.global_throttle = global_dict['throttle']
+            compression = global_dict.get('compression')
+            if compression is not None:
+                self.compression = Compression(
+                    compression.get('encodings', DEFAULT_ENCODINGS),
+                    compression.get('minSize', DEFAULT_MIN_SIZE),
+                    compression.get('level', DEFAULT_LEVEL))
         rule_dict = spec_dict.get('rules')
         if rule_dict:
-            self.load_rule_dict(rule_dict)
+            with phase(self.profile, 'compile'):
+                self.load_rule_dict(rule_dict, previous)
 
-    def load_rule_dict(self, rule_dict: OrderedDict):
+    def load_rule_dict(self, rule_dict: OrderedDict,
+                       previous: 'PatternResponseGenerator' = None):
+        reusable = previous is not None and \
+            previous.global_spec == self.global_spec and \
+            previous.base_dir == self.base_dir
         for pat, resps in rule_dict.items():
-            try:
-                cpat = re.compile(pat)
-            except:
-                raise MockSpecError(f'Failed to compile pattern {pat}')
+            cpat = previous.patterns.get(pat) if previous is not None \
+                else None
+            if cpat is None:
+                cpat = PatternResponseGenerator.compile_pattern(pat)
+            self.patterns[pat] = cpat
             for method in list(Method):
                 resp = resps.get(method.value)
                 if not resp:
                     continue
+                specs = self.rule_specs.setdefault((pat, method), [])
+                if reusable and not specs and not reads_file(resp) and \
+                        previous.rule_specs.get((pat, method)) == [resp]:
+                    self.reuse_rule(cpat, method,
+                                    previous.rules[cpat][method])
+                    specs.append(resp)
+                    continue
+                specs.append(resp)
                 try:
                     mock_response = PatternResponseGenerator.parse_mock_response(
-                        resp)
+                        resp, self.base_dir)
                 except MockSpecError as e:
                     raise MockSpecError(
                         f'Error parsing mock responses for pattern {pat} and {method.value}: {e}')
                 self.add_rule(cpat, method, mock_response)
+        self.compile_router()
         return
 
     @staticmethod
-    def parse_mock_response(resp: dict) -> MockResponse:
+    def compile_pattern(pat: str) -> Union[Pattern, PathTemplate]:
+        if is_path_template(pat):
+            return PathTemplate(pat)
+        try:
+            return re.compile(pat)
+        except:
+            raise MockSpecError(f'Failed to compile pattern {pat}')
+
+    @staticmethod
+    def parse_mock_response(resp: dict, base_dir: str = None) -> MockResponse:
         status_code = resp['status'] if 'status' in resp else 200
         try:
             status = HTTPStatus(status_code)
@@ -340,29 +566,233 @@ class PatternResponseGenerator(ResponseGenerator):
         elif not isinstance(interpolate, bool):
             raise MockSpecError(
                 f'The interpolate field must be boolean')
+        content_file = resp.get('contentFile')
+        if content_file is not None:
+            content_file = resolve_path(content_file, base_dir)
+        stream = resp.get('stream')
+        if stream is not None and 'file' in stream:
+            stream = copy(stream)
+            stream['file'] = resolve_path(stream['file'], base_dir)
         return MockResponse(status, headers, content,
-                            content_type, interpolate)
+                            content_type, interpolate, resp.get('cache'),
+                            content_file, stream, make_delay(resp.get('delay')),
+                            resp.get('throttle'))
 
-    def add_rule(self, pattern: Pattern, method: Method,
-                 mock_response: MockResponse):
+    def rule_selectors(self, pattern: Union[Pattern, PathTemplate]) -> dict:
         respsel_dict = self.rules.get(pattern)
-        if not respsel_dict:
-            respsel_dict = {method: ResponseSelector(loop=False)
-                            for method in list(Method)}
-            self.rules[pattern] = respsel_dict
-        respsel_dict[method].add_response_maker(
-            ResponseMaker(mock_response.status, mock_response.headers,
-                          mock_response.content, mock_response.content_type,
-                          mock_response.interpolate, self.global_headers))
+        if respsel_dict is None:
+            respsel_dict = self.rules[pattern] = {}
+            self.table = None
+        return respsel_dict
 
-    def respond(self, request: Request) -> Response:
-        for cpat, respsel_dict in self.rules.items():
-            match = cpat.fullmatch(request.path)
-            if match:
-                respsel = respsel_dict.get(request.method)
-                if respsel:
-                    resp = respsel.make_response(match.groups())
-                    return resp
+    def reuse_rule(self, pattern: Union[Pattern, PathTemplate], method: Method,
+                   respsel: ResponseSelector):
+        self.rule_selectors(pattern)[method] = respsel
+        if any(maker.delay is not None for maker in respsel.response_makers):
+            self.delayed = True
+        return
+
+    def add_rule(self, pattern: Union[Pattern, PathTemplate], method: Method,
+                 mock_response: MockResponse):
+        respsel_dict = self.rule_selectors(pattern)
+        respsel = respsel_dict.get(method)
+        if respsel is None:
+            respsel = respsel_dict[method] = ResponseSelector(loop=False)
+        respsel.add_response_maker(self.make_response_maker(mock_response))
+        if mock_response.delay is not None:
+            self.delayed = True
+
+    def make_response_maker(self, mock_response: MockResponse) -> ResponseMaker:
+        return ResponseMaker(mock_response.status, mock_response.headers,
+                             mock_response.content, mock_response.content_type,
+                             mock_response.interpolate, self.global_headers,
+                             mock_response.cache
+                             if mock_response.cache is not None
+                             else self.global_cache, self.compression,
+                             mock_response.content_file, mock_response.stream,
+                             mock_response.delay,
+                             make_throttle(mock_response.throttle
+                                           if mock_response.throttle is not None
+                                           else self.global_throttle))
+
+    def put_rules(self, rule_dict: dict):
+        error = document_error({'rules': rule_dict})
+        for rule in rule_dict.items():
+            if error is not None:
+                break
+            error = rule_error(rule)
+        if error is not None:
+            raise MockSpecError(error)
+        built = []
+        for pat, resps in rule_dict.items():
+            cpat = self.patterns.get(pat)
+            if cpat is None:
+                cpat = PatternResponseGenerator.compile_pattern(pat)
+            respsel_dict = {}
+            for method in list(Method):
+                resp = resps.get(method.value)
+                if not resp:
+                    continue
+                try:
+                    mock_response = PatternResponseGenerator.parse_mock_response(
+                        resp, self.base_dir)
+                except MockSpecError as e:
+                    raise MockSpecError(
+                        f'Error parsing mock responses for pattern {pat} and {method.value}: {e}')
+                respsel_dict[method] = ResponseSelector(loop=False)
+                respsel_dict[method].add_response_maker(
+                    self.make_response_maker(mock_response))
+                if mock_response.delay is not None:
+                    self.delayed = True
+            built.append((pat, cpat, resps, respsel_dict))
+        with self.lock:
+            table = self.table
+            if table is None:
+                self.compile_router()
+                table = self.table
+            for pat, cpat, resps, respsel_dict in built:
+                if not respsel_dict:
+                    if cpat in table.indices:
+                        table.remove(cpat)
+                    self.rules.pop(cpat, None)
+                elif cpat in table.indices:
+                    table.replace(cpat, respsel_dict)
+                    self.rules[cpat] = respsel_dict
                 else:
-                    break
+                    table.add(cpat, respsel_dict)
+                    self.rules[cpat] = respsel_dict
+                self.patterns[pat] = cpat
+                for method in list(Method):
+                    resp = resps.get(method.value)
+                    if resp:
+                        self.rule_specs[(pat, method)] = [resp]
+                    else:
+                        self.rule_specs.pop((pat, method), None)
+            if self.metrics is not None:
+                self.metrics.set_patterns(table.rule_patterns())
+        return
+
+    def delete_rules(self, patterns: list):
+        patterns = list(OrderedDict.fromkeys(patterns))
+        with self.lock:
+            missing = [pat for pat in patterns if pat not in self.patterns]
+            if missing:
+                raise MockSpecError(f'Rules not found: {", ".join(missing)}')
+            table = self.table
+            if table is None:
+                self.compile_router()
+                table = self.table
+            for pat in patterns:
+                cpat = self.patterns.pop(pat)
+                if cpat in table.indices:
+                    table.remove(cpat)
+                self.rules.pop(cpat, None)
+                for method in list(Method):
+                    self.rule_specs.pop((pat, method), None)
+            if self.metrics is not None:
+                self.metrics.set_patterns(table.rule_patterns())
+        return
+
+    def list_rules(self) -> OrderedDict:
+        rule_dict = OrderedDict()
+        for pat in self.patterns:
+            resps = OrderedDict()
+            for method in list(Method):
+                specs = self.rule_specs.get((pat, method))
+                if specs:
+                    resps[method.value] = specs[-1]
+            rule_dict[pat] = resps
+        return rule_dict
+
+    def set_global_headers(self, headers: dict):
+        error = document_error({'global': {'headers': headers}})
+        if error is not None:
+            raise MockSpecError(error)
+        check_headers(headers)
+        global_spec = OrderedDict(self.global_spec or {})
+        global_spec['headers'] = headers
+        self.global_spec = global_spec
+        self.global_headers = OrderedDict(headers)
+        self.put_rules(self.list_rules())
+        return
+
+    def compile_router(self):
+        table = RuleTable(self.rules, self.route_cache_size, self.compression)
+        if self.metrics is not None:
+            self.metrics.set_patterns(self.rule_patterns())
+        self.table = table
+        return
+
+    def current_table(self) -> 'RuleTable':
+        if self.table is None:
+            with self.lock:
+                if self.table is None:
+                    self.compile_router()
+        return self.table
+
+    def rule_patterns(self) -> list:
+        return [cpat.pattern for cpat in self.rules]
+
+    def enable_metrics(self):
+        if self.metrics is None:
+            self.metrics = Metrics(self.rule_patterns())
+        return
+
+    def enable_admin(self):
+        if self.admin is None:
+            self.admin = AdminAPI(self)
+        return
+
+    def share_counters(self):
+        self.current_table()
+        methods = list(Method)
+        counters = SharedCounters(len(self.rule_table) * len(methods))
+        for idx, respsel_dict in enumerate(self.rule_table):
+            for i, method in enumerate(methods):
+                respsel = respsel_dict.get(method)
+                if respsel is None:
+                    continue
+                respsel.counter = counters.counter(
+                    idx * len(methods) + i, respsel.counter.value)
+        if self.metrics is not None:
+            self.metrics.share()
+        return
+
+    def respond_reserved(self, request: Request) -> Response:
+        if self.metrics is not None and request.path == METRICS_PATH:
+            return Response(HTTPStatus.OK,
+                            {'Content-Type': METRICS_CONTENT_TYPE},
+                            self.metrics.render())
+        if self.admin is not None and request.path.startswith(ADMIN_PATH):
+            return self.admin.respond(request)
+        return None
+
+    def respond(self, request: Request) -> Response:
+        table = self.table
+        if table is None:
+            table = self.current_table()
+        metrics = self.metrics
+        if request.path.startswith(RESERVED_PREFIX):
+            reserved = self.respond_reserved(request)
+            if reserved is not None:
+                return reserved
+        matched = table.route(request.path, request.method)
+        if matched:
+            idx, groups = matched
+            respsel = table.selectors[idx].get(request.method)
+            if respsel:
+                if metrics is not None and respsel.response_makers:
+                    metrics.hit(idx, request.method)
+                elif metrics is not None:
+                    metrics.miss(request.method)
+                names = table.names[idx]
+                named = {name: groups[i - 1] for name, i in names.items()} \
+                    if names else None
+                encoding = None
+                if table.compression is not None:
+                    encoding = table.compression.negotiate(
+                        request.headers.get('Accept-Encoding'))
+                return respsel.make_response(groups, named, encoding)
+        if metrics is not None:
+            metrics.miss(request.method)
         return Response(HTTPStatus.NOT_FOUND, {}, b'')
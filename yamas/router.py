@@ -0,0 +1,517 @@
+# coding=utf-8
+# Copyright 2019 YAM AI Machinery Limited
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import re
+from itertools import chain
+from typing import List, Optional, Pattern, Tuple, Union
+from yamas.ex import MockSpecError
+
+CHUNK_SIZE = 20
+
+# Patterns referring to their own groups by number or by name cannot be
+# renumbered into a combined alternation, so they are matched on their own.
+SELF_REFERENCE = re.compile(r'\\[1-9]|\\g<|\(\?P=|\(\?\(')
+
+METACHARS = '.^$*+?{}[]|()'
+OPTIONAL_QUANTIFIERS = '*?{'
+
+TEMPLATE_PARAM = re.compile(r'\{([A-Za-z_]\w*)(?::(\w+))?\}')
+TEMPLATE_LITERAL = re.compile(r'[^{}^$*+?()\[\]|\\]*')
+DIGITS = '0123456789'
+
+
+def is_combinable(cpat: Pattern) -> bool:
+    if cpat.flags & ~re.UNICODE:
+        return False
+    if cpat.groupindex:
+        return False
+    return SELF_REFERENCE.search(cpat.pattern) is None
+
+
+def has_top_level_alternation(pat: str) -> bool:
+    depth = 0
+    in_class = False
+    i = 0
+    while i < len(pat):
+        c = pat[i]
+        if c == '\\':
+            i += 2
+            continue
+        if in_class:
+            if c == ']':
+                in_class = False
+        elif c == '[':
+            in_class = True
+            if pat[i + 1:i + 2] == ']':
+                i += 1
+        elif c == '(':
+            depth += 1
+        elif c == ')':
+            depth -= 1
+        elif c == '|' and depth == 0:
+            return True
+        i += 1
+    return False
+
+
+def literal_prefix(cpat: Pattern) -> str:
+    if cpat.flags & ~re.UNICODE:
+        return ''
+    pat = cpat.pattern
+    if has_top_level_alternation(pat):
+        return ''
+    if pat.startswith('^'):
+        i = 1
+    elif pat.startswith('\\A'):
+        i = 2
+    else:
+        i = 0
+    prefix = []
+    while i < len(pat):
+        c = pat[i]
+        if c == '\\':
+            escaped = pat[i + 1:i + 2]
+            if not escaped or escaped.isalnum():
+                break
+            c = escaped
+            i += 2
+        elif c in METACHARS:
+            break
+        else:
+            i += 1
+        follower = pat[i:i + 1]
+        if follower and follower in OPTIONAL_QUANTIFIERS:
+            break
+        prefix.append(c)
+        if follower == '+':
+            break
+    return ''.join(prefix)
+
+
+class TrieNode:
+    def __init__(self):
+        self.children = {}
+        self.entries = {}
+        self.lengths = []
+        self.routers = {}
+
+
+class PrefixTrie:
+    def __init__(self, chunk_size: int = CHUNK_SIZE):
+        self.root = TrieNode()
+        self.chunk_size = chunk_size
+        self.built = False
+
+    def insert(self, prefix: str, idx: int, cpat: Pattern = None):
+        segments = prefix.split('/')
+        node = self.root
+        for segment in segments[:-1]:
+            child = node.children.get(segment)
+            if child is None:
+                child = node.children[segment] = TrieNode()
+            node = child
+        partial = segments[-1]
+        rules = node.entries.get(partial)
+        if rules is None:
+            rules = node.entries[partial] = []
+            node.lengths = sorted(set(node.lengths) | {len(partial)})
+        rules.append((idx, cpat))
+        if self.built:
+            router = node.routers.get(partial)
+            if router is None:
+                node.routers[partial] = RegexRouter(
+                    [(idx, cpat)], self.chunk_size)
+            else:
+                router.add(idx, cpat)
+        return
+
+    def build(self):
+        nodes = [self.root]
+        while nodes:
+            node = nodes.pop()
+            node.routers = {
+                partial: RegexRouter(sorted(rules, key=lambda rule: rule[0]),
+                                     self.chunk_size)
+                for partial, rules in node.entries.items()
+            }
+            nodes.extend(node.children.values())
+        self.built = True
+        return
+
+    def remove(self, prefix: str, idx: int):
+        segments = prefix.split('/')
+        node = self.root
+        for segment in segments[:-1]:
+            node = node.children.get(segment)
+            if node is None:
+                return
+        partial = segments[-1]
+        rules = [rule for rule in node.entries.get(partial, ())
+                 if rule[0] != idx]
+        if rules:
+            node.entries[partial] = rules
+            if self.built:
+                node.routers[partial].remove(idx)
+            return
+        node.routers.pop(partial, None)
+        if node.entries.pop(partial, None) is not None:
+            node.lengths = sorted(set(map(len, node.entries)))
+        return
+
+    def nodes(self, path: str):
+        segments = path.split('/')
+        last = len(segments) - 1
+        node = self.root
+        for depth, segment in enumerate(segments):
+            yield node, segment
+            if depth == last:
+                return
+            node = node.children.get(segment)
+            if node is None:
+                return
+
+    def candidates(self, path: str) -> List[int]:
+        found = []
+        for node, segment in self.nodes(path):
+            for partial, rules in node.entries.items():
+                if segment.startswith(partial):
+                    found.extend(idx for idx, _ in rules)
+        found.sort()
+        return found
+
+    def routers(self, path: str):
+        for node, segment in self.nodes(path):
+            for length in node.lengths:
+                if length > len(segment):
+                    break
+                router = node.routers.get(segment[:length])
+                if router is not None:
+                    yield router
+
+
+def is_path_template(pat: str) -> bool:
+    if not pat.startswith('/'):
+        return False
+    has_param = False
+    for segment in pat[1:].split('/'):
+        if TEMPLATE_PARAM.fullmatch(segment):
+            has_param = True
+        elif not TEMPLATE_LITERAL.fullmatch(segment):
+            return False
+    return has_param
+
+
+class PathTemplate:
+    param_types = ('str', 'int')
+
+    def __init__(self, pattern: str):
+        self.pattern = pattern
+        self.segments = []
+        self.names = []
+        for segment in pattern[1:].split('/'):
+            param = TEMPLATE_PARAM.fullmatch(segment)
+            if not param:
+                self.segments.append((None, segment))
+                continue
+            name, param_type = param.group(1), param.group(2) or 'str'
+            if param_type not in self.param_types:
+                raise MockSpecError(
+                    f'Unsupported parameter type {param_type} in {pattern}')
+            if name in self.names:
+                raise MockSpecError(
+                    f'Duplicate parameter {name} in {pattern}')
+            self.segments.append((param_type, name))
+            self.names.append(name)
+        self.groups = len(self.names)
+        self.groupindex = {name: i + 1 for i, name in enumerate(self.names)}
+        return
+
+    def __eq__(self, other):
+        return isinstance(other, PathTemplate) and self.pattern == other.pattern
+
+    def __hash__(self):
+        return hash((PathTemplate, self.pattern))
+
+    def __repr__(self):
+        return f'PathTemplate({self.pattern!r})'
+
+
+def match_param(param_type: str, segment: str) -> bool:
+    if param_type == 'int':
+        return segment != '' and segment.strip(DIGITS) == ''
+    return segment != ''
+
+
+class SegmentNode:
+    def __init__(self):
+        self.literals = {}
+        self.params = []
+        self.rules = []
+        self.min_idx = None
+
+
+class SegmentTree:
+    def __init__(self):
+        self.root = SegmentNode()
+
+    def insert(self, template: PathTemplate, idx: int):
+        node = self.root
+        nodes = [node]
+        for param_type, value in template.segments:
+            if param_type is None:
+                child = node.literals.get(value)
+                if child is None:
+                    child = node.literals[value] = SegmentNode()
+            else:
+                child = None
+                for kind, param_node in node.params:
+                    if kind == param_type:
+                        child = param_node
+                        break
+                if child is None:
+                    child = SegmentNode()
+                    node.params.append((param_type, child))
+            node = child
+            nodes.append(node)
+        node.rules.append(idx)
+        node.rules.sort()
+        for node in nodes:
+            if node.min_idx is None or idx < node.min_idx:
+                node.min_idx = idx
+        return
+
+    def remove(self, template: PathTemplate, idx: int):
+        node = self.root
+        nodes = [node]
+        for param_type, value in template.segments:
+            if param_type is None:
+                node = node.literals.get(value)
+            else:
+                node = next((child for kind, child in node.params
+                             if kind == param_type), None)
+            if node is None:
+                return
+            nodes.append(node)
+        node.rules = [rule for rule in node.rules if rule != idx]
+        for node in reversed(nodes):
+            children = list(node.literals.values()) + \
+                [child for _, child in node.params]
+            indices = [child.min_idx for child in children
+                       if child.min_idx is not None]
+            if node.rules:
+                indices.append(node.rules[0])
+            node.min_idx = min(indices) if indices else None
+        return
+
+    def match(self, path: str) -> Optional[Tuple[int, tuple]]:
+        if not path.startswith('/'):
+            return None
+        best = [None, None]
+        self.visit(self.root, path[1:].split('/'), 0, [], best)
+        if best[0] is None:
+            return None
+        return best[0], tuple(best[1])
+
+    def visit(self, node: SegmentNode, segments: List[str], depth: int,
+              values: List[str], best: list):
+        if node.min_idx is None or \
+                (best[0] is not None and node.min_idx >= best[0]):
+            return
+        if depth == len(segments):
+            if node.rules and (best[0] is None or node.rules[0] < best[0]):
+                best[0], best[1] = node.rules[0], list(values)
+            return
+        segment = segments[depth]
+        child = node.literals.get(segment)
+        if child is not None:
+            self.visit(child, segments, depth + 1, values, best)
+        for param_type, child in node.params:
+            if match_param(param_type, segment):
+                values.append(segment)
+                self.visit(child, segments, depth + 1, values, best)
+                values.pop()
+        return
+
+
+class RegexChunk:
+    def __init__(self, rules: List[Tuple[int, Pattern]]):
+        self.rules = rules
+        self.slots = {}
+        sources = []
+        group = 1
+        for idx, cpat in rules:
+            self.slots[group] = (idx, group, group + cpat.groups)
+            sources.append(f'({cpat.pattern})')
+            group += cpat.groups + 1
+        self.cpat = re.compile('|'.join(sources))
+        self.first = rules[0][0]
+
+    def match(self, path: str) -> Optional[Tuple[int, tuple]]:
+        match = self.cpat.fullmatch(path)
+        if not match:
+            return None
+        idx, start, end = self.slots[match.lastindex]
+        return idx, match.groups()[start:end]
+
+
+class SingleRegex:
+    def __init__(self, idx: int, cpat: Pattern):
+        self.idx = idx
+        self.first = idx
+        self.cpat = cpat
+
+    def match(self, path: str) -> Optional[Tuple[int, tuple]]:
+        match = self.cpat.fullmatch(path)
+        if not match:
+            return None
+        return self.idx, match.groups()
+
+
+class RegexRouter:
+    def __init__(self, rules: List[Tuple[int, Pattern]],
+                 chunk_size: int = CHUNK_SIZE):
+        self.chunk_size = chunk_size
+        self.chunks = []
+        pending = []
+        for idx, cpat in rules:
+            if is_combinable(cpat):
+                pending.append((idx, cpat))
+                if len(pending) >= chunk_size:
+                    self.add_chunk(pending)
+                    pending = []
+                continue
+            self.add_chunk(pending)
+            pending = []
+            self.chunks.append(SingleRegex(idx, cpat))
+        self.add_chunk(pending)
+        return
+
+    def add_chunk(self, rules: List[Tuple[int, Pattern]]):
+        if not rules:
+            return
+        if len(rules) == 1:
+            self.chunks.append(SingleRegex(*rules[0]))
+            return
+        try:
+            self.chunks.append(RegexChunk(rules))
+        except re.error:
+            for idx, cpat in rules:
+                self.chunks.append(SingleRegex(idx, cpat))
+        return
+
+    def add(self, idx: int, cpat: Pattern):
+        if not is_combinable(cpat):
+            self.chunks.append(SingleRegex(idx, cpat))
+            return
+        last = self.chunks[-1] if self.chunks else None
+        if isinstance(last, RegexChunk):
+            rules = last.rules
+        elif isinstance(last, SingleRegex) and is_combinable(last.cpat):
+            rules = [(last.idx, last.cpat)]
+        else:
+            rules = None
+        if rules is not None and len(rules) < self.chunk_size:
+            try:
+                self.chunks[-1] = RegexChunk(rules + [(idx, cpat)])
+                return
+            except re.error:
+                pass
+        self.add_chunk([(idx, cpat)])
+        return
+
+    def remove(self, idx: int):
+        chunks = []
+        for chunk in self.chunks:
+            if isinstance(chunk, SingleRegex):
+                if chunk.idx != idx:
+                    chunks.append(chunk)
+                continue
+            rules = [rule for rule in chunk.rules if rule[0] != idx]
+            if len(rules) == len(chunk.rules):
+                chunks.append(chunk)
+            elif len(rules) == 1:
+                chunks.append(SingleRegex(*rules[0]))
+            elif rules:
+                chunks.append(RegexChunk(rules))
+        self.chunks = chunks
+        return
+
+    def match(self, path: str,
+              limit: int = None) -> Optional[Tuple[int, tuple]]:
+        for chunk in self.chunks:
+            if limit is not None and chunk.first >= limit:
+                return None
+            matched = chunk.match(path)
+            if matched:
+                if limit is not None and matched[0] >= limit:
+                    return None
+                return matched
+        return None
+
+
+class Router:
+    def __init__(self, patterns: List[Union[Pattern, PathTemplate]],
+                 chunk_size: int = CHUNK_SIZE):
+        self.patterns = patterns
+        self.trie = PrefixTrie(chunk_size)
+        self.templates = SegmentTree()
+        fallback = []
+        for idx, cpat in enumerate(patterns):
+            if isinstance(cpat, PathTemplate):
+                self.templates.insert(cpat, idx)
+                continue
+            prefix = literal_prefix(cpat)
+            if prefix:
+                self.trie.insert(prefix, idx, cpat)
+            else:
+                fallback.append((idx, cpat))
+        self.trie.build()
+        self.fallback = RegexRouter(fallback, chunk_size)
+        return
+
+    def add(self, cpat: Union[Pattern, PathTemplate]) -> int:
+        idx = len(self.patterns)
+        self.patterns.append(cpat)
+        if isinstance(cpat, PathTemplate):
+            self.templates.insert(cpat, idx)
+            return idx
+        prefix = literal_prefix(cpat)
+        if prefix:
+            self.trie.insert(prefix, idx, cpat)
+        else:
+            self.fallback.add(idx, cpat)
+        return idx
+
+    def remove(self, idx: int):
+        cpat = self.patterns[idx]
+        if isinstance(cpat, PathTemplate):
+            self.templates.remove(cpat, idx)
+            return
+        prefix = literal_prefix(cpat)
+        if prefix:
+            self.trie.remove(prefix, idx)
+        else:
+            self.fallback.remove(idx)
+        return
+
+    def match(self, path: str) -> Optional[Tuple[int, tuple]]:
+        matched = self.templates.match(path)
+        limit = matched[0] if matched else None
+        for router in chain((self.fallback,), self.trie.routers(path)):
+            found = router.match(path, limit)
+            if found:
+                matched = found
+                limit = found[0]
+        return matched
@@ -0,0 +1,306 @@
+# coding=utf-8
+# Copyright 2019 YAM AI Machinery Limited
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from copy import deepcopy
+from functools import lru_cache
+from yamas.reqresp import Method
+from yamas.compression import ENCODINGS
+from yamas.ex import MockSpecError
+
+cache_schema = {
+    'description': 'LRU cache of rendered interpolated responses',
+    'type': 'object',
+    'properties': {
+        'maxEntries': {
+            'description': 'Maximum number of cached responses',
+            'type': 'integer',
+            'minimum': 0
+        },
+        'maxBytes': {
+            'description': 'Maximum total size of cached content in bytes',
+            'type': 'integer',
+            'minimum': 0
+        }
+    },
+    'additionalProperties': False
+}
+
+throttle_schema = {
+    'description': 'Bandwidth and time-to-first-byte shaping',
+    'type': 'object',
+    'properties': {
+        'bytesPerSecond': {
+            'description': 'Maximum transfer rate of the response',
+            'type': 'integer',
+            'minimum': 1
+        },
+        'ttfb': {
+            'description': 'Time to the first byte of the response in milliseconds',
+            'type': 'number',
+            'minimum': 0
+        }
+    },
+    'additionalProperties': False
+}
+
+rule_schema = {
+    'description': 'Mock response per HTTP method',
+    'type': 'object',
+    'propertyNames': {
+        'description': 'HTTP method',
+        'enum': [x.value for x in list(Method)]
+    },
+    'patternProperties': {
+        '[A-Z]+': {
+            'description': 'Mock response',
+            'type': 'object',
+            'properties': {
+                'status': {
+                    'description': 'HTTP response status code',
+                    'type': 'integer',
+                    'minimum': 100,
+                    'maximum': 599
+                },
+                'headers': {
+                    'description': 'HTTP response headers',
+                    'type': 'object',
+                    'propertyNames': {
+                        'description': 'HTTP header name',
+                        'pattern': '^.+$'
+                    },
+                    'patternProperties': {
+                        '^.+$': {
+                            'description': 'HTTP header value',
+                            'type': 'string'
+                        }
+                    },
+                    'additionalProperties': False
+                },
+                'interpolate': {
+                    'description': 'Whether interpolation is applied',
+                    'type': 'boolean'
+                },
+                'content': {
+                    'description': 'String or JSON response content'
+                },
+                'contentFile': {
+                    'description': 'Path of the file served as response content',
+                    'type': 'string',
+                    'minLength': 1
+                },
+                'delay': {
+                    'description': 'Response delay in milliseconds',
+                    'oneOf': [
+                        {
+                            'description': 'Fixed delay',
+                            'type': 'number',
+                            'minimum': 0
+                        },
+                        {
+                            'description': 'Uniformly distributed delay',
+                            'type': 'object',
+                            'properties': {
+                                'min': {'type': 'number', 'minimum': 0},
+                                'max': {'type': 'number', 'minimum': 0}
+                            },
+                            'required': ['min', 'max'],
+                            'additionalProperties': False
+                        },
+                        {
+                            'description': 'Lognormally distributed delay',
+                            'type': 'object',
+                            'properties': {
+                                'p50': {'type': 'number', 'exclusiveMinimum': 0},
+                                'p99': {'type': 'number', 'exclusiveMinimum': 0}
+                            },
+                            'required': ['p50', 'p99'],
+                            'additionalProperties': False
+                        }
+                    ]
+                },
+                'stream': {
+                    'description': 'Content streamed with chunked transfer coding',
+                    'type': 'object',
+                    'properties': {
+                        'file': {
+                            'description': 'Path of the file streamed line by line',
+                            'type': 'string',
+                            'minLength': 1
+                        },
+                        'record': {
+                            'description': 'String or JSON record streamed repeatedly'
+                        },
+                        'count': {
+                            'description': 'Number of records, endless if omitted',
+                            'type': 'integer',
+                            'minimum': 0
+                        }
+                    },
+                    'additionalProperties': False
+                },
+                'cache': cache_schema,
+                'throttle': throttle_schema
+            }
+        }
+    }
+}
+
+spec_schema = {
+    'title': 'Yamas Specification',
+    'description': 'Specification on mock response data for Yamas',
+    'type': 'object',
+    'properties': {
+        'global': {
+            'description': 'Global parameters',
+            'type': 'object',
+            'properties': {
+                'headers': {
+                    'description': 'Default HTTP headers',
+                    'type': 'object',
+                    'propertyNames': {
+                        'description': 'HTTP header name',
+                        'pattern': '^.+$'
+                    },
+                    'patternProperties': {
+                        '^.+$': {
+                            'description': 'HTTP header value',
+                            'type': 'string'
+                        }
+                    },
+                    'additionalProperties': False
+                },
+                'serverHeader': {
+                    'description': 'Server header',
+                    'type': 'string',
+                    'minLength': 1
+                },
+                'cache': cache_schema,
+                'throttle': throttle_schema,
+                'compression': {
+                    'description': 'Compression of response content',
+                    'type': 'object',
+                    'properties': {
+                        'encodings': {
+                            'description': 'Content codings in order of preference',
+                            'type': 'array',
+                            'items': {'enum': list(ENCODINGS)},
+                            'minItems': 1,
+                            'uniqueItems': True
+                        },
+                        'minSize': {
+                            'description': 'Minimum content size in bytes to compress',
+                            'type': 'integer',
+                            'minimum': 0
+                        },
+                        'level': {
+                            'description': 'Compression level',
+                            'type': 'integer',
+                            'minimum': 1,
+                            'maximum': 9
+                        }
+                    },
+                    'additionalProperties': False
+                }
+            }
+        },
+        'rules': {
+            'description': 'Rules of URL path patterns',
+            'type': 'object',
+            'propertyNames': {
+                'pattern': '^.+$'
+            },
+            'patternProperties': {
+                '^.+$': rule_schema
+            }
+        }
+    },
+    'additionalProperties': False
+}
+
+
+document_schema = deepcopy(spec_schema)
+document_schema['properties']['rules']['patternProperties']['^.+$'] = {
+    'type': 'object'
+}
+
+
+def make_validator(schema: dict):
+    from jsonschema.validators import validator_for
+    cls = validator_for(schema)
+    cls.check_schema(schema)
+    return cls(schema)
+
+
+@lru_cache(maxsize=None)
+def document_validator():
+    return make_validator(document_schema)
+
+
+@lru_cache(maxsize=None)
+def rule_validator():
+    return make_validator(rule_schema)
+
+
+def first_error(validator, instance: any):
+    from jsonschema.exceptions import best_match
+    return best_match(validator.iter_errors(instance))
+
+
+def error_location(error) -> str:
+    return ''.join(f'[{part!r}]' for part in error.absolute_path)
+
+
+def document_error(spec_dict: dict) -> str:
+    error = first_error(document_validator(), spec_dict)
+    if error is None:
+        return None
+    return f'Invalid spec at {error_location(error) or "top level"}: ' \
+        f'{error.message}'
+
+
+def rule_error(rule: tuple) -> str:
+    key, resps = rule
+    error = first_error(rule_validator(), resps)
+    if error is None:
+        return None
+    return f'Invalid rule {key}{error_location(error)}: {error.message}'
+
+
+def validation_processes(rules: int, processes: int = None) -> int:
+    return max(1, min(processes or 1, rules))
+
+
+def validate_spec(spec_dict: dict, processes: int = None,
+                  validated: dict = None):
+    error = document_error(spec_dict)
+    if error is not None:
+        raise MockSpecError(error)
+    validated = validated or {}
+    rules = [(key, resps)
+             for key, resps in (spec_dict.get('rules') or {}).items()
+             if key not in validated or dict(validated[key]) != dict(resps)]
+    workers = validation_processes(len(rules), processes)
+    if workers > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(workers) as pool:
+            errors = pool.map(rule_error, rules,
+                              chunksize=-(-len(rules) // (workers * 4)))
+            error = next((e for e in errors if e is not None), None)
+    else:
+        error = next((e for e in map(rule_error, rules) if e is not None),
+                     None)
+    if error is not None:
+        raise MockSpecError(error)
+    return
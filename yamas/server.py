@@ -13,19 +13,101 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import signal
+import socket
+from os import path
 from http.server import HTTPServer, HTTPStatus
-from typing import Callable
-from yamas.respgen import Method, ResponseGenerator, PatternResponseGenerator
+from queue import Queue
+from threading import Lock, Thread
+from typing import Callable, TYPE_CHECKING
+from yamas.respgen import Method, ResponseGenerator, \
+    PatternResponseGenerator, DEFAULT_ROUTE_CACHE_SIZE
 from yamas.handler import MockRequestHandler
+from yamas.prefork import PreforkServer, bind_socket, LISTEN_BACKLOG
+from yamas.watcher import SpecWatcher
 from yamas.ex import MockSpecError, ServerError
-from yamas.config import VERSION, SERVER_NAME
+from yamas.reqresp import server_line
+from yamas.config import VERSION, SERVER_NAME, DEFAULT_IDLE_TIMEOUT
+from yamas.startup import StartupProfile, phase
+
+if TYPE_CHECKING:
+    from yamas.aioserver import AsyncMockServer
+
+
+ENGINES = ('http', 'asyncio')
+DELAY_THREADS = 128
+
+
+class MockHTTPServer(HTTPServer):
+    request_queue_size = LISTEN_BACKLOG
+
+    def __init__(self, server_address: tuple, handler_class: Callable,
+                 bind_and_activate: bool = True):
+        super().__init__(server_address, handler_class, bind_and_activate)
+        self.detached = set()
+        return
+
+    def detach(self, request: socket.socket):
+        self.detached.add(request)
+        return
+
+    def shutdown_request(self, request: socket.socket):
+        if request in self.detached:
+            self.detached.discard(request)
+            return
+        super().shutdown_request(request)
+        return
+
+
+class PooledHTTPServer(MockHTTPServer):
+
+    def __init__(self, server_address: tuple, handler_class: Callable,
+                 threads: int, bind_and_activate: bool = True):
+        super().__init__(server_address, handler_class, bind_and_activate)
+        self.pending = Queue(threads)
+        self.idle = 0
+        self.idle_lock = Lock()
+        for i in range(threads):
+            worker = Thread(target=self.serve_pending,
+                            name=f'yamas-worker-{i}')
+            worker.daemon = True
+            worker.start()
+        return
+
+    def process_request(self, request, client_address):
+        self.pending.put((request, client_address))
+        return
+
+    def busy(self) -> bool:
+        return self.pending.qsize() > self.idle
+
+    def serve_pending(self):
+        while True:
+            with self.idle_lock:
+                self.idle += 1
+            request, client_address = self.pending.get()
+            with self.idle_lock:
+                self.idle -= 1
+            try:
+                self.finish_request(request, client_address)
+            except Exception:
+                self.handle_error(request, client_address)
+            finally:
+                self.shutdown_request(request)
 
 
 class Yamas:
 
     @staticmethod
-    def make_handler_class(name: str, respgen: ResponseGenerator) -> Callable:
-        handler_class = type(name, (MockRequestHandler,), {'respgen': respgen})
+    def make_handler_class(name: str, respgen: ResponseGenerator,
+                           keep_alive: bool = True,
+                           idle_timeout: float = None) -> Callable:
+        handler_class = type(name, (MockRequestHandler,), {
+            'respgen': respgen,
+            'keep_alive': keep_alive,
+            'timeout': idle_timeout,
+            'server_line': server_line(Yamas.server_version(respgen))
+        })
         if respgen.server_header:
             handler_class.server_version = ''
             handler_class.sys_version = respgen.server_header
@@ -34,32 +116,178 @@ class Yamas:
             handler_class.sys_version = VERSION
         return handler_class
 
-    def __init__(self):
-        self.respgen = PatternResponseGenerator()
+    @staticmethod
+    def server_version(respgen: ResponseGenerator) -> str:
+        if respgen.server_header:
+            return respgen.server_header
+        return f'{SERVER_NAME} {VERSION}'
+
+    def __init__(self, route_cache_size: int = DEFAULT_ROUTE_CACHE_SIZE,
+                 idle_timeout: float = DEFAULT_IDLE_TIMEOUT,
+                 metrics: bool = False, admin: bool = False,
+                 trust_spec: bool = False, validation_processes: int = None,
+                 profile: StartupProfile = None):
+        self.respgen = PatternResponseGenerator(route_cache_size)
+        self.respgen.profile = profile
+        self.respgen.trust_spec = trust_spec
+        self.respgen.validation_processes = validation_processes
         self.server_header = None
+        self.idle_timeout = idle_timeout
+        self.spec_file = None
+        self.watcher = None
+        self.profile = profile
+        if metrics:
+            self.respgen.enable_metrics()
+        if admin:
+            self.respgen.enable_admin()
         return
 
-    def load_file(self, spec_file: str):
+    def route_cache_stats(self) -> dict:
+        return self.respgen.route_cache.stats()
+
+    def load_file(self, spec_file: str, cache_dir: str = None):
         with open(spec_file, 'r') as f:
             spec_json = f.read()
-        self.load_json(spec_json)
+        base_dir = path.dirname(path.abspath(spec_file))
+        if cache_dir is None:
+            self.load_json(spec_json, base_dir)
+        else:
+            self.load_cached(spec_json, base_dir, cache_dir)
+        with phase(self.profile, 'compile'):
+            self.respgen.current_table()
+        self.spec_file = spec_file
         return
 
-    def load_json(self, spec_json: str):
-        self.respgen.load_spec_json(spec_json)
+    def load_cached(self, spec_json: str, base_dir: str, cache_dir: str):
+        from yamas.speccache import SpecCache
+        spec_cache = SpecCache(cache_dir)
+        with phase(self.profile, 'cache'):
+            key = spec_cache.key(spec_json, base_dir)
+            state = spec_cache.load(key)
+            if state is not None:
+                self.respgen.restore_state(state)
+                return
+        self.load_json(spec_json, base_dir)
+        with phase(self.profile, 'compile'):
+            self.respgen.current_table()
+        with phase(self.profile, 'cache'):
+            spec_cache.store(key, self.respgen.compiled_state())
+        return
+
+    def reload_file(self):
+        with open(self.spec_file, 'r') as f:
+            spec_json = f.read()
+        self.respgen.reload_spec_json(
+            spec_json, path.dirname(path.abspath(self.spec_file)))
+        return
+
+    def watch(self, interval: float = None):
+        if self.spec_file is None:
+            raise ServerError('Watching requires a spec file')
+        self.watcher = SpecWatcher(self.spec_file, self.reload_file, interval)
+        self.watcher.start()
+        return
+
+    def load_json(self, spec_json: str, base_dir: str = None):
+        self.respgen.load_spec_json(spec_json, base_dir)
 
     def load_dict(self, spec_dict: dict):
         self.respgen.load_spec_dict(spec_dict)
         self.server_header = self.respgen.server_header
         return
 
-    def run(self, ip: str, port: int):
-        server_address = (ip, port)
+    def put_rules(self, rule_dict: dict):
+        self.respgen.put_rules(rule_dict)
+        return
+
+    def delete_rules(self, patterns: list):
+        self.respgen.delete_rules(patterns)
+        return
+
+    def list_rules(self) -> dict:
+        return self.respgen.list_rules()
+
+    def set_global_headers(self, headers: dict):
+        self.respgen.set_global_headers(headers)
+        return
+
+    def make_httpd(self, server_address: tuple, threads: int,
+                   bind_and_activate: bool = True) -> HTTPServer:
+        if threads == 0 and (self.respgen.delayed or
+                             self.respgen.admin is not None or
+                             self.watcher is not None):
+            threads = DELAY_THREADS
         PatternRequestHandler = self.make_handler_class(
-            'PatternRequestHandler', self.respgen)
+            'PatternRequestHandler', self.respgen,
+            keep_alive=threads > 0, idle_timeout=self.idle_timeout)
+        if threads > 0:
+            return PooledHTTPServer(server_address, PatternRequestHandler,
+                                    threads, bind_and_activate)
+        return MockHTTPServer(server_address, PatternRequestHandler,
+                              bind_and_activate)
+
+    def make_async_server(self) -> 'AsyncMockServer':
+        from yamas.aioserver import AsyncMockServer
+        return AsyncMockServer(self.respgen, self.server_version(self.respgen),
+                               self.idle_timeout)
+
+    def run(self, ip: str, port: int, threads: int = 0,
+            engine: str = 'http', workers: int = 0, watch: bool = False):
+        if engine not in ENGINES:
+            raise ServerError(f'Unsupported engine {engine}')
+        if watch and self.spec_file is None:
+            raise ServerError('Watching requires a spec file')
+        if workers > 0 and self.respgen.admin is not None:
+            raise ServerError(
+                'The admin endpoint is not available with worker processes')
+        if workers > 0 and watch:
+            raise ServerError('Watching is not available with worker processes')
         try:
-            httpd = HTTPServer(server_address, PatternRequestHandler)
-            httpd.serve_forever()
+            if watch:
+                self.watch()
+            if workers > 0:
+                self.respgen.share_counters()
+                sock = self.bind(ip, port)
+                PreforkServer(
+                    sock,
+                    lambda sock: self.serve_socket(sock, threads, engine),
+                    workers).run()
+            elif engine == 'asyncio':
+                self.make_async_server().run(sock=self.bind(ip, port))
+            else:
+                with phase(self.profile, 'bind'):
+                    httpd = self.make_httpd((ip, port), threads)
+                self.report_profile()
+                httpd.serve_forever()
         except Exception as e:
             raise ServerError(e)
         return
+
+    def bind(self, ip: str, port: int) -> socket.socket:
+        with phase(self.profile, 'bind'):
+            sock = bind_socket(ip, port)
+        self.report_profile()
+        return sock
+
+    def report_profile(self):
+        if self.profile is not None:
+            self.profile.report()
+        return
+
+    def serve_socket(self, sock: socket.socket, threads: int, engine: str):
+        stop_signals = (signal.SIGTERM, signal.SIGINT)
+        if engine == 'asyncio':
+            self.make_async_server().run(sock=sock, stop_signals=stop_signals)
+            return
+        httpd = self.make_httpd(sock.getsockname()[:2], threads,
+                                bind_and_activate=False)
+        httpd.socket.close()
+        httpd.socket = sock
+
+        def shutdown(signum, frame):
+            Thread(target=httpd.shutdown, daemon=True).start()
+
+        for signum in stop_signals:
+            signal.signal(signum, shutdown)
+        httpd.serve_forever()
+        return
@@ -0,0 +1,142 @@
+# coding=utf-8
+# Copyright 2019 YAM AI Machinery Limited
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import copyreg
+import gc
+import hashlib
+import os
+import pickle
+import re
+import stat
+import sys
+from yamas.config import VERSION
+
+PATTERN_TYPE = type(re.compile(''))
+DEFAULT_SPEC_CACHE_DIR = os.path.join('~', '.cache', 'yamas')
+
+
+class LazyPattern:
+    def __init__(self, pattern: str, flags: int, groups: int,
+                 groupindex: dict):
+        self.pattern = pattern
+        self.flags = flags
+        self.groups = groups
+        self.groupindex = groupindex
+        self.compiled = None
+        return
+
+    def fullmatch(self, path: str):
+        compiled = self.compiled
+        if compiled is None:
+            compiled = self.compiled = re.compile(self.pattern, self.flags)
+        return compiled.fullmatch(path)
+
+    def __eq__(self, other):
+        return isinstance(other, LazyPattern) and \
+            self.pattern == other.pattern and self.flags == other.flags
+
+    def __hash__(self):
+        return hash((LazyPattern, self.pattern, self.flags))
+
+    def __reduce__(self):
+        return (LazyPattern,
+                (self.pattern, self.flags, self.groups, self.groupindex))
+
+    def __repr__(self):
+        return f'LazyPattern({self.pattern!r})'
+
+
+def reduce_pattern(cpat) -> tuple:
+    return (LazyPattern,
+            (cpat.pattern, cpat.flags, cpat.groups, dict(cpat.groupindex)))
+
+
+def file_signature(file_path: str) -> tuple:
+    info = os.stat(file_path)
+    return info.st_mtime_ns, info.st_size
+
+
+def trusted(fd: int) -> bool:
+    info = os.fstat(fd)
+    if hasattr(os, 'getuid') and info.st_uid != os.getuid():
+        return False
+    return not info.st_mode & (stat.S_IWGRP | stat.S_IWOTH)
+
+
+def content_files(state: dict) -> list:
+    paths = set()
+    for respsel_dict in state['rules'].values():
+        for respsel in respsel_dict.values():
+            for maker in respsel.response_makers:
+                if maker.content_file is not None:
+                    paths.add(maker.content_file.path)
+    return sorted(paths)
+
+
+class SpecCache:
+    def __init__(self, cache_dir: str = DEFAULT_SPEC_CACHE_DIR):
+        self.cache_dir = os.path.expanduser(cache_dir)
+        return
+
+    @staticmethod
+    def key(spec_json: str, base_dir: str = None, *options) -> str:
+        digest = hashlib.sha256()
+        for part in (VERSION, sys.version, base_dir or '') + options:
+            digest.update(str(part).encode('utf-8') + b'\0')
+        digest.update(spec_json.encode('utf-8'))
+        return digest.hexdigest()
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f'{key}.pickle')
+
+    def load(self, key: str) -> dict:
+        enabled = gc.isenabled()
+        gc.disable()
+        try:
+            with open(self.path(key), 'rb') as f:
+                if not trusted(f.fileno()):
+                    return None
+                files, state = pickle.load(f)
+            for file_path, signature in files:
+                if file_signature(file_path) != signature:
+                    return None
+        except Exception:
+            return None
+        finally:
+            if enabled:
+                gc.enable()
+        return state
+
+    def store(self, key: str, state: dict) -> bool:
+        files = [(file_path, file_signature(file_path))
+                 for file_path in content_files(state)]
+        tmp_path = f'{self.path(key)}.{os.getpid()}.tmp'
+        try:
+            os.makedirs(self.cache_dir, 0o700, exist_ok=True)
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+            with open(fd, 'wb') as f:
+                pickler = pickle.Pickler(f, pickle.HIGHEST_PROTOCOL)
+                pickler.dispatch_table = copyreg.dispatch_table.copy()
+                pickler.dispatch_table[PATTERN_TYPE] = reduce_pattern
+                pickler.dump((files, state))
+            os.replace(tmp_path, self.path(key))
+        except Exception as e:
+            print(f'Failed to write spec cache: {e}', file=sys.stderr)
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            return False
+        return True
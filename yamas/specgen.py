@@ -0,0 +1,133 @@
+# coding=utf-8
+# Copyright 2019 YAM AI Machinery Limited
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import random
+from collections import OrderedDict
+from json import dumps
+from typing import List, Tuple
+from yamas.reqresp import Method
+
+SHAPES = ('regex', 'template', 'shared-prefix', 'no-prefix', 'mixed')
+RESOURCES = ['users', 'orders', 'items', 'teams', 'projects', 'invoices']
+WORDS = ['alpha', 'bravo', 'charlie', 'delta', 'echo', 'foxtrot', 'golf']
+EXTRA_METHODS = [Method.POST, Method.PUT, Method.PATCH, Method.DELETE]
+DEFAULT_RULES = 1000
+DEFAULT_BODY_SIZE = 256
+DEFAULT_INTERPOLATION = 0.5
+
+
+def rule_random(seed: int, idx: int) -> random.Random:
+    return random.Random(f'{seed}-{idx}')
+
+
+def rule_shape(shape: str, idx: int) -> str:
+    if shape == 'mixed':
+        return SHAPES[idx % (len(SHAPES) - 1)]
+    return shape
+
+
+def make_pattern(idx: int, shape: str, seed: int) -> Tuple[str, str, List[str]]:
+    rng = rule_random(seed, idx)
+    resources = rng.sample(RESOURCES, rng.randint(1, 3))
+    kind = rule_shape(shape, idx)
+    pattern = ['', 'api', f'r{idx}']
+    path = ['', 'api', f'r{idx}']
+    placeholders = []
+    if kind == 'shared-prefix':
+        pattern = ['', 'users', '(\\w+)', f'r{idx}']
+        path = ['', 'users', rng.choice(WORDS), f'r{idx}']
+        placeholders.append('$p_0')
+    for resource in resources:
+        pattern.append(resource)
+        path.append(resource)
+        numeric = rng.random() < 0.5
+        value = str(rng.randint(1, 99999)) if numeric else rng.choice(WORDS)
+        path.append(value)
+        if kind == 'template':
+            name = f'{resource[:-1]}_id'
+            pattern.append(f'{{{name}:int}}' if numeric else f'{{{name}}}')
+            placeholders.append(f'${name}')
+        else:
+            pattern.append('(\\d+)' if numeric else '(\\w+)')
+            placeholders.append(f'$p_{len(placeholders)}')
+    if kind == 'template':
+        return '/'.join(pattern), '/'.join(path), placeholders
+    if kind == 'no-prefix':
+        return f'^(?:/v\\d+)?{"/".join(pattern)}$', '/'.join(path), \
+            placeholders
+    return f'^{"/".join(pattern)}$', '/'.join(path), placeholders
+
+
+def make_value(rng: random.Random, placeholders: List[str], depth: int) -> any:
+    kind = rng.random()
+    if placeholders and kind < 0.3:
+        return f'{rng.choice(WORDS)} {rng.choice(placeholders)}'
+    if kind < 0.5:
+        return rng.randint(0, 1000000)
+    if kind < 0.6:
+        return rng.random() < 0.5
+    if depth < 2 and kind < 0.7:
+        return [make_value(rng, placeholders, depth + 1) for _ in range(3)]
+    if depth < 2 and kind < 0.8:
+        return OrderedDict((f'{rng.choice(WORDS)}{i}',
+                            make_value(rng, placeholders, depth + 1))
+                           for i in range(3))
+    return ' '.join(rng.choice(WORDS) for _ in range(rng.randint(1, 6)))
+
+
+def make_body(rng: random.Random, size: int,
+              placeholders: List[str]) -> OrderedDict:
+    body = OrderedDict()
+    length = 2
+    while length < size:
+        key = f'field{len(body)}'
+        value = make_value(rng, placeholders, 0)
+        length += len(dumps(key)) + len(dumps(value)) + (4 if body else 2)
+        body[key] = value
+    return body
+
+
+def generate_spec(rules: int = DEFAULT_RULES, shape: str = 'mixed',
+                  body_size: int = DEFAULT_BODY_SIZE,
+                  interpolation: float = DEFAULT_INTERPOLATION,
+                  seed: int = 0) -> OrderedDict:
+    if shape not in SHAPES:
+        raise ValueError(f'Unsupported pattern shape {shape}')
+    if not 0 <= interpolation <= 1:
+        raise ValueError(f'Interpolation ratio must be between 0 and 1: {interpolation}')
+    rule_dict = OrderedDict()
+    for idx in range(rules):
+        pattern, _, placeholders = make_pattern(idx, shape, seed)
+        rng = rule_random(seed, -idx - 1)
+        interpolate = rng.random() < interpolation
+        resps = OrderedDict()
+        resps[Method.GET.value] = OrderedDict([
+            ('contentType', 'json'),
+            ('content', make_body(rng, body_size,
+                                  placeholders if interpolate else [])),
+            ('interpolate', interpolate)
+        ])
+        for method in EXTRA_METHODS:
+            if rng.random() < 0.25:
+                resps[method.value] = OrderedDict([
+                    ('status', 204 if method is Method.DELETE else 200),
+                    ('content', '' if method is Method.DELETE else 'ok')
+                ])
+        rule_dict[pattern] = resps
+    return OrderedDict([('rules', rule_dict)])
+
+
+def sample_path(idx: int, shape: str = 'mixed', seed: int = 0) -> str:
+    return make_pattern(idx, shape, seed)[1]
@@ -0,0 +1,62 @@
+# coding=utf-8
+# Copyright 2019 YAM AI Machinery Limited
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import sys
+from collections import OrderedDict
+from contextlib import contextmanager
+from time import perf_counter
+
+
+class StartupProfile:
+    def __init__(self):
+        self.started = perf_counter()
+        self.phases = OrderedDict()
+        return
+
+    @contextmanager
+    def phase(self, name: str):
+        started = perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + \
+                perf_counter() - started
+
+    def report(self, file=None):
+        lines = ['Startup profile:']
+        for name, seconds in self.phases.items():
+            lines.append(f'  {name:<10}{seconds * 1000:10.1f} ms')
+        lines.append(
+            f'  {"total":<10}{(perf_counter() - self.started) * 1000:10.1f} ms')
+        print('\n'.join(lines), file=file or sys.stderr)
+        return
+
+
+class NoPhase:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+NO_PHASE = NoPhase()
+
+
+def phase(profile: StartupProfile, name: str):
+    if profile is None:
+        return NO_PHASE
+    return profile.phase(name)
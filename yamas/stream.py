@@ -0,0 +1,109 @@
+# coding=utf-8
+# Copyright 2019 YAM AI Machinery Limited
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+from itertools import count as counter
+from json import dumps
+from typing import Iterator, TYPE_CHECKING
+from yamas.ex import MockSpecError
+from yamas.template import InterpolationPlan
+
+if TYPE_CHECKING:
+    from yamas.reqresp import Response
+
+STREAM_BUFFER_SIZE = 16384
+LAST_CHUNK = b'0\r\n\r\n'
+
+
+class FileStream:
+    def __init__(self, path: str):
+        try:
+            os.stat(path)
+        except OSError as e:
+            raise MockSpecError(f'Failed to read stream file {path}: {e}')
+        self.path = path
+
+    def chunks(self, groups: tuple, named: dict) -> Iterator[bytes]:
+        with open(self.path, 'rb') as f:
+            while True:
+                line = f.readline(STREAM_BUFFER_SIZE)
+                if not line:
+                    break
+                yield line
+
+
+class RecordStream:
+    def __init__(self, record: any, json: bool, interpolate: bool,
+                 count: int = None):
+        self.plan = None
+        self.record = None
+        if interpolate:
+            self.plan = InterpolationPlan(record, json)
+        elif json:
+            self.record = dumps(record).encode('utf-8') + b'\n'
+        elif isinstance(record, str):
+            self.record = record.encode('utf-8') + b'\n'
+        else:
+            raise MockSpecError(
+                f'Record "{dumps(record)}" is not a string but its type is text or not given')
+        if self.plan is not None and self.plan.static:
+            self.record = self.plan.render(()) + b'\n'
+            self.plan = None
+        self.count = count
+
+    def chunks(self, groups: tuple, named: dict) -> Iterator[bytes]:
+        indices = counter() if self.count is None else range(self.count)
+        if self.plan is None:
+            for _ in indices:
+                yield self.record
+            return
+        named = dict(named) if named else {}
+        for n in indices:
+            named['n'] = n
+            yield self.plan.render(groups, named) + b'\n'
+
+
+def buffered(chunks: Iterator[bytes],
+             size: int = STREAM_BUFFER_SIZE) -> Iterator[bytes]:
+    buffer = []
+    buffered_size = 0
+    for chunk in chunks:
+        buffer.append(chunk)
+        buffered_size += len(chunk)
+        if buffered_size >= size:
+            yield b''.join(buffer)
+            buffer = []
+            buffered_size = 0
+    if buffered_size:
+        yield b''.join(buffer)
+
+
+def encode_chunked(chunks: Iterator[bytes]) -> Iterator[bytes]:
+    for chunk in buffered(chunks):
+        yield b'%x\r\n%s\r\n' % (len(chunk), chunk)
+    yield LAST_CHUNK
+
+
+def body_chunks(response: 'Response', chunked: bool) -> Iterator[bytes]:
+    if response.content_stream is not None:
+        if chunked:
+            yield from encode_chunked(response.content_stream)
+        else:
+            yield from buffered(response.content_stream)
+    elif response.content_file is not None:
+        if response.content_file.size:
+            yield response.content_file.view()
+    elif response.content_bytes:
+        yield response.content_bytes
@@ -0,0 +1,142 @@
+# coding=utf-8
+# Copyright 2019 YAM AI Machinery Limited
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import re
+from json import dumps
+from string import Template
+from typing import Union
+
+PLACEHOLDER = Template.pattern
+POSITIONAL = re.compile('p_([0-9]+)')
+
+
+def invalid_placeholder(template: str, start: int) -> str:
+    lines = template[:start].splitlines(keepends=True)
+    if not lines:
+        colno, lineno = 1, 1
+    else:
+        colno = start - len(''.join(lines[:-1]))
+        lineno = len(lines)
+    return f'Invalid placeholder in string: line {lineno}, col {colno}'
+
+
+def escape_json(value: str) -> bytes:
+    return dumps(value)[1:-1].encode('utf-8')
+
+
+def escape_text(value: str) -> bytes:
+    return value.encode('utf-8')
+
+
+class Slot:
+    def __init__(self, name: str, escape):
+        self.name = name
+        positional = POSITIONAL.fullmatch(name)
+        self.index = int(positional.group(1)) if positional else None
+        self.escape = escape
+
+    def render(self, groups: tuple, named: dict) -> bytes:
+        if self.index is not None and self.index < len(groups):
+            value = groups[self.index]
+        elif named and self.name in named:
+            value = named[self.name]
+        else:
+            raise KeyError(self.name)
+        return self.escape(str(value))
+
+
+class InvalidSlot:
+    def __init__(self, message: str):
+        self.message = message
+
+    def render(self, groups: tuple, named: dict) -> bytes:
+        raise ValueError(self.message)
+
+
+class InterpolationPlan:
+    def __init__(self, template: any, json: bool):
+        self.parts = []
+        self.literal = []
+        if json:
+            self.compile_json(template)
+        else:
+            self.compile_string(template, escape_text)
+        self.flush()
+        return
+
+    @property
+    def static(self) -> bool:
+        return all(isinstance(part, bytes) for part in self.parts)
+
+    def emit(self, fragment: bytes):
+        self.literal.append(fragment)
+        return
+
+    def flush(self):
+        if self.literal:
+            self.parts.append(b''.join(self.literal))
+            self.literal = []
+        return
+
+    def emit_slot(self, slot: Union[Slot, InvalidSlot]):
+        self.flush()
+        self.parts.append(slot)
+        return
+
+    def compile_string(self, template: str, escape):
+        pos = 0
+        for m in PLACEHOLDER.finditer(template):
+            self.emit(escape(template[pos:m.start()]))
+            pos = m.end()
+            name = m.group('named') or m.group('braced')
+            if name is not None:
+                self.emit_slot(Slot(name, escape))
+            elif m.group('escaped') is not None:
+                self.emit(escape(m.group('escaped')))
+            else:
+                self.emit_slot(InvalidSlot(
+                    invalid_placeholder(template, m.start('invalid'))))
+                return
+        self.emit(escape(template[pos:]))
+        return
+
+    def compile_json(self, item: any):
+        if isinstance(item, str):
+            self.emit(b'"')
+            self.compile_string(item, escape_json)
+            self.emit(b'"')
+        elif isinstance(item, dict):
+            self.emit(b'{')
+            for i, (k, v) in enumerate(item.items()):
+                if i:
+                    self.emit(b', ')
+                self.emit(dumps(k).encode('utf-8') + b': ')
+                self.compile_json(v)
+            self.emit(b'}')
+        elif isinstance(item, list):
+            self.emit(b'[')
+            for i, v in enumerate(item):
+                if i:
+                    self.emit(b', ')
+                self.compile_json(v)
+            self.emit(b']')
+        else:
+            self.emit(dumps(item).encode('utf-8'))
+        return
+
+    def render(self, groups: tuple, named: dict = None) -> bytes:
+        return b''.join(
+            part if part.__class__ is bytes else part.render(groups, named)
+            for part in self.parts)
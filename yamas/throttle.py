@@ -0,0 +1,140 @@
+# coding=utf-8
+# Copyright 2019 YAM AI Machinery Limited
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import socket
+import sys
+from heapq import heappush, heappop
+from itertools import count
+from threading import Condition, Thread
+from time import monotonic
+from typing import Iterator
+
+TICKS_PER_SECOND = 20
+RETRY_INTERVAL = 0.01
+UNTHROTTLED_QUOTA = 1 << 20
+
+
+class Throttle:
+    def __init__(self, bytes_per_second: int = None, ttfb: float = 0.0):
+        self.bytes_per_second = bytes_per_second
+        self.ttfb = ttfb
+        self.chunk_size = UNTHROTTLED_QUOTA if bytes_per_second is None \
+            else max(1, bytes_per_second // TICKS_PER_SECOND)
+
+
+def make_throttle(throttle: dict) -> Throttle:
+    if not throttle:
+        return None
+    return Throttle(throttle.get('bytesPerSecond'),
+                    throttle.get('ttfb', 0) / 1000)
+
+
+def slices(chunks: Iterator[bytes], size: int) -> Iterator[memoryview]:
+    for chunk in chunks:
+        view = memoryview(chunk)
+        for start in range(0, len(view), size):
+            yield view[start:start + size]
+
+
+class PacedWrite:
+    def __init__(self, sock: socket.socket, chunks: Iterator[bytes],
+                 throttle: Throttle):
+        self.sock = sock
+        self.chunks = iter(chunks)
+        self.throttle = throttle
+        self.pending = memoryview(b'')
+
+    def step(self) -> float:
+        budget = self.throttle.chunk_size
+        sent_total = 0
+        try:
+            while budget > 0:
+                if not self.pending:
+                    chunk = next(self.chunks, None)
+                    if chunk is None:
+                        self.close()
+                        return None
+                    self.pending = memoryview(chunk)
+                    continue
+                try:
+                    sent = self.sock.send(self.pending[:budget])
+                except (BlockingIOError, InterruptedError):
+                    break
+                self.pending = self.pending[sent:]
+                budget -= sent
+                sent_total += sent
+        except OSError:
+            self.close()
+            return None
+        except Exception as e:
+            sys.stderr.write(f'Paced write failed: {e}\n')
+            self.close()
+            return None
+        if self.throttle.bytes_per_second is not None and sent_total:
+            return sent_total / self.throttle.bytes_per_second
+        return 0.0 if budget <= 0 else RETRY_INTERVAL
+
+    def close(self):
+        try:
+            self.sock.shutdown(socket.SHUT_WR)
+        except OSError:
+            pass
+        self.sock.close()
+        return
+
+
+class Pacer:
+    def __init__(self):
+        self.heap = []
+        self.sequence = count()
+        self.cond = Condition()
+        self.pid = None
+        return
+
+    def submit(self, sock: socket.socket, chunks: Iterator[bytes],
+               throttle: Throttle):
+        sock.setblocking(False)
+        self.schedule(PacedWrite(sock, chunks, throttle), throttle.ttfb)
+        return
+
+    def schedule(self, job: PacedWrite, delay: float):
+        with self.cond:
+            if self.pid != os.getpid():
+                self.pid = os.getpid()
+                self.heap = []
+                Thread(target=self.run, name='yamas-pacer', daemon=True).start()
+            heappush(self.heap, (monotonic() + delay, next(self.sequence), job))
+            self.cond.notify()
+        return
+
+    def run(self):
+        while True:
+            with self.cond:
+                if not self.heap:
+                    self.cond.wait()
+                    continue
+                due, _, job = self.heap[0]
+                wait = due - monotonic()
+                if wait > 0:
+                    self.cond.wait(wait)
+                    continue
+                heappop(self.heap)
+            delay = job.step()
+            if delay is not None:
+                self.schedule(job, delay)
+
+
+pacer = Pacer()
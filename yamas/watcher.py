@@ -0,0 +1,64 @@
+# coding=utf-8
+# Copyright 2019 YAM AI Machinery Limited
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import sys
+from threading import Event, Thread
+from typing import Callable
+from yamas.ex import YamasException
+
+WATCH_INTERVAL = 1.0
+
+
+def file_signature(file_path: str) -> tuple:
+    try:
+        stat = os.stat(file_path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+class SpecWatcher(Thread):
+    def __init__(self, spec_file: str, reload: Callable[[], None],
+                 interval: float = None):
+        super().__init__(name='yamas-watcher', daemon=True)
+        self.spec_file = spec_file
+        self.reload = reload
+        self.interval = WATCH_INTERVAL if interval is None else interval
+        self.signature = file_signature(spec_file)
+        self.stopped = Event()
+        return
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            self.check()
+        return
+
+    def check(self) -> bool:
+        signature = file_signature(self.spec_file)
+        if signature is None or signature == self.signature:
+            return False
+        self.signature = signature
+        try:
+            self.reload()
+        except (YamasException, OSError) as e:
+            print(f'Failed to reload {self.spec_file}: {e}', file=sys.stderr)
+            return False
+        print(f'Reloaded mock data file: {self.spec_file}', file=sys.stderr)
+        return True
+
+    def stop(self):
+        self.stopped.set()
+        return